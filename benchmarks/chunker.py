@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Phrase chunker throughput
+
+Compares, on the same parsed Docs and in the same process:
+
+    legacy    the original per-token chunk_sentence (POS if/elif ladder, plus
+              the unused list(sent.noun_chunks)) from tests/legacy.py, run on
+              every sentence
+    chunk     spacy_tree.chunk_doc, vectorized over each Doc's POS/ORTH arrays
+    legacy-types, types
+              word node types by the original POS ladder vs the lookup table
+
+and checks that both give the same chunks and types, as tests/test_spacy_tree.py
+does on every test run. Times are the best of --repeat interleaved runs.
+Without the fr_core_news_sm model the synthetic pipeline from
+benchmarks/pipeline.py tags the corpus.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from corpus import make_paragraphs  # noqa: E402
+from legacy import legacy_chunks, legacy_word_type  # noqa: E402
+from model_loader import DEFAULT_MODEL  # noqa: E402
+from spacy_tree import pos_tables, chunk_doc  # noqa: E402
+
+
+def vectorized_chunks(docs):
+    return [chunk_doc(doc, list(doc.sents)) for doc in docs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phrase chunker throughput")
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model")
+    args = parser.parse_args()
+
+    from pipeline import benchmark_pipeline
+    nlp, pipeline = benchmark_pipeline(args.model)
+    docs = list(nlp.pipe(make_paragraphs(args.paragraphs)))
+    tokens = sum(len(doc) for doc in docs)
+    word_types = pos_tables()[1]
+
+    if legacy_chunks(docs) != vectorized_chunks(docs):
+        print("chunk_doc differs from the legacy chunker")
+        sys.exit(1)
+    if ([legacy_word_type(token) for doc in docs for token in doc]
+            != [word_types[token.pos] for doc in docs for token in doc]):
+        print("word type table differs from the legacy ladder")
+        sys.exit(1)
+
+    stages = {
+        "legacy": lambda: legacy_chunks(docs),
+        "chunk": lambda: vectorized_chunks(docs),
+        "legacy-types": lambda: [legacy_word_type(token) for doc in docs for token in doc],
+        "types": lambda: [word_types[token.pos] for doc in docs for token in doc],
+    }
+    best = dict.fromkeys(stages, float("inf"))
+    for _ in range(args.repeat):  # interleaved, so load spikes hit every stage alike
+        for name, stage in stages.items():
+            start = time.perf_counter()
+            stage()
+            best[name] = min(best[name], time.perf_counter() - start)
+
+    print(f"{args.paragraphs} paragraphs, {tokens} tokens, pipeline: {pipeline}")
+    for name, seconds in best.items():
+        print(f"{name:<13} {seconds * 1000:9.1f} ms {tokens / seconds:12,.0f} tokens/sec")
+    print(f"chunking x{best['legacy'] / best['chunk']:.1f}, "
+          f"word types x{best['legacy-types'] / best['types']:.1f} (same output)")
+
+
+if __name__ == "__main__":
+    main()
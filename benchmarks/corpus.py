@@ -0,0 +1,43 @@
+"""
+Synthetic French-like corpora for the benchmarks
+
+Deterministic (seeded) paragraphs built from a small vocabulary with commas,
+sentence ends, quotes and the odd number, so parse timings are comparable
+across runs without shipping a book.
+"""
+
+import random
+from typing import List
+
+VOCABULARY = ("je tu il elle le la les un une des de à dans sur pour avec et mais que qui "
+              "maison bougie temps yeux heure chambre souvenir église côté chemin bonne "
+              "longtemps souvent parfois jamais couché endormi fermaient pensais lisais "
+              "voulais dire être avoir Combray Swann Françoise").split()
+
+
+def make_paragraph(rng: random.Random, sentences: int = 8) -> str:
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(5, 40))]
+        for i in range(3, len(words), 7):
+            words[i] += ","
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), str(rng.randint(1, 1914)))
+        if rng.random() < 0.2:
+            words[0] = "« " + words[0]
+            words[-1] += " »"
+        out.append(" ".join(words).capitalize() + rng.choice("...!?"))
+    return " ".join(out)
+
+
+def make_paragraphs(count: int, sentences: int = 8, seed: int = 2650) -> List[str]:
+    """count synthetic paragraphs (the same ones for the same arguments)."""
+    rng = random.Random(seed)
+    return [make_paragraph(rng, sentences) for _ in range(count)]
+
+
+def write_corpus(path: str, paragraphs: int, sentences: int = 8, seed: int = 2650):
+    """Write a blank-line separated text file that ProustReader can read with start_line=0."""
+    with open(path, "w", encoding="utf-8") as f:
+        for paragraph in make_paragraphs(paragraphs, sentences, seed):
+            f.write(paragraph + "\n\n")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Memory of spaCy trees with spans attached vs detached
+
+Parses the same synthetic corpus with spaCy twice, each time in a fresh
+interpreter: once keeping spaCy spans on the nodes (every paragraph's Doc
+stays alive with the tree) and once with detached=True (character offsets
+only, Docs freed as soon as their subtree is built). For each it reports:
+
+    peak       tracemalloc peak during parse_text
+    retained   traced memory still held after parse_text and a gc pass
+    max rss    the process's peak resident set size (includes the model)
+
+Without the fr_core_news_sm model installed, the synthetic pipeline from
+benchmarks/pipeline.py is used instead, which is noted in the output; its Docs
+are smaller than the model's (no tensors), so the gap is smaller too.
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from corpus import write_corpus  # noqa: E402
+from model_loader import DEFAULT_MODEL, spacy_available  # noqa: E402
+
+MODES = {"attached": False, "detached": True}
+
+
+def measure(corpus: str, detached: bool, model_name: str, attributes) -> dict:
+    """Parse corpus once with spaCy in this process and report its memory use."""
+    from pipeline import benchmark_pipeline
+    from proust_reader import ProustReader
+    nlp, pipeline = benchmark_pipeline(model_name)
+    reader = ProustReader(corpus, start_line=0, use_spacy=False, cache=None,
+                          detached=detached, token_attributes=attributes)
+    reader.load_text()
+    reader.text_tree = None  # drop the regex tree the constructor built
+    reader.nlp = nlp
+    gc.collect()
+
+    tracemalloc.start()
+    reader.parse_text()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"pipeline": pipeline, "paragraphs": len(reader.text_tree.children),
+            "peak": peak, "retained": retained, "max_rss": max_rss_kb * 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="spaCy tree memory: spans attached vs detached")
+    parser.add_argument("--paragraphs", type=int, default=300, help="Corpus size")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model")
+    parser.add_argument("--token-attributes", default="",
+                        help="Comma-separated token attributes to extract (head,morph)")
+    parser.add_argument("--measure", choices=tuple(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    attributes = tuple(name for name in args.token_attributes.split(",") if name)
+
+    if args.measure:  # child process: one mode, result as JSON on stdout
+        print(json.dumps(measure(args.corpus, MODES[args.measure], args.model, attributes)))
+        return
+    if not spacy_available():
+        print("spaCy is not installed; nothing to compare")
+        sys.exit(1)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.txt")
+        write_corpus(corpus, args.paragraphs)
+        for mode in MODES:
+            command = [sys.executable, os.path.abspath(__file__), "--measure", mode,
+                       "--corpus", corpus, "--model", args.model,
+                       "--token-attributes", args.token_attributes]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"{mode} run failed:\n{result.stderr}")
+            results[mode] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    first = results["attached"]
+    print(f"{first['paragraphs']} paragraphs, pipeline: {first['pipeline']}")
+    print(f"{'':<10} {'peak MiB':>10} {'retained MiB':>13} {'max rss MiB':>12}")
+    for mode, result in results.items():
+        print(f"{mode:<10} {result['peak'] / 2**20:10.1f} {result['retained'] / 2**20:13.1f} "
+              f"{result['max_rss'] / 2**20:12.1f}")
+    attached, detached = results["attached"], results["detached"]
+    print(f"detached keeps {detached['retained'] / attached['retained']:.0%} of the attached "
+          f"tree's memory, peak {detached['peak'] / attached['peak']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+A model-free spaCy pipeline for the benchmarks
+
+When fr_core_news_sm is not installed, the spaCy benchmarks fall back to a
+blank French pipeline with a sentencizer and a lexical tagger for the corpus
+vocabulary. The tagger sets POS, tag, lemma, a flat dependency parse (each
+token attached to its sentence's first token) and a morph string, so every
+code path that reads them (phrase chunking, noun_chunks, token attributes)
+runs as it would on model output. Its Docs carry no tensors, so they are
+smaller than a real model's.
+"""
+
+from spacy.language import Language
+
+from model_loader import load_model
+
+# POS of the corpus vocabulary (benchmarks/corpus.py); other words are NOUN
+POS = {
+    "je": "PRON", "tu": "PRON", "il": "PRON", "elle": "PRON", "que": "SCONJ", "qui": "PRON",
+    "le": "DET", "la": "DET", "les": "DET", "un": "DET", "une": "DET", "des": "DET",
+    "de": "ADP", "à": "ADP", "dans": "ADP", "sur": "ADP", "pour": "ADP", "avec": "ADP",
+    "et": "CCONJ", "mais": "CCONJ", "bonne": "ADJ", "endormi": "ADJ", "couché": "VERB",
+    "longtemps": "ADV", "souvent": "ADV", "parfois": "ADV", "jamais": "ADV",
+    "fermaient": "VERB", "pensais": "VERB", "lisais": "VERB", "voulais": "VERB",
+    "dire": "VERB", "être": "AUX", "avoir": "AUX",
+    "combray": "PROPN", "swann": "PROPN", "françoise": "PROPN",
+}
+
+
+@Language.component("synthetic_tagger")
+def synthetic_tagger(doc):
+    root = None
+    for token in doc:
+        text = token.lower_
+        if token.is_punct:
+            pos = "PUNCT"
+        elif text.isdigit():
+            pos = "NUM"
+        else:
+            pos = POS.get(text, "NOUN")
+        token.pos_ = pos
+        token.tag_ = pos
+        token.lemma_ = text
+        token.set_morph("Number=Sing" if pos in ("NOUN", "DET", "ADJ") else "")
+        if token.is_sent_start or root is None:
+            root = token
+            token.dep_ = "ROOT"
+        else:
+            token.head = root
+            token.dep_ = "dep"
+    return doc
+
+
+def benchmark_pipeline(model_name: str):
+    """(nlp, description): the model if it is installed, else the synthetic pipeline."""
+    try:
+        return load_model(model_name), model_name
+    except OSError:
+        pass
+    import spacy
+    nlp = spacy.blank("fr")
+    nlp.add_pipe("sentencizer")
+    # Named like the model's component so the reader does not disable it
+    nlp.add_pipe("synthetic_tagger", name="morphologizer")
+    return nlp, f"synthetic tagger ({model_name} not installed)"
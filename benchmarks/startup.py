@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Proust reader
+
+Each measurement runs in a fresh interpreter so import caches do not carry
+over:
+
+    import       importing src.proust_reader (spaCy must not be imported)
+    regex        import plus a --no-spacy parse of a small synthetic text,
+                 up to the first highlighted word
+    background   the same with spaCy requested: the reader must be usable
+                 before the model has loaded
+
+The median of --repeat runs is compared against a JSON baseline, and the run
+fails if a stage is slower than baseline * (1 + --tolerance) plus a small
+absolute slack. The baseline is written on the first run or with --save.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "startup.json")
+
+# Differences below this many seconds are treated as noise
+SLACK_SECONDS = 0.02
+
+SNIPPETS = {
+    "import": """
+import sys, time
+start = time.perf_counter()
+import src.proust_reader
+elapsed = time.perf_counter() - start
+assert "spacy" not in sys.modules, "spaCy imported at module import"
+print(elapsed)
+""",
+    "regex": """
+import sys, time
+start = time.perf_counter()
+from src.proust_reader import ProustReader
+reader = ProustReader(sys.argv[1], start_line=0, use_spacy=False, max_paragraphs=20)
+reader.highlight_ranges()
+print(time.perf_counter() - start)
+""",
+    "background": """
+import sys, time
+start = time.perf_counter()
+from src.proust_reader import ProustReader
+reader = ProustReader(sys.argv[1], start_line=0, max_paragraphs=20, background_model=True)
+reader.highlight_ranges()
+print(time.perf_counter() - start)
+reader.stop_background()
+""",
+}
+
+SAMPLE_SENTENCE = ("Longtemps, je me suis couché de bonne heure. Parfois, à peine ma bougie "
+                   "éteinte, mes yeux se fermaient si vite que je n'avais pas le temps de "
+                   "me dire : « Je m'endors. »")
+
+
+def write_sample(path: str, paragraphs: int = 20):
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(paragraphs):
+            f.write(SAMPLE_SENTENCE + "\n\n")
+
+
+def measure(stage: str, sample: str, repeat: int) -> float:
+    """Median wall time of a stage over repeat fresh interpreters."""
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", SNIPPETS[stage], sample],
+                                cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{stage} failed:\n{result.stderr}")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reader import and startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage (median is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Overwrite the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = os.path.join(tmp, "sample.txt")
+        write_sample(sample)
+        results = {stage: measure(stage, sample, args.repeat) for stage in SNIPPETS}
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for stage, seconds in results.items():
+        line = f"{stage:<12} {seconds * 1000:8.1f} ms"
+        if baseline and stage in baseline:
+            limit = baseline[stage] * (1 + args.tolerance) + SLACK_SECONDS
+            line += f"   (baseline {baseline[stage] * 1000:.1f} ms)"
+            if seconds > limit:
+                line += "   REGRESSION"
+                regressions.append(stage)
+        print(line)
+
+    if baseline is None:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
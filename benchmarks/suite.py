@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Stage benchmarks for the Proust reader on a synthetic corpus
+
+Times each stage of a reader session on a seeded French-like corpus of
+--paragraphs paragraphs (no book or network needed):
+
+    load_text      ProustReader.load_text (file -> paragraph list)
+    parse_regex    ProustReader._parse_with_regex
+    parse_spacy    ProustReader._parse_with_spacy (skipped without the model)
+    ids            TextUnit.id of every node, caches cleared first
+    to_s_expr      TextUnit.to_s_expr of the whole book
+    render_frame   one headless frame of run_with_curses on a fake screen,
+                   including the token table the first frame builds
+
+Each stage reports the best wall time of --repeat runs (stages interleaved, so
+load spikes hit every stage alike) and its peak traced memory, measured in a
+separate run under tracemalloc so tracing does not skew the timings.
+
+Results are compared against a JSON baseline and the run fails if a stage is
+slower than baseline * (1 + --tolerance), or its peak memory larger than
+baseline * (1 + --memory-tolerance), plus a small absolute slack. The baseline
+is written on the first run or with --save, and only compared against runs on
+the same corpus size.
+"""
+
+import argparse
+import curses
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from corpus import write_corpus  # noqa: E402
+from model_loader import DEFAULT_MODEL, load_model, spacy_available  # noqa: E402
+from proust_reader import ProustReader  # noqa: E402
+from text_unit import TextUnit  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "suite.json")
+
+# Differences below these are treated as noise
+SLACK_SECONDS = 0.005
+SLACK_KB = 64
+
+
+class FakeScreen:
+    """The part of a curses window the reader uses; getch quits after one frame."""
+
+    def __init__(self, height: int = 40, width: int = 100):
+        self.height, self.width = height, width
+        self.writes = 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def getch(self):
+        return ord('q')
+
+    def addnstr(self, y, x, text, n, attr=0):
+        self.writes += 1
+
+    def _ignore(self, *args):
+        pass
+
+    clear = erase = move = clrtoeol = noutrefresh = timeout = _ignore
+
+
+@contextmanager
+def headless_curses():
+    """Stub the module-level curses calls that need a real terminal."""
+    names = ("curs_set", "start_color", "init_pair", "color_pair", "doupdate")
+    saved = {name: getattr(curses, name) for name in names}
+    for name in names:
+        setattr(curses, name, lambda *args: 0)
+    try:
+        yield
+    finally:
+        for name, function in saved.items():
+            setattr(curses, name, function)
+
+
+def fresh_tree(reader):
+    reader.text_tree = TextUnit("Du côté de chez Swann", "BOOK")
+    reader._cursor = None
+
+
+def build_stages(reader, nlp):
+    """name -> (setup, run); setup is untimed and returns run's argument."""
+    def regex_tree():
+        # The later stages always work on the regex tree, with or without spaCy
+        if reader.nlp is not None or not reader.text_tree.children:
+            reader.nlp = None
+            fresh_tree(reader)
+            reader._parse_with_regex()
+        reader._cursor = None
+
+    def tree_nodes():
+        regex_tree()
+        reader.text_tree._clear_ids()
+        return list(reader.text_tree.walk())
+
+    def parse_setup(model):
+        def setup():
+            reader.nlp = model
+            fresh_tree(reader)
+        return setup
+
+    def parsed_tree():
+        regex_tree()
+        return FakeScreen()
+
+    def render(screen):
+        with headless_curses():
+            reader.run_with_curses(screen)
+
+    stages = {
+        "load_text": (lambda: setattr(reader, "paragraphs", []), lambda _: reader.load_text()),
+        "parse_regex": (parse_setup(None), lambda _: reader._parse_with_regex()),
+        "parse_spacy": (parse_setup(nlp), lambda _: reader._parse_with_spacy()),
+        "ids": (tree_nodes, lambda nodes: [node.id for node in nodes]),
+        "to_s_expr": (parsed_tree, lambda _: reader.text_tree.to_s_expr()),
+        "render_frame": (parsed_tree, render),
+    }
+    if nlp is None:
+        del stages["parse_spacy"]
+    return stages
+
+
+def time_stage(setup, run) -> float:
+    argument = setup()
+    gc.collect()
+    start = time.perf_counter()
+    run(argument)
+    return time.perf_counter() - start
+
+
+def peak_memory_kb(setup, run) -> float:
+    argument = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(argument)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def load_spacy(model_name: str):
+    if not spacy_available():
+        return None
+    try:
+        return load_model(model_name)
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reader stage benchmarks on a synthetic corpus")
+    parser.add_argument("--paragraphs", type=int, default=300, help="Corpus size")
+    parser.add_argument("--sentences", type=int, default=8, help="Sentences per paragraph")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage (best is kept)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model for parse_spacy")
+    parser.add_argument("--no-spacy", action="store_true", help="Skip parse_spacy")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Overwrite the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10,
+                        help="Allowed peak memory growth over the baseline")
+    args = parser.parse_args()
+
+    nlp = None if args.no_spacy else load_spacy(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.txt")
+        write_corpus(corpus, args.paragraphs, args.sentences)
+        reader = ProustReader(corpus, start_line=0, use_spacy=False, cache=None)
+        reader.load_text()
+        stages = build_stages(reader, nlp)
+
+        seconds = dict.fromkeys(stages, float("inf"))
+        for _ in range(args.repeat):
+            for name, (setup, run) in stages.items():
+                seconds[name] = min(seconds[name], time_stage(setup, run))
+        peaks = {name: peak_memory_kb(setup, run) for name, (setup, run) in stages.items()}
+
+    corpus_key = f"{args.paragraphs}x{args.sentences}"
+    results = {name: {"seconds": seconds[name], "peak_kb": peaks[name]} for name in stages}
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("corpus") == corpus_key:
+            baseline = saved["stages"]
+        else:
+            print(f"Baseline is for a {saved.get('corpus')} corpus, not {corpus_key}; not comparing")
+
+    print(f"{args.paragraphs} paragraphs x {args.sentences} sentences"
+          f"{'' if nlp is not None else ' (parse_spacy skipped: no spaCy model)'}")
+    regressions = []
+    for name, result in results.items():
+        line = f"{name:<13} {result['seconds'] * 1000:9.2f} ms {result['peak_kb']:10.0f} KiB"
+        base = baseline.get(name) if baseline else None
+        if base:
+            line += f"   (baseline {base['seconds'] * 1000:.2f} ms {base['peak_kb']:.0f} KiB)"
+            slower = result["seconds"] > base["seconds"] * (1 + args.tolerance) + SLACK_SECONDS
+            larger = result["peak_kb"] > base["peak_kb"] * (1 + args.memory_tolerance) + SLACK_KB
+            if slower or larger:
+                line += "   REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if baseline is None and (args.save or not os.path.exists(args.baseline)):
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"corpus": corpus_key, "stages": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Regex tokenizer throughput
+
+Compares, on the same synthetic corpus and in the same process:
+
+    legacy    the original _build_regex_paragraph/_add_words_to_unit code
+              (tests/legacy.py, the tests' reference), building TextUnit trees
+    build     RegexTokenizer.build_batch, building the same trees
+    tokenize  RegexTokenizer.tokenize_batch, the flat typed token stream
+
+Throughput is tokens (words and punctuation) per second, best of --repeat
+runs; the garbage left by the previous run is collected before each one, so
+one stage's trees are not charged to the next. The run fails if the batch
+tokenizer API, tokenize_batch, is less than --target (default 10) times faster
+than the legacy path. build_batch is reported as a secondary number: it
+creates the same TextUnit nodes as the legacy path, and that allocation bounds
+how much faster tree building can get.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from corpus import make_paragraphs  # noqa: E402
+from legacy import legacy_paragraph  # noqa: E402
+from regex_tokenizer import BREAK, RegexTokenizer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex tokenizer throughput")
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--target", type=float, default=10.0,
+                        help="Required tokenize_batch speedup over the legacy path")
+    args = parser.parse_args()
+
+    texts = make_paragraphs(args.paragraphs)
+    tokenizer = RegexTokenizer()
+    tokens = sum(len(pieces) - types.count(BREAK)
+                 for pieces, types in tokenizer.tokenize_batch(texts))
+    stages = {
+        "legacy": lambda: [legacy_paragraph(i, text) for i, text in enumerate(texts)],
+        "build": lambda: list(tokenizer.build_batch(texts)),
+        "tokenize": lambda: list(tokenizer.tokenize_batch(texts)),
+    }
+    best = dict.fromkeys(stages, float("inf"))
+    for _ in range(args.repeat):  # interleaved, so load spikes hit every stage alike
+        for name, stage in stages.items():
+            gc.collect()
+            start = time.perf_counter()
+            stage()
+            best[name] = min(best[name], time.perf_counter() - start)
+
+    print(f"{args.paragraphs} paragraphs, {tokens} tokens")
+    for name, seconds in best.items():
+        print(f"{name:<9} {tokens / seconds:12,.0f} tokens/sec"
+              f"   x{best['legacy'] / seconds:.1f}")
+    speedup = best["legacy"] / best["tokenize"]
+    if speedup < args.target:
+        print(f"tokenize_batch is only x{speedup:.1f} the legacy path (target x{args.target:g})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
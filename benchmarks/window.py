@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Memory and stalls of windowed reading over a whole book
+
+Reads a synthetic corpus from its first token to its last with
+ProustReader(windowed=True), one token every --speed seconds as the curses
+loop would, and reports:
+
+    stalls     times the reader had to wait for a paragraph (the first one,
+               parsed before reading starts, counts as one)
+    resident   most parsed paragraphs held at once
+    traced     tracemalloc's current memory at every tenth of the book
+
+against the memory of the same book parsed in full. With spaCy installed the
+paragraphs are parsed with it (the synthetic pipeline from
+benchmarks/pipeline.py without the fr_core_news_sm model), otherwise with the
+regex tokenizer.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from corpus import write_corpus  # noqa: E402
+from model_loader import DEFAULT_MODEL, spacy_available  # noqa: E402
+from paragraph_window import LOOK_AHEAD, LOOK_BEHIND  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Windowed reading: memory and stalls")
+    parser.add_argument("--paragraphs", type=int, default=300, help="Corpus size")
+    parser.add_argument("--speed", type=float, default=0.0005, help="Seconds per token")
+    parser.add_argument("--look-ahead", type=int, default=LOOK_AHEAD)
+    parser.add_argument("--look-behind", type=int, default=LOOK_BEHIND)
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model")
+    parser.add_argument("--no-spacy", action="store_true", help="Parse with the regex tokenizer")
+    args = parser.parse_args()
+
+    from proust_reader import ProustReader
+    nlp, pipeline = None, "regex tokenizer"
+    if spacy_available() and not args.no_spacy:
+        from pipeline import benchmark_pipeline
+        nlp, pipeline = benchmark_pipeline(args.model)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.txt")
+        write_corpus(corpus, args.paragraphs)
+
+        full = ProustReader(corpus, start_line=0, use_spacy=False, cache=None, detached=True)
+        if nlp is not None:
+            full.text_tree = None
+            full.nlp = nlp
+            full.parse_text()
+        full_bytes = full.tree_bytes()
+        del full
+        gc.collect()
+
+        tracemalloc.start()
+        reader = ProustReader(corpus, start_line=0, use_spacy=False, cache=None, detached=True,
+                              windowed=True, look_ahead=args.look_ahead,
+                              look_behind=args.look_behind)
+        reader.nlp = nlp  # the first paragraph is already parsed, with regexes
+        reader.reading_speed = args.speed
+        window = reader.window
+        traced = []
+        resident = tokens = 0
+        start = time.perf_counter()
+        while True:
+            reader.apply_window_updates()
+            resident = max(resident, len(window.resident))
+            if reader.percent >= 10 * len(traced):
+                traced.append(tracemalloc.get_traced_memory()[0])
+            reader.move_to_next_word()
+            tokens += 1
+            if reader.cursor.position == 0:
+                break
+            time.sleep(args.speed)
+        seconds = time.perf_counter() - start
+        reader.stop_background()
+        tracemalloc.stop()
+
+    print(f"{args.paragraphs} paragraphs, {tokens} tokens in {seconds:.1f}s, "
+          f"pipeline: {pipeline}")
+    print(f"stalls {window.stalls}, parsed {window.parsed}, evicted {window.evicted}, "
+          f"at most {resident} paragraphs resident")
+    print("traced KiB by tenth of the book: " + " ".join(f"{b // 1024}" for b in traced))
+    print(f"full parse tree: {full_bytes // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Parallel AST generation for directories of texts
+
+Every input book is streamed paragraph by paragraph and cut into fixed-size
+chunks, which are parsed by a process pool; each worker loads its own spaCy
+model (or regex tokenizer) once, in the pool initializer. The parent writes
+results back in paragraph order, one output file per book, so the output is
+the same as a single-process --ast run over the whole book.
+
+Each book is written to "<output>.partial" with a "<output>.progress.json"
+journal next to it that records how many chunks (and bytes) are safely on
+disk. After a crash or Ctrl+C, rerunning the same command truncates the
+partial file to the last recorded chunk and carries on from there; finished
+books are skipped.
+"""
+
+import argparse
+import io
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .ingest import iter_paragraphs
+    from .model_loader import DEFAULT_MODEL, load_model
+    from .parse_cache import decode_unit, encode_unit
+    from .regex_tokenizer import RegexTokenizer
+    from .sexpr_writer import write_forest
+    from .spacy_tree import SPACY_COMPONENTS, build_spacy_paragraph
+    from .binary_ast import BinaryASTWriter
+except ImportError:  # run as a script: python src/batch_ast.py
+    from ingest import iter_paragraphs
+    from model_loader import DEFAULT_MODEL, load_model
+    from parse_cache import decode_unit, encode_unit
+    from regex_tokenizer import RegexTokenizer
+    from sexpr_writer import write_forest
+    from spacy_tree import SPACY_COMPONENTS, build_spacy_paragraph
+    from binary_ast import BinaryASTWriter
+
+FORMATS = {"sexpr": ".lisp", "binary": ".bast"}
+PARTIAL_SUFFIX = ".partial"
+PROGRESS_SUFFIX = ".progress.json"
+JOURNAL_VERSION = 1
+
+# Binary journals frame each chunk with its byte length
+_FRAME = struct.Struct("<Q")
+
+# Parser state of a worker process, set up once by _init_worker
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(use_spacy: bool, model_name: str, batch_size: int):
+    if use_spacy:
+        nlp = load_model(model_name)
+        _worker["nlp"] = nlp
+        _worker["disable"] = [name for name in nlp.pipe_names if name not in SPACY_COMPONENTS]
+        _worker["batch_size"] = batch_size
+    else:
+        _worker["tokenizer"] = RegexTokenizer()
+
+
+def parse_chunk(task: Tuple) -> Tuple[int, int, int, bytes]:
+    """Parse one chunk of paragraphs in a worker; returns (book, chunk, paragraphs, payload)."""
+    book, chunk, first, texts, fmt, compact = task
+    if "nlp" in _worker:
+        docs = _worker["nlp"].pipe(texts, batch_size=_worker["batch_size"],
+                                   disable=_worker["disable"])
+        paragraphs = [build_spacy_paragraph(first + k, doc, detached=True)
+                      for k, doc in enumerate(docs)]
+    else:
+        paragraphs = list(_worker["tokenizer"].build_batch(texts, first))
+
+    if fmt == "sexpr":
+        for paragraph in paragraphs:
+            # Detached from the book, so pin the id it has there
+            paragraph.node_id = f"book-p{paragraph.metadata['position']}"
+        out = io.StringIO()
+        write_forest(paragraphs, out, compact=compact)
+        payload = out.getvalue().encode("utf-8")
+    else:
+        encoded = [encode_unit(paragraph) for paragraph in paragraphs]
+        body = zlib.compress(pickle.dumps(encoded, pickle.HIGHEST_PROTOCOL), 1)
+        payload = _FRAME.pack(len(body)) + body
+    return book, chunk, len(texts), payload
+
+
+class BookJob:
+    """Output state of one book: its partial file, journal and out-of-order chunks."""
+
+    def __init__(self, source: str, output: str, settings: Dict, restart: bool):
+        self.source = source
+        self.output = output
+        self.partial = output + PARTIAL_SUFFIX
+        self.progress = output + PROGRESS_SUFFIX
+        self.settings = settings
+        self.chunks_done = 0
+        self.offset = 0
+        self.paragraphs = 0
+        self.total_chunks: Optional[int] = None
+        self.pending: Dict[int, Tuple[int, bytes]] = {}
+        self.file = None
+        self.finished = False
+
+        journal = None if restart else self._read_journal()
+        if journal is None and not restart and os.path.exists(output):
+            self.finished = True  # completed by an earlier run
+            return
+        if journal is not None and os.path.exists(self.partial):
+            self.chunks_done = journal["chunks"]
+            self.offset = journal["bytes"]
+            self.paragraphs = journal["paragraphs"]
+            self.file = open(self.partial, "r+b")
+            self.file.truncate(self.offset)  # drop anything written after the last journal entry
+            self.file.seek(self.offset)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            self.file = open(self.partial, "wb")
+            self._write_journal()
+
+    def _read_journal(self) -> Optional[Dict]:
+        try:
+            with open(self.progress, encoding="utf-8") as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if journal.get("version") != JOURNAL_VERSION or journal.get("settings") != self.settings:
+            return None  # written with other options; start the book over
+        return journal
+
+    def _write_journal(self):
+        tmp = self.progress + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": JOURNAL_VERSION, "settings": self.settings,
+                       "chunks": self.chunks_done, "bytes": self.offset,
+                       "paragraphs": self.paragraphs}, f)
+        os.replace(tmp, self.progress)
+
+    def add(self, chunk: int, paragraphs: int, payload: bytes):
+        """Accept a parsed chunk and write every chunk that is now in order."""
+        self.pending[chunk] = (paragraphs, payload)
+        wrote = False
+        while self.chunks_done in self.pending:
+            paragraphs, payload = self.pending.pop(self.chunks_done)
+            self.file.write(payload)
+            self.chunks_done += 1
+            self.offset += len(payload)
+            self.paragraphs += paragraphs
+            wrote = True
+        if wrote:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._write_journal()
+
+    def ready(self) -> bool:
+        return self.total_chunks is not None and self.chunks_done == self.total_chunks
+
+    def finish(self, fmt: str, title: str):
+        """Turn the partial file into the final output and drop the journal."""
+        self.file.close()
+        if fmt == "sexpr":
+            os.replace(self.partial, self.output)
+        else:
+            writer = BinaryASTWriter(title)
+            with open(self.partial, "rb") as f:
+                for body in _read_frames(f):
+                    for encoded in pickle.loads(zlib.decompress(body)):
+                        writer.add_paragraph(decode_unit(encoded))
+            writer.save(self.output + ".tmp")
+            os.replace(self.output + ".tmp", self.output)
+            os.remove(self.partial)
+        os.remove(self.progress)
+        self.finished = True
+
+
+def _read_frames(f) -> Iterator[bytes]:
+    while True:
+        header = f.read(_FRAME.size)
+        if not header:
+            return
+        (size,) = _FRAME.unpack(header)
+        yield f.read(size)
+
+
+def find_books(inputs: List[str], pattern: str = "*.txt") -> List[Tuple[str, str]]:
+    """(path, path relative to its input) for every file given or found under a directory."""
+    import glob
+    books = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for path in sorted(glob.glob(os.path.join(item, "**", pattern), recursive=True)):
+                books.append((path, os.path.relpath(path, item)))
+        else:
+            books.append((item, os.path.basename(item)))
+    return books
+
+
+class BatchAST:
+    """Generate one AST file per book with a process pool."""
+
+    def __init__(self, books: List[Tuple[str, str]], output_dir: str, fmt: str = "sexpr",
+                 compact: bool = False, use_spacy: bool = True, model_name: str = DEFAULT_MODEL,
+                 workers: Optional[int] = None, chunk_size: int = 64, batch_size: int = 64,
+                 start_line: int = 0, gutenberg: bool = False, restart: bool = False,
+                 progress=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {tuple(FORMATS)}")
+        self.books = books
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.compact = compact
+        self.use_spacy = use_spacy
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.start_line = start_line
+        self.gutenberg = gutenberg
+        self.restart = restart
+        self.progress = progress
+        self.jobs: List[BookJob] = []
+        self.paragraphs = 0
+        self.started = 0.0
+
+    def _settings(self) -> Dict:
+        """Options that change chunk boundaries or content; a journal must match them to resume."""
+        return {"format": self.fmt, "compact": self.compact, "chunk_size": self.chunk_size,
+                "parser": f"spacy:{self.model_name}" if self.use_spacy else "regex",
+                "start_line": self.start_line, "gutenberg": self.gutenberg}
+
+    def output_path(self, relative: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(relative)[0] + FORMATS[self.fmt])
+
+    def _tasks(self) -> Iterator[Tuple]:
+        """Chunks of every unfinished book, in order, skipping chunks already on disk."""
+        settings = self._settings()
+        for source, relative in self.books:
+            job = BookJob(source, self.output_path(relative), settings, self.restart)
+            index = len(self.jobs)
+            self.jobs.append(job)
+            if job.finished:
+                continue
+            paragraphs = iter_paragraphs(source, start_line=self.start_line,
+                                         gutenberg=self.gutenberg)
+            skip = job.chunks_done * self.chunk_size
+            paragraphs = islice(paragraphs, skip, None)
+            chunk = job.chunks_done
+            while True:
+                texts = list(islice(paragraphs, self.chunk_size))
+                if not texts:
+                    break
+                yield (index, chunk, chunk * self.chunk_size, texts, self.fmt, self.compact)
+                chunk += 1
+            job.total_chunks = chunk
+            self._finish_if_ready(job)
+
+    def _finish_if_ready(self, job: BookJob):
+        if job.ready():
+            job.finish(self.fmt, os.path.splitext(os.path.basename(job.source))[0])
+            self._report()
+
+    def _collect(self, book: int, chunk: int, paragraphs: int, payload: bytes):
+        job = self.jobs[book]
+        job.add(chunk, paragraphs, payload)
+        self.paragraphs += paragraphs
+        self._finish_if_ready(job)
+        self._report()
+
+    def _report(self):
+        if self.progress is not None:
+            done = sum(job.finished for job in self.jobs)
+            elapsed = time.perf_counter() - self.started
+            self.progress(done, len(self.books), self.paragraphs, elapsed)
+
+    def run(self):
+        """Parse every book; returns the number of paragraphs parsed in this run."""
+        self.started = time.perf_counter()
+        max_in_flight = self.workers * 4
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                 initargs=(self.use_spacy, self.model_name,
+                                           self.batch_size)) as pool:
+            tasks = self._tasks()
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    task = next(tasks, None)
+                    if task is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(pool.submit(parse_chunk, task))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(*future.result())
+        self._report()
+        return self.paragraphs
+
+
+class _ProgressLine:
+    """Progress on stderr: one rewritten line on a terminal, a line every few seconds otherwise."""
+
+    def __init__(self, interval: float = 5.0):
+        self.tty = sys.stderr.isatty()
+        self.interval = interval
+        self.last = 0.0
+        self.last_done = -1
+
+    def __call__(self, done: int, total: int, paragraphs: int, elapsed: float):
+        now = time.monotonic()
+        finished = done == total and self.last_done != total
+        if not self.tty and now - self.last < self.interval and not finished:
+            return
+        self.last, self.last_done = now, done
+        rate = paragraphs / elapsed if elapsed else 0.0
+        line = f"{done}/{total} books, {paragraphs} paragraphs, {rate:.1f} paragraphs/sec"
+        sys.stderr.write(f"\r{line}\033[K" if self.tty else line + "\n")
+        sys.stderr.flush()
+
+
+def main():
+    """Generate ASTs for many books in parallel."""
+    parser = argparse.ArgumentParser(description="Parallel AST generation for directories of texts")
+    parser.add_argument("inputs", nargs="+", help="Text files or directories of texts")
+    parser.add_argument("-o", "--output-dir", required=True, help="Where to write one AST per book")
+    parser.add_argument("--format", choices=tuple(FORMATS), default="sexpr", help="AST output format")
+    parser.add_argument("--compact", action="store_true", help="One line per node, no indentation")
+    parser.add_argument("--pattern", default="*.txt", help="File pattern inside directories")
+    parser.add_argument("--no-spacy", action="store_true", help="Parse with the regex tokenizer")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model each worker loads")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Paragraphs per task")
+    parser.add_argument("--batch-size", type=int, default=64, help="Paragraphs per nlp.pipe batch")
+    parser.add_argument("--start-line", type=int, default=0, help="Lines to skip in every book")
+    parser.add_argument("--gutenberg", action="store_true",
+                        help="Strip Project Gutenberg header and footer")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore earlier progress and regenerate every book")
+    args = parser.parse_args()
+
+    books = find_books(args.inputs, args.pattern)
+    if not books:
+        parser.error("no input texts found")
+    batch = BatchAST(books, args.output_dir, fmt=args.format, compact=args.compact,
+                     use_spacy=not args.no_spacy, model_name=args.model, workers=args.workers,
+                     chunk_size=args.chunk_size, batch_size=args.batch_size,
+                     start_line=args.start_line, gutenberg=args.gutenberg,
+                     restart=args.restart, progress=_ProgressLine())
+    start = time.perf_counter()
+    paragraphs = batch.run()
+    elapsed = time.perf_counter() - start
+    sys.stderr.write("\n" if sys.stderr.isatty() else "")
+    print(f"Parsed {paragraphs} paragraphs from {len(books)} books in {elapsed:.2f}s "
+          f"({paragraphs / elapsed if elapsed else 0.0:.1f} paragraphs/sec) "
+          f"with {batch.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Binary columnar AST format
+
+A single little-endian file holding a text tree in pre-order:
+
+    header      magic, version, node/paragraph/string counts, string blob size
+    strings     (string_count + 1) u64 offsets, then the UTF-8 blob
+    columns     one int32 array per column below, node_count entries each
+    paragraphs  (first row, row count) int32 pairs, one per paragraph
+
+Row 0 is the BOOK root; each paragraph's subtree is a contiguous row range, so a
+reader that memory-maps the file can rebuild any paragraph without touching the
+rest. Texts of sentences and phrases that are plain slices of their paragraph
+are stored as offsets only (text id -1), as in TreeStore.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import IO, Iterable, Iterator, List
+
+try:
+    from .text_unit import TextUnit
+    from .tree_store import NO_ROW, SLICE_TEXT, TreeStore
+    from .sexpr_parser import SExprPushParser
+    from .sexpr_writer import write_forest
+except ImportError:  # run as a script: python src/binary_ast.py
+    from text_unit import TextUnit
+    from tree_store import NO_ROW, SLICE_TEXT, TreeStore
+    from sexpr_parser import SExprPushParser
+    from sexpr_writer import write_forest
+
+MAGIC = b"STSBAST\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIQ")  # magic, version, nodes, paragraphs, strings, blob bytes
+
+# Fixed column order for VERSION 1; every column is int32, -1 meaning "none"
+COLUMNS = ("type", "parent", "depth", "index", "text", "start", "end", "schema",
+           "position", "length", "pos", "lemma", "tag", "extra", "node_id")
+
+
+class BinaryASTError(ValueError):
+    """Raised for files that are not binary ASTs or use an unknown version."""
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+class BinaryASTWriter:
+    """Collect paragraphs into a TreeStore and serialize it as a binary AST."""
+
+    def __init__(self, title: str = "", root_type: str = "BOOK"):
+        self.store = TreeStore(title, root_type)
+
+    def add_paragraph(self, unit):
+        """Append a paragraph subtree (TextUnit or TextUnitView)."""
+        self.store.append(unit)
+
+    def write(self, out: IO[bytes]):
+        """Write the collected tree to a binary stream."""
+        store = self.store
+        strings = list(store.strings)
+        ids = dict(store._string_ids)
+
+        def sid(text: str) -> int:
+            i = ids.get(text)
+            if i is None:
+                i = ids[text] = len(strings)
+                strings.append(text)
+            return i
+
+        n = len(store)
+        columns = {name: array("i") for name in COLUMNS}
+        schema_ids = [sid(json.dumps(list(schema), ensure_ascii=False))
+                      for schema in store.schemas]
+        type_ids = [sid(t) for t in store.types]
+        depth = columns["depth"]
+        for row in range(n):
+            parent = store.parent[row]
+            depth.append(0 if parent == NO_ROW else depth[parent] + 1)
+            extra = store.overflow.get(row)
+            columns["extra"].append(
+                NO_ROW if extra is None else sid(json.dumps(extra, ensure_ascii=False)))
+            node_id = store.node_ids.get(row)
+            columns["node_id"].append(NO_ROW if node_id is None else sid(node_id))
+        columns["type"] = array("i", (type_ids[c] for c in store.type_code))
+        columns["schema"] = array("i", (schema_ids[c] for c in store.meta_schema))
+        columns["parent"] = store.parent
+        columns["index"] = store.sibling_index
+        columns["text"] = store.text_id
+        columns["start"] = store.start
+        columns["end"] = store.end
+        columns["position"] = store.position
+        columns["length"] = store.length
+        columns["pos"] = store.pos_id
+        columns["lemma"] = store.lemma_id
+        columns["tag"] = store.tag_id
+
+        paragraphs = array("i")
+        tops = list(store.top_rows) + [n]
+        for first, following in zip(tops, tops[1:]):
+            paragraphs.extend((first, following - first))
+
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = array("Q", [0])
+        for blob in encoded:
+            offsets.append(offsets[-1] + len(blob))
+        blob_bytes = offsets[-1]
+
+        out.write(HEADER.pack(MAGIC, VERSION, n, len(store.top_rows), len(strings), blob_bytes))
+        out.write(_little_endian(offsets).tobytes())
+        for blob in encoded:
+            out.write(blob)
+        out.write(b"\0" * (-blob_bytes % 4))  # keep the int32 columns aligned
+        for name in COLUMNS:
+            out.write(_little_endian(columns[name]).tobytes())
+        out.write(_little_endian(paragraphs).tobytes())
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            self.write(f)
+
+
+def write_binary_ast(paragraphs: Iterable, path: str, title: str = ""):
+    """Export paragraph subtrees (e.g. text_tree.children) to a binary AST file."""
+    writer = BinaryASTWriter(title)
+    for paragraph in paragraphs:
+        writer.add_paragraph(paragraph)
+    writer.save(path)
+
+
+class BinaryAST:
+    """Memory-mapped reader with random access to paragraphs."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise BinaryASTError(f"{path} is empty")
+        self._views: List[memoryview] = []
+        self._strings = {}
+
+        magic, version, self.node_count, self.paragraph_count, string_count, blob_bytes = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise BinaryASTError(f"{path} is not a binary AST file")
+        if version != VERSION:
+            self.close()
+            raise BinaryASTError(f"{path} has unsupported version {version}")
+
+        pos = HEADER.size
+        self._offsets = self._array("Q", pos, string_count + 1)
+        pos += 8 * (string_count + 1)
+        self._blob_start = pos
+        pos += blob_bytes + (-blob_bytes % 4)
+        self.columns = {}
+        for name in COLUMNS:
+            self.columns[name] = self._array("i", pos, self.node_count)
+            pos += 4 * self.node_count
+        self._paragraphs = self._array("i", pos, 2 * self.paragraph_count)
+        self.title = self.string(self.columns["text"][0])
+        self.root_type = self.string(self.columns["type"][0])
+
+    def _array(self, typecode: str, offset: int, count: int):
+        size = array(typecode).itemsize * count
+        if sys.byteorder == "little":
+            view = memoryview(self._mm)[offset:offset + size].cast(typecode)
+            self._views.append(view)
+            return view
+        column = array(typecode)
+        column.frombytes(self._mm[offset:offset + size])
+        column.byteswap()
+        return column
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.paragraph_count
+
+    def string(self, sid: int) -> str:
+        """Decode string sid from the table (cached)."""
+        text = self._strings.get(sid)
+        if text is None:
+            start = self._blob_start + self._offsets[sid]
+            end = self._blob_start + self._offsets[sid + 1]
+            text = self._strings[sid] = self._mm[start:end].decode("utf-8")
+        return text
+
+    def paragraph_rows(self, i: int) -> range:
+        """Row range holding paragraph i's subtree."""
+        if not 0 <= i < self.paragraph_count:
+            raise IndexError(f"paragraph {i} out of range")
+        first, count = self._paragraphs[2 * i], self._paragraphs[2 * i + 1]
+        return range(first, first + count)
+
+    def paragraph(self, i: int, pin_id: bool = True) -> TextUnit:
+        """Rebuild paragraph i as a TextUnit subtree without reading other paragraphs.
+
+        The paragraph is returned detached, so by default its id is pinned to
+        the one it has in the book (e.g. "book-p12") via node_id.
+        """
+        col = self.columns
+        rows = self.paragraph_rows(i)
+        units = {}
+        para_text = ""
+        top = None
+        for row in rows:
+            tid = col["text"][row]
+            if tid == SLICE_TEXT:
+                text = para_text[col["start"][row]:col["end"][row]]
+            else:
+                text = self.string(tid)
+            unit = TextUnit(text, self.string(col["type"][row]))
+            unit.metadata = self._metadata(row)
+            nid = col["node_id"][row]
+            if nid != NO_ROW:
+                unit.node_id = self.string(nid)
+            units[row] = unit
+            if top is None:
+                top = unit
+                para_text = text
+                if unit.node_id is None and pin_id:
+                    # Detached from the root, so pin the id it had in the book
+                    unit.node_id = f"{self.root_type.lower()}-{unit.unit_type[0].lower()}{i}"
+            else:
+                units[col["parent"][row]].add_child(unit)
+        return top
+
+    def _metadata(self, row: int) -> dict:
+        col = self.columns
+        keys = json.loads(self.string(col["schema"][row]))
+        if not keys:
+            return {}
+        eid = col["extra"][row]
+        extra = json.loads(self.string(eid)) if eid != NO_ROW else {}
+        values = {}
+        for key in keys:
+            if key in extra:
+                values[key] = extra[key]
+            elif key in ("position", "length"):
+                values[key] = col[key][row]
+            else:
+                values[key] = self.string(col[key][row])
+        return values
+
+    def __iter__(self) -> Iterator[TextUnit]:
+        for i in range(self.paragraph_count):
+            yield self.paragraph(i)
+
+    def to_text_tree(self) -> TextUnit:
+        """Rebuild the whole book as a TextUnit tree."""
+        root = TextUnit(self.title, self.root_type)
+        for i in range(self.paragraph_count):
+            root.add_child(self.paragraph(i, pin_id=False))
+        return root
+
+
+def sexpr_to_binary(source: IO[bytes], path: str, title: str = "", chunk_size: int = 1 << 16):
+    """Convert an S-expression AST stream into a binary AST file."""
+    writer = BinaryASTWriter(title)
+    parser = SExprPushParser()
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        for node in parser.feed(chunk):
+            if node.parent is None:
+                writer.add_paragraph(node)
+    for node in parser.close():
+        if node.parent is None:
+            writer.add_paragraph(node)
+    writer.save(path)
+
+
+def binary_to_sexpr(path: str, out: IO[str], compact: bool = False):
+    """Convert a binary AST file back into S-expressions, one paragraph at a time."""
+    with BinaryAST(path) as ast:
+        write_forest(ast, out, compact=compact)
+
+
+def main():
+    """Convert between the S-expression and binary AST formats, or print one paragraph."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Binary columnar AST tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    to_bin = sub.add_parser("to-binary", help="Convert an S-expression AST to binary")
+    to_bin.add_argument("input")
+    to_bin.add_argument("output")
+    to_sexpr = sub.add_parser("to-sexpr", help="Convert a binary AST to S-expressions")
+    to_sexpr.add_argument("input")
+    to_sexpr.add_argument("output", nargs="?", help="Output file (default: stdout)")
+    to_sexpr.add_argument("--compact", action="store_true", help="One line per node")
+    show = sub.add_parser("show", help="Print one paragraph of a binary AST")
+    show.add_argument("input")
+    show.add_argument("paragraph", type=int)
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        with open(args.input, "rb") as f:
+            sexpr_to_binary(f, args.output)
+    elif args.command == "to-sexpr":
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                binary_to_sexpr(args.input, f, compact=args.compact)
+        else:
+            binary_to_sexpr(args.input, sys.stdout, compact=args.compact)
+    else:
+        with BinaryAST(args.input) as ast:
+            print(ast.paragraph(args.paragraph).to_s_expr())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Token extraction from S-expression ASTs
+
+Pulls the terminal texts, e.g. "Longtemps" in (PRON "Longtemps"), out of an
+AST in the dialect TextUnit.to_s_expr writes (and the hand-written trees in
+examples/), in document order, skipping :id values and :metadata maps. This is
+what extract-tokens.scm did with Guile's (read), without building any tree:
+only the stack of open lists is kept, so memory stays constant however big the
+file is. A file can be scanned straight out of an mmap, with no copy of its
+contents in memory.
+
+    python src/extract_tokens.py examples/proust_ast.lisp
+    python src/extract_tokens.py big_ast.lisp --mmap --separator '\\n'
+"""
+
+import codecs
+import mmap
+import re
+import sys
+from typing import BinaryIO, Iterator, List, Union
+
+try:
+    from .sexpr_parser import SExprParseError, unescape_string
+except ImportError:  # run as a script: python src/extract_tokens.py
+    from sexpr_parser import SExprParseError, unescape_string
+
+# The parser's tokens over bytes, so they can be matched in an mmap (UTF-8
+# multi-byte sequences never contain the ASCII delimiters). White space and
+# commas are skipped by finditer itself; a string cut off by the end of a
+# chunk matches as partial.
+_STRING, _ATOM, _OPEN, _CLOSE, _LBRACE, _RBRACE, _COMMENT, _PARTIAL = range(1, 9)
+_SCAN_RE = re.compile(rb'''
+    ("(?:[^"\\]|\\.)*")
+  | ([^\s(){}",;]+)
+  | (\()
+  | (\))
+  | (\{)
+  | (\})
+  | (;[^\n]*)
+  | ("(?:[^"\\]|\\.)*\\?\Z)
+''', re.VERBOSE)
+
+# Stack frames: an open node, a {...} map, or a data list inside a map
+_NODE, _MAP, _LIST = 0, 1, 2
+
+
+class TokenExtractor:
+    """Push scanner yielding terminal texts; feed it bytes chunks of any size."""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        self._buffer = b""
+        self._stack: List[int] = []
+        # Per open node: 0 before its type atom, 1 after, 2 when a :key awaits its value
+        self._state: List[int] = []
+
+    def feed(self, chunk: bytes) -> Iterator[str]:
+        """Yield the terminal texts completed by a chunk."""
+        self._buffer = self._buffer + chunk if self._buffer else chunk
+        yield from self._scan(self._buffer, final=False)
+
+    def close(self) -> Iterator[str]:
+        """Flush the rest of the input and check that every list was closed."""
+        yield from self._scan(self._buffer, final=True)
+        if self._stack:
+            raise SExprParseError(f"unexpected end of input with {len(self._stack)} open lists")
+
+    def scan_all(self, buffer) -> Iterator[str]:
+        """Scan a complete input (bytes or an mmap) in place."""
+        yield from self._scan(buffer, final=True)
+        if self._stack:
+            raise SExprParseError(f"unexpected end of input with {len(self._stack)} open lists")
+
+    def _scan(self, buf, final: bool) -> Iterator[str]:
+        stack, state = self._stack, self._state
+        encoding = self.encoding
+        end = len(buf)
+        rest = end
+        for m in _SCAN_RE.finditer(buf):
+            kind = m.lastindex
+            if not final and m.end() == end and kind in (_ATOM, _COMMENT, _PARTIAL):
+                rest = m.start()  # token may continue in the next chunk
+                break
+            top = stack[-1] if stack else None
+            if kind == _STRING:
+                if top == _NODE:
+                    if state[-1] == 1:
+                        yield unescape_string(m.group().decode(encoding))
+                    else:
+                        state[-1] = 1  # an :id or other keyed value
+            elif kind == _ATOM:
+                if top == _NODE:
+                    if state[-1] == 1 and m.group().startswith(b":"):
+                        state[-1] = 2
+                    else:
+                        state[-1] = 1  # the node type, or a keyed value
+                elif top is None:
+                    raise SExprParseError("value outside of any list")
+            elif kind == _OPEN:
+                if top == _NODE or top is None:
+                    stack.append(_NODE)
+                    state.append(0)
+                else:
+                    stack.append(_LIST)
+            elif kind == _CLOSE or kind == _RBRACE:
+                expected = _MAP if kind == _RBRACE else (_LIST if top == _LIST else _NODE)
+                if top != expected:
+                    raise SExprParseError(f"unbalanced {m.group().decode()!r}")
+                stack.pop()
+                if top == _NODE:
+                    state.pop()
+                if stack and stack[-1] == _NODE:
+                    state[-1] = 1  # the map or list was a keyed value (or a child)
+            elif kind == _LBRACE:
+                if top is None:
+                    raise SExprParseError("value outside of any list")
+                stack.append(_MAP)
+            elif kind == _PARTIAL:
+                raise SExprParseError("unterminated string at end of input")
+        if not final:
+            self._buffer = buf[rest:]
+
+
+def iter_tokens(source: Union[str, BinaryIO], use_mmap: bool = False,
+                chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yield the terminal texts of an AST file path or binary stream, in order."""
+    extractor = TokenExtractor()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if use_mmap:
+                try:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # empty file
+                    return
+                with mapped:
+                    yield from extractor.scan_all(mapped)
+                return
+            yield from _iter_stream(extractor, f, chunk_size)
+    else:
+        yield from _iter_stream(extractor, source, chunk_size)
+
+
+def _iter_stream(extractor: TokenExtractor, stream: BinaryIO, chunk_size: int) -> Iterator[str]:
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
+
+
+def main():
+    """Print the tokens of an AST file (or stdin), as extract-tokens.scm did."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Extract the terminal tokens of an "
+                                                 "S-expression AST")
+    parser.add_argument("file", nargs="?", help="AST file to read (default: stdin)")
+    parser.add_argument("--mmap", action="store_true", help="Scan the file through mmap")
+    parser.add_argument("--separator", default=" ",
+                        help="Written between tokens (escapes like \\n are understood)")
+    args = parser.parse_args()
+    separator = codecs.decode(args.separator, "unicode_escape")
+
+    source = args.file if args.file else sys.stdin.buffer
+    out = sys.stdout
+    first = True
+    for token in iter_tokens(source, use_mmap=args.mmap and bool(args.file)):
+        if not first:
+            out.write(separator)
+        out.write(token)
+        first = False
+    out.write("\n")
+
+
+if __name__ == "__main__":
+    main()
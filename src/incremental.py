@@ -0,0 +1,94 @@
+"""
+Incremental re-parsing support
+
+diff_paragraphs lines up the paragraphs of an edited text against the ones
+already parsed (difflib over the paragraph texts, which compares by hash
+first), so ProustReader.update only reparses inserted or changed paragraphs
+and reuses every other subtree. watch_file polls a file for changes without
+any platform-specific notification API, and write_update writes the
+paragraphs an update touched as S-expressions.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Callable, IO, List, Optional, Sequence, Tuple
+
+try:
+    from .sexpr_writer import write_s_expr
+except ImportError:  # run as a script from src/
+    from sexpr_writer import write_s_expr
+
+# (tag, old start, old end, new start, new end), as difflib's get_opcodes
+Opcode = Tuple[str, int, int, int, int]
+
+
+@dataclass
+class ParagraphUpdate:
+    """What ProustReader.update changed."""
+    changed: List[int] = field(default_factory=list)  # new positions that were reparsed
+    removed: int = 0                  # old paragraphs dropped without a replacement
+    renumbered_from: Optional[int] = None  # first reused paragraph whose position moved
+    total: int = 0                    # paragraphs after the update
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed or self.renumbered_from is not None)
+
+
+def diff_paragraphs(old: Sequence[str], new: Sequence[str]) -> List[Opcode]:
+    """Opcodes turning the old paragraph texts into the new ones."""
+    if len(old) == len(new) and all(a == b for a, b in zip(old, new)):
+        return [("equal", 0, len(old), 0, len(new))] if old else []
+    return SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+
+
+def map_position(opcodes: List[Opcode], p: int) -> Tuple[int, bool]:
+    """New position of old paragraph p, and whether it maps to a single paragraph.
+
+    That is true when p was kept or edited in place (a replace of as many
+    paragraphs as it removed), so a character offset in it still applies.
+    """
+    for tag, i1, i2, j1, j2 in opcodes:
+        if i1 <= p < i2:
+            if tag == "equal" or i2 - i1 == j2 - j1:
+                return j1 + p - i1, True
+            return min(j1 + p - i1, max(j1, j2 - 1)), False
+    last = opcodes[-1][4] if opcodes else 0
+    return max(0, last - 1), False
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None  # e.g. mid-way through an editor's write-and-rename
+    return st.st_mtime_ns, st.st_size
+
+
+def watch_file(path: str, on_change: Callable[[], None], interval: float = 0.5,
+               stop: Optional[Callable[[], bool]] = None):
+    """Call on_change whenever path's modification time or size changes.
+
+    Polls every interval seconds until stop() returns true (or forever).
+    """
+    last = _signature(path)
+    while stop is None or not stop():
+        time.sleep(interval)
+        signature = _signature(path)
+        if signature is not None and signature != last:
+            last = signature
+            on_change()
+
+
+def write_update(update: ParagraphUpdate, paragraphs: Sequence, out: IO[str],
+                 compact: bool = False):
+    """Write a comment describing an update, then each changed paragraph's S-expression."""
+    out.write(f"; update: {len(update.changed)} reparsed, {update.removed} removed, "
+              f"{update.total} paragraphs\n")
+    if update.renumbered_from is not None:
+        out.write(f"; paragraphs from {update.renumbered_from} on were renumbered\n")
+    for position in update.changed:
+        write_s_expr(paragraphs[position], out, compact=compact)
+        out.write("\n")
+    out.flush()
@@ -0,0 +1,108 @@
+"""
+Streaming text ingestion
+
+Yields paragraphs (blank-line separated, lines joined with single spaces) from
+a file or stdin one at a time, so whole books and concatenated corpora can be
+parsed without holding the raw text in memory. Files can optionally be read
+through mmap, and Project Gutenberg header/footer boilerplate can be stripped.
+"""
+
+import mmap
+import re
+import sys
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Union
+
+# Project Gutenberg boilerplate markers, e.g.
+# "*** START OF THE PROJECT GUTENBERG EBOOK DU CÔTÉ DE CHEZ SWANN ***"
+GUTENBERG_START_RE = re.compile(r'^\*\*\*\s*START OF (THE|THIS) PROJECT GUTENBERG', re.IGNORECASE)
+GUTENBERG_END_RE = re.compile(
+    r'^(\*\*\*\s*END OF (THE|THIS) PROJECT GUTENBERG|End of (the )?Project Gutenberg)',
+    re.IGNORECASE)
+
+# How far into a file to look for the start marker before assuming there is none
+HEADER_SCAN_LINES = 1000
+
+
+def _file_lines(path: str, encoding: str, use_mmap: bool) -> Iterator[str]:
+    """Yield decoded lines of a file, through mmap if requested."""
+    if not use_mmap:
+        with open(path, 'r', encoding=encoding) as f:
+            yield from f
+        return
+
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return
+        with mm:
+            for raw in iter(mm.readline, b""):
+                yield raw.decode(encoding)
+
+
+def iter_lines(source: Union[str, IO[str]], encoding: str = 'utf-8',
+               use_mmap: bool = False) -> Iterator[str]:
+    """Yield lines from a path, "-" for stdin, or an open text stream."""
+    if source == "-":
+        lines = sys.stdin
+    elif isinstance(source, str):
+        lines = _file_lines(source, encoding, use_mmap)
+    else:
+        lines = source
+
+    first = True
+    for line in lines:
+        if first:
+            line = line.lstrip("\ufeff")  # byte-order mark on Gutenberg files
+            first = False
+        yield line
+
+
+def strip_gutenberg(lines: Iterable[str]) -> Iterator[str]:
+    """Drop the Project Gutenberg header and footer around the book text.
+
+    Only the first HEADER_SCAN_LINES lines are buffered while looking for the
+    start marker; if none is found they are passed through unchanged.
+    """
+    lines = iter(lines)
+    head: List[str] = list(islice(lines, HEADER_SCAN_LINES))
+    for i, line in enumerate(head):
+        if GUTENBERG_START_RE.match(line):
+            head = head[i + 1:]
+            break
+
+    for line in head:
+        if GUTENBERG_END_RE.match(line):
+            return
+        yield line
+    for line in lines:
+        if GUTENBERG_END_RE.match(line):
+            return
+        yield line
+
+
+def iter_paragraphs(source: Union[str, IO[str]], start_line: int = 0, gutenberg: bool = False,
+                    use_mmap: bool = False, encoding: str = 'utf-8') -> Iterator[str]:
+    """Lazily yield the paragraphs of a text (empty line is paragraph separator).
+
+    start_line lines are skipped first (counted after the Gutenberg header when
+    gutenberg is set). Memory use is bounded by the longest paragraph.
+    """
+    lines = iter_lines(source, encoding=encoding, use_mmap=use_mmap)
+    if gutenberg:
+        lines = strip_gutenberg(lines)
+    if start_line:
+        lines = islice(lines, start_line, None)
+
+    parts: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            parts.append(line)
+        elif parts:
+            yield " ".join(parts)
+            parts = []
+
+    if parts:  # the last paragraph if the text does not end with a blank line
+        yield " ".join(parts)
@@ -0,0 +1,255 @@
+"""
+Per-stage profiling for the Proust reader
+
+A Metrics object collects wall and CPU time per named stage, counters, and an
+optional cProfile or tracemalloc run around parse_text. Stages nest: time spent
+in an inner stage (say, reading the file while spaCy pulls its next batch) is
+charged to the inner stage only, so the stage times add up to the total.
+
+NULL_METRICS is what the reader uses when profiling is off: its stage() hands
+back one shared no-op context manager and timed() returns the iterable
+untouched, so an unprofiled run only pays an attribute lookup and a call per
+paragraph.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+# Order stages are listed in the summary; others follow in the order first seen
+STAGE_ORDER = ("read", "cache", "spacy", "chunk", "tree", "store", "token_table", "index",
+               "serialize")
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "wall", "cpu", "child_wall", "child_cpu")
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.child_wall = self.child_cpu = 0.0
+        self.metrics._stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        metrics = self.metrics
+        metrics._stack.pop()
+        if metrics._stack:
+            outer = metrics._stack[-1]
+            outer.child_wall += wall
+            outer.child_cpu += cpu
+        totals = metrics.stages.get(self.name)
+        if totals is None:
+            totals = metrics.stages[self.name] = [0.0, 0.0, 0]
+        totals[0] += wall - self.child_wall
+        totals[1] += cpu - self.child_cpu
+        totals[2] += 1
+        return False
+
+
+class Metrics:
+    """Stage timers, counters and optional profilers for one reader run.
+
+    cprofile is a path to write cProfile stats (pstats format) for parse_text;
+    trace_memory runs tracemalloc over parse_text and keeps its peak and top
+    allocation sites. Not thread-safe: only time the main thread.
+    """
+
+    enabled = True
+
+    def __init__(self, cprofile: Optional[str] = None, trace_memory: bool = False):
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, List] = {}  # name -> [wall, cpu, calls]
+        self.counters: Dict[str, int] = {}
+        self.values: Dict[str, Any] = {}
+        self.profile_stats: Optional[str] = None
+        self._stack: List[_Stage] = []
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager timing one stretch of stage name."""
+        return _Stage(self, name)
+
+    def timed(self, name: str, iterable: Iterable) -> Iterator:
+        """Iterate, charging the time taken to produce each item to stage name."""
+        iterator = iter(iterable)
+        stage = _Stage(self, name)
+        while True:
+            with stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value: Any):
+        """Record a derived value (e.g. an estimate) for the summary."""
+        self.values[name] = value
+
+    @contextmanager
+    def hooks(self):
+        """Run the requested profilers around a block (parse_text)."""
+        profiler = None
+        if self.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.cprofile)
+                self.profile_stats = self._top_functions(profiler)
+            if self.trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.values["traced_peak_bytes"] = peak
+                self.values["top_allocations"] = [
+                    f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                    f"{stat.size / 1024:.0f} KiB"
+                    for stat in snapshot.statistics("lineno")[:10]]
+
+    @staticmethod
+    def _top_functions(profiler, limit: int = 15) -> str:
+        import io
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def record_tree(self, root, parse_seconds: float, tree_bytes: int):
+        """Count paragraphs, sentences, phrases and tokens of a parsed tree."""
+        counts = count_units(root)
+        for name, n in counts.items():
+            self.counters[name] = n
+        self.values["parse_seconds"] = parse_seconds
+        self.values["tokens_per_second"] = counts["tokens"] / parse_seconds if parse_seconds else 0.0
+        self.values["tree_bytes"] = tree_bytes
+
+    def _ordered_stages(self) -> List[str]:
+        known = [name for name in STAGE_ORDER if name in self.stages]
+        return known + [name for name in self.stages if name not in STAGE_ORDER]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {name: {"wall": self.stages[name][0], "cpu": self.stages[name][1],
+                              "calls": self.stages[name][2]}
+                       for name in self._ordered_stages()},
+            "counters": dict(self.counters),
+            **{name: value for name, value in self.values.items()},
+        }
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self, out: IO[str] = sys.stderr):
+        total = sum(wall for wall, _, _ in self.stages.values())
+        out.write(f"{'stage':<12} {'wall s':>9} {'cpu s':>9} {'share':>6} {'calls':>9}\n")
+        for name in self._ordered_stages():
+            wall, cpu, calls = self.stages[name]
+            share = wall / total if total else 0.0
+            out.write(f"{name:<12} {wall:9.3f} {cpu:9.3f} {share:6.1%} {calls:9d}\n")
+        if self.counters:
+            out.write(", ".join(f"{n} {name}" for name, n in self.counters.items()) + "\n")
+        values = self.values
+        if "tokens_per_second" in values:
+            out.write(f"{values['tokens_per_second']:,.0f} tokens/sec over "
+                      f"{values['parse_seconds']:.3f}s of parsing\n")
+        if "tree_bytes" in values:
+            out.write(f"Tree memory (estimate, excluding spaCy Docs): "
+                      f"{values['tree_bytes'] / 1024 / 1024:.1f} MiB\n")
+        if "traced_peak_bytes" in values:
+            out.write(f"tracemalloc peak during parse_text: "
+                      f"{values['traced_peak_bytes'] / 1024 / 1024:.1f} MiB\n")
+            for line in values["top_allocations"]:
+                out.write(f"  {line}\n")
+        if self.profile_stats:
+            out.write(f"cProfile stats written to {self.cprofile}\n")
+            out.write(self.profile_stats)
+
+
+class NullMetrics:
+    """Metrics that record nothing; the default when profiling is off."""
+
+    enabled = False
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def timed(self, name: str, iterable: Iterable) -> Iterable:
+        return iterable
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def set(self, name: str, value: Any):
+        pass
+
+    def hooks(self):
+        return self._stage
+
+    def record_tree(self, root, parse_seconds: float, tree_bytes: int):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def count_units(root) -> Dict[str, int]:
+    """Paragraphs, sentences, phrases and tokens (leaves) under a BOOK node."""
+    counts = {"paragraphs": 0, "sentences": 0, "phrases": 0, "tokens": 0}
+    names = (None, "paragraphs", "sentences", "phrases")
+    stack = [(child, 1) for child in root.children]
+    while stack:
+        node, depth = stack.pop()
+        children = node.children
+        if not children:
+            counts["tokens"] += 1
+            continue
+        if depth < len(names):
+            counts[names[depth]] += 1
+        stack.extend((child, depth + 1) for child in children)
+    return counts
+
+
+def tree_memory(root) -> int:
+    """Rough bytes held by a TextUnit tree: nodes, their dicts, texts and metadata.
+
+    Shared strings are counted once. spaCy objects referenced through span are
+    not included.
+    """
+    seen = set()
+    size = sys.getsizeof
+
+    def once(obj) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return size(obj)
+
+    total = 0
+    for node in root.walk():
+        total += size(node) + size(node.__dict__) + size(node.children) + once(node.text)
+        metadata = node.metadata
+        if metadata:
+            total += size(metadata) + sum(once(value) for value in metadata.values())
+    return total
@@ -0,0 +1,134 @@
+"""
+Lazy spaCy loading
+
+spaCy takes seconds to import and its French model longer to load, so nothing
+here imports it until a model is actually requested. BackgroundParser loads the
+model on a daemon thread and parses paragraphs there, handing finished
+paragraph subtrees back through a queue, so the reader can start on the regex
+parse and swap spaCy nodes in as they become ready. LazyModel defers loading
+until a paragraph actually has to be parsed, so a start served entirely from
+the parse cache never loads the model at all.
+"""
+
+import importlib.metadata
+import importlib.util
+import queue
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+DEFAULT_MODEL = "fr_core_news_sm"
+
+
+def spacy_available() -> bool:
+    """Whether spaCy is installed, without importing it."""
+    return importlib.util.find_spec("spacy") is not None
+
+
+def load_model(name: str = DEFAULT_MODEL):
+    """Import spaCy and load a model; raises OSError if the model is not installed."""
+    import spacy
+    return spacy.load(name)
+
+
+def model_version(name: str) -> Optional[str]:
+    """Version of an installed model package, read from its metadata without importing
+    spaCy; None if name is not an installed package (e.g. a path to a model)."""
+    try:
+        return importlib.metadata.version(name)
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return None
+
+
+class LazyModel:
+    """Stands in for a spaCy model and loads it the first time it is used.
+
+    meta has the lang, name and version an installed model package reports
+    (fr_core_news_sm: lang "fr", name "core_news_sm"), so parse cache keys can
+    be computed without loading it. Any other attribute loads the model.
+    """
+
+    def __init__(self, name: str, version: str):
+        lang, _, short_name = name.partition("_")
+        self.model_name = name
+        self.meta = {"lang": lang, "name": short_name, "version": version}
+        self._nlp = None
+        self._lock = threading.Lock()  # the reader's worker threads may be first to use it
+
+    @property
+    def loaded(self) -> bool:
+        return self._nlp is not None
+
+    def load(self):
+        with self._lock:
+            if self._nlp is None:
+                self._nlp = load_model(self.model_name)
+        return self._nlp
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+class BackgroundParser(threading.Thread):
+    """Load a spaCy model and parse paragraphs off the main thread.
+
+    paragraphs are the (position, text) pairs to parse. parse(nlp, (text,
+    position) pairs) must yield (doc, position) pairs, and build(position, doc)
+    turns a doc into a detached paragraph subtree. Results are collected with
+    drain() from the main thread, which owns the tree.
+    """
+
+    def __init__(self, model_name: str, paragraphs: List[Tuple[int, str]],
+                 parse: Callable[..., Iterable[Tuple]], build: Callable):
+        super().__init__(name="spacy-background", daemon=True)
+        self.model_name = model_name
+        self.paragraphs = paragraphs
+        self.parse = parse
+        self.build = build
+        self.nlp = None
+        self.error: Optional[BaseException] = None
+        self.parsed = 0
+        self._ready: "queue.Queue[Tuple[int, object]]" = queue.Queue()
+        self._stopping = threading.Event()
+
+    def run(self):
+        try:
+            self.nlp = load_model(self.model_name)
+            pairs = ((text, i) for i, text in self.paragraphs)
+            for doc, i in self.parse(self.nlp, pairs):
+                if self._stopping.is_set():
+                    break
+                self._ready.put((i, self.build(i, doc)))
+                self.parsed += 1
+        except Exception as e:  # reported through status; the regex tree stays in place
+            self.error = e
+
+    def stop(self):
+        """Ask the worker to stop after the current paragraph."""
+        self._stopping.set()
+
+    def drain(self) -> List[Tuple[int, object]]:
+        """Paragraphs finished since the last call, as (position, subtree) pairs."""
+        ready = []
+        while True:
+            try:
+                ready.append(self._ready.get_nowait())
+            except queue.Empty:
+                return ready
+
+    @property
+    def finished(self) -> bool:
+        """True once the worker has exited and every result has been drained."""
+        return not self.is_alive() and self._ready.empty()
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return f"failed ({self.error})"
+        if self.nlp is None:
+            return "loading model"
+        return f"{self.parsed}/{len(self.paragraphs)} paragraphs"
@@ -0,0 +1,255 @@
+"""
+Bounded window of parsed paragraphs around the reading position
+
+ParagraphWindow lets the reader go through a whole book without parsing it
+first, holding at most `capacity` parsed paragraph subtrees at any time. A
+worker thread parses the paragraphs ahead of the reading position (as many as
+take lead_seconds to read at the current speed, up to look_ahead) and the
+look_behind ones before it. When there are more than capacity, the least
+recently used subtrees outside that range are evicted.
+
+Only the worker runs the parser. The main thread owns the tree: poll() hands
+it the finished subtrees through on_load, and evictions go through on_evict.
+require() waits for a paragraph the reader needs at once, e.g. after a seek
+or when reading outran the prefetch, and counts the wait as a stall. Once the
+worker is stopped (or was never started, or died), or after max_wait seconds
+of waiting on it, require() parses on the calling thread instead, so parse
+must be safe to call from both threads.
+"""
+
+import queue
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+LOOK_AHEAD = 8       # most paragraphs parsed ahead of the reading position
+LOOK_BEHIND = 2      # paragraphs kept parsed behind it
+LEAD_SECONDS = 30.0  # reading time the prefetch tries to stay ahead by
+MAX_WAIT = 2.0       # longest require() waits on the worker before parsing itself
+
+# How long require() waits on the worker before checking that it is still alive
+_WAIT_SECONDS = 0.1
+
+
+class ParagraphWindow:
+    """Parsed subtrees of the paragraphs near a reading position, prefetched on a thread.
+
+    parse(position, text) builds a detached paragraph subtree and is called on
+    the worker thread. on_load(position, subtree, fresh) and
+    on_evict(position, subtree) are called on the thread calling poll, focus
+    or require. fresh is false for subtrees that came from cached(position,
+    text), an optional lookup that is also run on that thread.
+    """
+
+    def __init__(self, texts: Sequence[str], parse: Callable, on_load: Callable,
+                 on_evict: Callable, look_ahead: int = LOOK_AHEAD,
+                 look_behind: int = LOOK_BEHIND, capacity: Optional[int] = None,
+                 lead_seconds: float = LEAD_SECONDS, cached: Optional[Callable] = None,
+                 max_wait: float = MAX_WAIT):
+        if look_ahead < 1 or look_behind < 0:
+            raise ValueError("look_ahead must be >= 1 and look_behind >= 0")
+        span = look_behind + 1 + look_ahead
+        if capacity is None:
+            capacity = 2 * span
+        if capacity < span:
+            raise ValueError(f"capacity {capacity} is smaller than the window ({span} paragraphs)")
+        self.texts = texts
+        self.parse = parse
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self.cached = cached
+        self.look_ahead = look_ahead
+        self.look_behind = look_behind
+        self.capacity = capacity
+        self.lead_seconds = lead_seconds
+        self.max_wait = max_wait
+        # Word counts estimate reading time and map percentages to paragraphs
+        self.words = array("i", (text.count(" ") + 1 for text in texts))
+        self.words_before = array("q", [0])
+        for count in self.words:
+            self.words_before.append(self.words_before[-1] + count)
+        self.resident: "OrderedDict[int, object]" = OrderedDict()  # least recently used first
+        self.position = 0
+        self.parsed = 0
+        self.hits = 0
+        self.evicted = 0
+        self.stalls = 0
+        self.error: Optional[BaseException] = None
+        self._pinned: Optional[int] = None  # the last paragraph require() returned
+        self._wanted: List[int] = []        # queued for the worker, most urgent first
+        self._inflight = set()              # taken by the worker, not installed yet
+        self._ready: "queue.Queue" = queue.Queue()
+        self._changed = threading.Condition()
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name="paragraph-window", daemon=True)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def start(self):
+        self._worker.start()
+
+    def stop(self):
+        """Stop the worker after the paragraph it is parsing; nothing resident is dropped."""
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while not self._wanted and not self._stopping:
+                    self._changed.wait()
+                if self._stopping:
+                    return
+                p = self._wanted.pop(0)
+                self._inflight.add(p)
+            try:
+                subtree = self.parse(p, self.texts[p])
+            except Exception as e:  # reported through status; require() parses inline from now on
+                self.error = e
+                return
+            self._ready.put((p, subtree))
+
+    def _ahead(self, p: int, seconds_per_word: float) -> List[int]:
+        """Paragraphs after p worth lead_seconds of reading, at least one and at most look_ahead."""
+        n = len(self.texts)
+        ahead = []
+        reading = 0.0
+        for k in range(1, min(self.look_ahead, n - 1) + 1):
+            q = (p + k) % n
+            ahead.append(q)
+            reading += self.words[q] * seconds_per_word
+            if reading >= self.lead_seconds:
+                break
+        return ahead
+
+    def _protected(self) -> set:
+        """Paragraphs that are never evicted: the widest window around the position."""
+        n, p = len(self.texts), self.position
+        protected = {(p + k) % n for k in range(-self.look_behind, self.look_ahead + 1)}
+        if self._pinned is not None:
+            protected.add(self._pinned)
+        return protected
+
+    def focus(self, p: int, seconds_per_word: float):
+        """Move the window to paragraph p and queue what the worker should parse next."""
+        n = len(self.texts)
+        if not n:
+            return
+        self.position = p
+        behind = [(p - k) % n for k in range(1, min(self.look_behind, n - 1) + 1)]
+        order = list(dict.fromkeys([p] + self._ahead(p, seconds_per_word) + behind))
+        with self._changed:
+            queued, inflight = set(self._wanted), set(self._inflight)
+        wanted = []
+        for q in order:
+            if q in self.resident or q in inflight:
+                continue
+            if q not in queued and self.cached is not None:
+                subtree = self.cached(q, self.texts[q])
+                if subtree is not None:
+                    self.hits += 1
+                    self._install(q, subtree, fresh=False)
+                    continue
+            wanted.append(q)
+        with self._changed:
+            self._wanted = [q for q in wanted if q not in self._inflight]
+            self._changed.notify()
+        for q in reversed(order):  # p ends up the most recently used
+            if q in self.resident:
+                self.resident.move_to_end(q)
+        self._evict()
+
+    def poll(self) -> int:
+        """Install the subtrees the worker has finished; returns how many."""
+        installed = 0
+        while True:
+            try:
+                p, subtree = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._finished(p, subtree)
+            installed += 1
+        self._evict()
+        return installed
+
+    def require(self, p: int):
+        """The subtree of paragraph p, waiting for it to be parsed if need be."""
+        self._pinned = p
+        subtree = self.resident.get(p)
+        if subtree is None:
+            self.poll()
+        if p not in self.resident and self.cached is not None:
+            subtree = self.cached(p, self.texts[p])
+            if subtree is not None:
+                self.hits += 1
+                self._install(p, subtree, fresh=False)
+        if p not in self.resident:
+            self.stalls += 1
+            with self._changed:
+                if p not in self._inflight:
+                    self._wanted = [p] + [q for q in self._wanted if q != p]
+                    self._changed.notify()
+            waited = 0.0
+            while p not in self.resident:
+                if not self._worker.is_alive() or waited >= self.max_wait:
+                    with self._changed:
+                        self._wanted = [q for q in self._wanted if q != p]
+                    self._install(p, self.parse(p, self.texts[p]), fresh=True)
+                    break
+                try:
+                    q, subtree = self._ready.get(timeout=_WAIT_SECONDS)
+                except queue.Empty:
+                    waited += _WAIT_SECONDS
+                    continue
+                self._finished(q, subtree)
+            self._evict()
+        self.resident.move_to_end(p)
+        return self.resident[p]
+
+    def _finished(self, p: int, subtree):
+        with self._changed:
+            self._inflight.discard(p)
+        self._install(p, subtree, fresh=True)
+
+    def _install(self, p: int, subtree, fresh: bool):
+        if p in self.resident:
+            return
+        self.resident[p] = subtree
+        if fresh:
+            self.parsed += 1
+        self.on_load(p, subtree, fresh)
+
+    def _evict(self):
+        if len(self.resident) <= self.capacity:
+            return
+        protected = self._protected()
+        victims = [q for q in self.resident if q not in protected]
+        for q in victims[:len(self.resident) - self.capacity]:
+            subtree = self.resident.pop(q)
+            self.evicted += 1
+            self.on_evict(q, subtree)
+
+    def paragraph_at(self, percent: float) -> int:
+        """The paragraph percent (0-100) of the way through the text, by word count."""
+        n = len(self.texts)
+        if not n:
+            return 0
+        target = self.words_before[-1] * percent / 100
+        return min(n - 1, max(0, bisect_right(self.words_before, target) - 1))
+
+    def percent(self, p: int, fraction: float = 0.0) -> float:
+        """How far through the text (0-100) a point fraction of the way into paragraph p is."""
+        total = self.words_before[-1]
+        if not total:
+            return 0.0
+        return 100.0 * (self.words_before[p] + fraction * self.words[p]) / total
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return f"failed ({self.error})"
+        return f"{len(self.resident)}/{len(self.texts)} parsed, {self.stalls} stalls"
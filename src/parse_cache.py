@@ -0,0 +1,137 @@
+"""
+Persistent on-disk cache of parsed paragraphs
+
+Each paragraph subtree is stored as a zlib-compressed pickle of plain tuples
+in a single SQLite file, keyed by a hash of the paragraph text, the parser mode
+(regex or spaCy) and the spaCy model name/version. Warm starts rebuild the
+tree from the cache instead of running NLP. The file is capped in size and the
+least recently used entries are evicted first.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .text_unit import TextUnit
+except ImportError:  # run as a script from src/
+    from text_unit import TextUnit
+
+# Bump when the tree builder changes its output, so stale entries are never reused
+# (2: the regex tokenizer classes "le"/"la" as DET; 3: entries keep character offsets)
+PARSE_CACHE_VERSION = 3
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_path() -> str:
+    """Cache file under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "syntax-tree-streamer", "parse-cache.sqlite3")
+
+
+def encode_unit(unit: TextUnit) -> Tuple:
+    """Flatten a TextUnit subtree to nested (type, text, metadata, offsets, children) tuples."""
+    return (unit.unit_type, unit.text, unit.metadata, unit.offsets,
+            tuple(encode_unit(child) for child in unit.children))
+
+
+def decode_unit(data: Tuple, parent: Optional[TextUnit] = None) -> TextUnit:
+    """Rebuild a TextUnit subtree from encode_unit output."""
+    unit_type, text, metadata, offsets, children = data
+    unit = TextUnit(text, unit_type, parent)
+    unit.metadata = metadata
+    unit.offsets = offsets
+    for child in children:
+        unit.add_child(decode_unit(child, unit))
+    return unit
+
+
+class ParseCache:
+    """Content-addressed, size-capped LRU store of parsed paragraphs."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 rebuild: bool = False):
+        """Open (or create) the cache; rebuild=True ignores existing entries and overwrites them."""
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self._pending_writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS paragraphs ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS paragraphs_lru ON paragraphs (last_used)")
+
+    @staticmethod
+    def key(text: str, mode: str) -> str:
+        """Cache key for a paragraph; mode names the parser and model, e.g. "spacy:fr_core_news_sm@3.8.0"."""
+        digest = hashlib.sha256()
+        digest.update(f"{PARSE_CACHE_VERSION}\0{mode}\0".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[TextUnit]:
+        """Return the cached paragraph subtree for key, or None."""
+        row = None
+        if not self.rebuild:
+            row = self._db.execute(
+                "SELECT value FROM paragraphs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        return decode_unit(pickle.loads(zlib.decompress(row[0])))
+
+    def put(self, key: str, unit: TextUnit):
+        """Store a paragraph subtree under key."""
+        blob = zlib.compress(pickle.dumps(encode_unit(unit), pickle.HIGHEST_PROTOCOL), 1)
+        self._db.execute(
+            "INSERT OR REPLACE INTO paragraphs (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time()))
+        self._pending_writes += 1
+        if self._pending_writes >= 256:
+            self.flush()
+
+    def flush(self):
+        """Record LRU timestamps, evict over the size cap and commit."""
+        if self._touched:
+            self._db.executemany("UPDATE paragraphs SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+        if self._pending_writes:
+            self._evict()
+            self._pending_writes = 0
+        self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM paragraphs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims: List[str] = []
+        for key, size in self._db.execute("SELECT key, size FROM paragraphs ORDER BY last_used"):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM paragraphs WHERE key = ?", [(k,) for k in victims])
+
+    def total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM paragraphs").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._db.close()
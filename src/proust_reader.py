@@ -9,390 +9,667 @@ highlighting the current paragraph, sentence, and word to simulate a stream of t
 import os
 import sys
 import time
-import re
 import curses
 import random
-from dataclasses import dataclass, field
-from typing import List, Tuple, Optional, Dict, Any
+from collections import deque
+from itertools import chain, islice
 
 try:
-    import spacy
-    SPACY_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
+    from .text_unit import TextUnit
+    from .tree_store import TreeStore
+    from .ingest import iter_paragraphs
+    from .parse_cache import ParseCache
+    from .sexpr_writer import write_forest
+    from .binary_ast import write_binary_ast
+    from .renderer import ReaderRenderer
+    from .token_cursor import TokenCursor, TokenTable
+    from .model_loader import DEFAULT_MODEL, BackgroundParser, LazyModel, load_model, model_version, spacy_available
+    from .regex_tokenizer import RegexTokenizer
+    from .spacy_tree import SPACY_COMPONENTS, TOKEN_ATTRIBUTES, build_spacy_paragraph
+    from .metrics import NULL_METRICS, Metrics, tree_memory
+    from .tree_index import TreeIndex
+    from .incremental import ParagraphUpdate, diff_paragraphs, map_position, watch_file, write_update
+    from .paragraph_window import LOOK_AHEAD, LOOK_BEHIND, ParagraphWindow
+except ImportError:  # run as a script: python src/proust_reader.py
+    from text_unit import TextUnit
+    from tree_store import TreeStore
+    from ingest import iter_paragraphs
+    from parse_cache import ParseCache
+    from sexpr_writer import write_forest
+    from binary_ast import write_binary_ast
+    from renderer import ReaderRenderer
+    from token_cursor import TokenCursor, TokenTable
+    from model_loader import DEFAULT_MODEL, BackgroundParser, LazyModel, load_model, model_version, spacy_available
+    from regex_tokenizer import RegexTokenizer
+    from spacy_tree import SPACY_COMPONENTS, TOKEN_ATTRIBUTES, build_spacy_paragraph
+    from metrics import NULL_METRICS, Metrics, tree_memory
+    from tree_index import TreeIndex
+    from incremental import ParagraphUpdate, diff_paragraphs, map_position, watch_file, write_update
+    from paragraph_window import LOOK_AHEAD, LOOK_BEHIND, ParagraphWindow
+
+# spaCy itself is only imported when a model is loaded (see model_loader)
+SPACY_AVAILABLE = spacy_available()
+if not SPACY_AVAILABLE:
     print("spaCy not available. Using basic text processing instead.")
     print("To install spaCy: pip install spacy")
     print("To install French language model: python -m spacy download fr_core_news_sm")
 
-@dataclass
-class TextUnit:
-    text: str
-    unit_type: str  # 'paragraph', 'sentence', 'word', 'phrase', etc.
-    parent: Optional['TextUnit'] = None
-    children: List['TextUnit'] = field(default_factory=list)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    span: Any = None  # spaCy span object
-    
-    @property
-    def id(self) -> str:
-        """Generate a unique ID for this unit based on position in hierarchy."""
-        if self.parent is None:
-            return self.unit_type.lower()
-        
-        # Get index of this unit in its parent's children
-        if self.parent.children:
-            idx = next((i for i, child in enumerate(self.parent.children) 
-                       if child is self), 0)
-        else:
-            idx = 0
-            
-        return f"{self.parent.id}-{self.unit_type[0].lower()}{idx}"
-        
-    def to_s_expr(self, indent=0) -> str:
-        """Convert this unit to an S-expression."""
-        ind = "  " * indent
-        meta_str = ""
-        
-        if self.metadata:
-            meta_items = [f"{k} {v}" for k, v in self.metadata.items()]
-            meta_str = f" :metadata {{{', '.join(meta_items)}}}"
-            
-        if self.unit_type in ["WORD", "PUNCT", "NUM", "SYM"]:
-            # Terminal nodes include the actual text
-            return f"{ind}({self.unit_type} \"{self.text}\"{meta_str})"
-            
-        # Non-terminal nodes include their children
-        result = [f"{ind}({self.unit_type} :id \"{self.id}\"{meta_str}"]
-        
-        for child in self.children:
-            result.append(child.to_s_expr(indent + 1))
-            
-        result.append(f"{ind})")
-        return "\n".join(result)
+BACKENDS = ("objects", "arrays")
+
+# How often the curses loop checks for paragraphs parsed in the background
+BACKGROUND_POLL_MS = 250
 
 class ProustReader:
-    def __init__(self, file_path, start_line=56, use_spacy=True):
-        """Initialize the Proust reader with the given file path."""
+    def __init__(self, file_path, start_line=56, use_spacy=True, backend="objects",
+                 batch_size=64, n_process=1, max_paragraphs=None, gutenberg=False,
+                 use_mmap=False, cache=None, model_name=DEFAULT_MODEL, background_model=False,
+                 metrics=None, detached=False, token_attributes=(), windowed=False,
+                 look_ahead=LOOK_AHEAD, look_behind=LOOK_BEHIND):
+        """Initialize the Proust reader with the given file path ("-" reads stdin).
+
+        backend selects the tree representation: "objects" keeps a TextUnit per
+        node, "arrays" compacts each parsed paragraph into a TreeStore.
+        batch_size and n_process are passed to spaCy's nlp.pipe.
+        Paragraphs are streamed from the file while parsing; max_paragraphs
+        stops early, gutenberg strips Project Gutenberg boilerplate and
+        use_mmap reads the file through mmap. cache is an optional ParseCache
+        that parsed paragraphs are read from and written to.
+        With background_model (objects backend only) the text is parsed with
+        the regex tokenizer first and the spaCy model is loaded on a
+        background thread; apply_background_updates swaps its paragraphs in.
+        metrics is an optional Metrics that parsing stages are timed into.
+        detached keeps character offsets instead of spaCy spans on the nodes,
+        so each paragraph's Doc can be freed once its subtree is built;
+        token_attributes (see spacy_tree.TOKEN_ATTRIBUTES) are copied into
+        word metadata.
+        windowed (objects backend only) parses nothing up front: paragraphs
+        are parsed on a worker thread as the reading position nears them, and
+        at most a bounded number of them (look_behind before the position,
+        up to look_ahead after it, plus recently used ones) stay parsed; see
+        paragraph_window. The spaCy model is then loaded before reading starts.
+        """
+        unknown = set(token_attributes) - set(TOKEN_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown token attributes {sorted(unknown)}; "
+                             f"expected some of {TOKEN_ATTRIBUTES}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        if windowed and backend != "objects":
+            raise ValueError("windowed reading needs the objects backend")
         self.file_path = file_path
+        self.backend = backend
+        self.tree_store = None
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.parse_seconds = 0.0
+        self.max_paragraphs = max_paragraphs
+        self.gutenberg = gutenberg
+        self.use_mmap = use_mmap
+        self.cache = cache
+        self.metrics = metrics or NULL_METRICS
+        self.detached = detached
+        self.token_attributes = tuple(token_attributes)
+        self.tokenizer = RegexTokenizer()
         self.paragraphs = []
-        self.current_paragraph_idx = 0
-        self.current_sentence_idx = 0
-        self.current_word_idx = 0
+        self._cursor = None
+        self._index = None
         self.reading_speed = 0.3  # seconds per word
         self.start_line = start_line  # Skip header and start at first content paragraph
         self.use_spacy = use_spacy and SPACY_AVAILABLE
+        self.model_name = model_name
+        self.nlp = None
+        self.background = None
+        self.windowed = windowed
+        self.look_ahead = look_ahead
+        self.look_behind = look_behind
+        self.window = None
+        background_model = (background_model and self.use_spacy and backend == "objects"
+                            and not windowed)
         
-        # Initialize spaCy if available
-        if self.use_spacy:
-            try:
-                self.nlp = spacy.load("fr_core_news_sm")
-                print("Using spaCy French language model for analysis")
-            except OSError:
-                print("French language model not found. Downloading...")
-                os.system("python -m spacy download fr_core_news_sm")
-                try:
-                    self.nlp = spacy.load("fr_core_news_sm")
-                    print("French model loaded successfully")
-                except Exception as e:
-                    print(f"Error loading French model: {e}")
-                    self.use_spacy = False
+        # Load spaCy now, or parse with regexes first and load it in the background
+        if self.use_spacy and not background_model:
+            self.nlp = self._load_model()
         
-        self.load_text()
         self.parse_text()
+        if background_model:
+            self.start_background_parse()
+        if windowed:
+            self.start_window()
+
+    def _load_model(self):
+        """The spaCy model, or None (and fall back to regexes) if it is missing.
+
+        An installed model package is returned as a LazyModel, loaded on the
+        first paragraph missing from the cache; anything else (e.g. a path)
+        is loaded now.
+        """
+        version = model_version(self.model_name)
+        if version is not None:
+            print("Using spaCy French language model for analysis")
+            return LazyModel(self.model_name, version)
+        try:
+            nlp = load_model(self.model_name)
+        except OSError as e:
+            print(f"Error loading French model: {e}")
+            print(f"To install it: python -m spacy download {self.model_name}")
+            self.use_spacy = False
+            return None
+        print("Using spaCy French language model for analysis")
+        return nlp
+
+    def iter_text(self):
+        """Lazily yield the paragraphs of the source text."""
+        paragraphs = iter_paragraphs(self.file_path, start_line=self.start_line,
+                                     gutenberg=self.gutenberg, use_mmap=self.use_mmap)
+        if self.max_paragraphs is not None:
+            paragraphs = islice(paragraphs, self.max_paragraphs)
+        return paragraphs
 
     def load_text(self):
-        """Load the text from the file and split it into paragraphs."""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()[self.start_line:]  # Skip header
-            
-        # Join lines into paragraphs (empty line is paragraph separator)
-        paragraph = ""
-        for line in lines:
-            if line.strip():
-                paragraph += line.strip() + " "
-            elif paragraph:
-                self.paragraphs.append(paragraph.strip())
-                paragraph = ""
-        
-        if paragraph:  # Add the last paragraph if it exists
-            self.paragraphs.append(paragraph.strip())
-            
-        # Limit to first 20 paragraphs for demo
-        self.paragraphs = self.paragraphs[:20]
+        """Load all paragraphs into self.paragraphs (parse_text streams them otherwise)."""
+        self.paragraphs = list(self.iter_text())
 
     def parse_text(self):
         """Parse the text into a tree structure (paragraph -> sentence -> word)."""
-        self.text_tree = TextUnit("Du côté de chez Swann", "BOOK")
+        title = "Du côté de chez Swann"
+        self.text_tree = TextUnit(title, "BOOK")
+        if self.backend == "arrays":
+            self.tree_store = TreeStore(title)
         
-        if self.use_spacy:
-            self._parse_with_spacy()
-        else:
-            self._parse_with_regex()
+        metrics = self.metrics
+        with metrics.hooks():
+            start = time.perf_counter()
+            if self.windowed:
+                self._add_placeholders()
+            elif self.nlp is not None:
+                self._parse_with_spacy()
+            else:
+                self._parse_with_regex()
+            self.parse_seconds = time.perf_counter() - start
+            if self.cache is not None:
+                with metrics.stage("cache"):
+                    self.cache.flush()
+
+        if self.tree_store is not None:
+            self.text_tree = self.tree_store.root
+        self._cursor = None
+        self._index = None
+        if self.window is not None:  # parsed again: the window must cover the new placeholders
+            self.window.stop()
+            self.start_window()
+        if metrics.enabled:
+            metrics.record_tree(self.text_tree, self.parse_seconds, self.tree_bytes())
+
+    def tree_bytes(self):
+        """Estimated memory held by the parsed tree (spaCy Docs not included)."""
+        if self.tree_store is not None:
+            return self.tree_store.nbytes()
+        return tree_memory(self.text_tree)
+
+    @property
+    def paragraphs_per_second(self):
+        """Parse throughput of the last parse_text call."""
+        if not self.parse_seconds:
+            return 0.0
+        return len(self.text_tree.children) / self.parse_seconds
+
+    def _paragraph_source(self):
+        """Paragraphs to parse: the loaded list if load_text was called, else a stream."""
+        source = self.paragraphs if self.paragraphs else self.iter_text()
+        return self.metrics.timed("read", source)
+
+    def _cache_mode(self, nlp=None):
+        """Parser identity for cache keys: regex, or spaCy model, version, token attributes
+        and whether the trees are detached (character offsets instead of spans)."""
+        nlp = nlp or self.nlp
+        if nlp is None:
+            return "regex"
+        meta = nlp.meta
+        mode = f"spacy:{meta.get('lang')}_{meta.get('name')}@{meta.get('version')}"
+        if self.token_attributes:
+            mode += "+" + "+".join(sorted(self.token_attributes))
+        if self.detached:
+            mode += "+detached"
+        return mode
+
+    def _cache_get(self, paragraph_text, nlp=None):
+        if self.cache is None:
+            return None
+        with self.metrics.stage("cache"):
+            return self.cache.get(ParseCache.key(paragraph_text, self._cache_mode(nlp)))
+
+    def _cache_put(self, paragraph, nlp=None):
+        if self.cache is not None:
+            with self.metrics.stage("cache"):
+                self.cache.put(ParseCache.key(paragraph.text, self._cache_mode(nlp)), paragraph)
+
+    def _cached_paragraph(self, i, paragraph):
+        """A paragraph subtree restored from the cache, placed at position i."""
+        paragraph.metadata["position"] = i
+        return paragraph
+
+    def _add_paragraph(self, paragraph):
+        """Attach a fully built paragraph, or hand it to the array backend if one is in use."""
+        with self.metrics.stage("store"):
+            if self.tree_store is not None:
+                self.tree_store.append(paragraph)
+            else:
+                self.text_tree.add_child(paragraph)
+
+    def _spacy_docs(self, nlp, pairs, n_process=None):
+        """Run (text, position) pairs through nlp.pipe, yielding (doc, position) in input order.
+
+        nlp is not touched until there is a first pair, so a LazyModel stays
+        unloaded when every paragraph came from the cache.
+        """
+        pairs = iter(pairs)
+        first = next(pairs, None)
+        if first is None:
+            return
+        unused = [name for name in nlp.pipe_names if name not in SPACY_COMPONENTS]
+        yield from nlp.pipe(chain([first], pairs), as_tuples=True, batch_size=self.batch_size,
+                            n_process=n_process or self.n_process, disable=unused)
     
+    def _parse_paragraphs(self, numbered):
+        """Yield the subtree for each (position, text) pair, in order, with whichever parser is loaded."""
+        if self.nlp is not None:
+            return self._spacy_paragraphs(numbered)
+        return self._regex_paragraphs(numbered)
+
     def _parse_with_spacy(self):
         """Parse the text using spaCy's linguistic features."""
-        for i, paragraph_text in enumerate(self.paragraphs):
-            # Process the paragraph with spaCy
-            doc = self.nlp(paragraph_text)
-            
-            # Create paragraph node
-            paragraph = TextUnit(paragraph_text, "PARAGRAPH", self.text_tree)
-            paragraph.metadata = {
-                "position": i,
-                "length": len(paragraph_text)
-            }
-            paragraph.span = doc
-            self.text_tree.children.append(paragraph)
-            
-            # Add sentences
-            for j, sent in enumerate(doc.sents):
-                sentence = TextUnit(sent.text, "SENTENCE", paragraph)
-                sentence.metadata = {
-                    "position": j,
-                    "length": len(sent.text)
-                }
-                sentence.span = sent
-                paragraph.children.append(sentence)
-                
-                # Analyze phrases (based on noun chunks and verb phrases)
-                phrases = list(sent.noun_chunks)
-                
-                # Simple algorithm to break remaining tokens into phrases
-                current_phrase_tokens = []
-                current_phrase_type = None
-                
-                for token in sent:
-                    # Check if token is start of a new phrase type
-                    if token.pos_ in ("NOUN", "PROPN") and current_phrase_type != "NP":
-                        # Save current phrase if it exists
-                        if current_phrase_tokens:
-                            self._add_phrase(sentence, current_phrase_tokens, current_phrase_type)
-                            current_phrase_tokens = []
-                        current_phrase_type = "NP"
-                    elif token.pos_ == "VERB" and current_phrase_type != "VP":
-                        if current_phrase_tokens:
-                            self._add_phrase(sentence, current_phrase_tokens, current_phrase_type)
-                            current_phrase_tokens = []
-                        current_phrase_type = "VP"
-                    elif token.pos_ == "ADP" and current_phrase_type != "PP":
-                        if current_phrase_tokens:
-                            self._add_phrase(sentence, current_phrase_tokens, current_phrase_type)
-                            current_phrase_tokens = []
-                        current_phrase_type = "PP"
-                    elif token.pos_ == "PUNCT" and token.text not in [",", "."]:
-                        # Handle punctuation as separate units
-                        if current_phrase_tokens:
-                            self._add_phrase(sentence, current_phrase_tokens, current_phrase_type)
-                            current_phrase_tokens = []
-                        
-                        # Add punctuation directly to sentence
-                        punct = TextUnit(token.text, "PUNCT", sentence)
-                        punct.metadata = {
-                            "pos": token.pos_,
-                            "lemma": token.lemma_
-                        }
-                        punct.span = token
-                        sentence.children.append(punct)
-                        continue
-                    
-                    # Add token to current phrase
-                    current_phrase_tokens.append(token)
-                
-                # Add final phrase if it exists
-                if current_phrase_tokens:
-                    self._add_phrase(sentence, current_phrase_tokens, current_phrase_type)
-    
-    def _add_phrase(self, sentence, tokens, phrase_type):
-        """Helper to add a phrase with its tokens to a sentence."""
-        if not tokens:
-            return
-            
-        # Default to generic phrase type if none determined
-        if not phrase_type:
-            phrase_type = "PHRASE"
-            
-        # Create the phrase node
-        phrase_text = " ".join(t.text for t in tokens)
-        phrase = TextUnit(phrase_text, phrase_type, sentence)
-        phrase.metadata = {
-            "length": len(phrase_text)
-        }
-        phrase.span = tokens[0].doc[tokens[0].i:tokens[-1].i+1]
-        sentence.children.append(phrase)
-        
-        # Add individual words
-        for token in tokens:
-            # Determine token type based on POS
-            if token.pos_ == "PUNCT":
-                token_type = "PUNCT"
-            elif token.pos_ == "NUM":
-                token_type = "NUM"
-            elif token.pos_ in ("NOUN", "PROPN"):
-                token_type = "N"
-            elif token.pos_ == "VERB":
-                token_type = "V"
-            elif token.pos_ == "PRON":
-                token_type = "PRON"
-            elif token.pos_ == "DET":
-                token_type = "DET"
-            elif token.pos_ == "ADJ":
-                token_type = "ADJ"
-            elif token.pos_ == "ADV":
-                token_type = "ADV"
-            elif token.pos_ == "ADP":
-                token_type = "P"
-            elif token.pos_ == "CCONJ":
-                token_type = "CONJ"
-            elif token.pos_ == "SCONJ":
-                token_type = "SUB"
-            else:
-                token_type = token.pos_
-                
-            word = TextUnit(token.text, token_type, phrase)
-            word.metadata = {
-                "pos": token.pos_,
-                "lemma": token.lemma_,
-                "tag": token.tag_
-            }
-            word.span = token
-            phrase.children.append(word)
-    
+        for paragraph in self._spacy_paragraphs(enumerate(self._paragraph_source())):
+            self._add_paragraph(paragraph)
+
+    def _spacy_paragraphs(self, numbered):
+        """Yield spaCy subtrees for (position, text) pairs, batched through nlp.pipe."""
+        pending = deque()  # (position, cached paragraph or None) in source order
+
+        def uncached():
+            for i, paragraph_text in numbered:
+                cached = self._cache_get(paragraph_text)
+                pending.append((i, cached))
+                if cached is None:
+                    yield paragraph_text, i
+
+        # Batch paragraphs through the pipeline; nlp.pipe yields docs in input order
+        metrics = self.metrics
+        for doc, i in metrics.timed("spacy", self._spacy_docs(self.nlp, uncached())):
+            while pending[0][0] != i:
+                yield self._cached_paragraph(*pending.popleft())
+            pending.popleft()
+            with metrics.stage("tree"):
+                paragraph = self._build_spacy_paragraph(i, doc, metrics)
+            self._cache_put(paragraph)
+            yield paragraph
+        while pending:
+            yield self._cached_paragraph(*pending.popleft())
+
+    def _build_spacy_paragraph(self, i, doc, metrics=NULL_METRICS):
+        """Build the (detached) subtree for paragraph i from its spaCy Doc."""
+        return build_spacy_paragraph(i, doc, metrics, self.detached, self.token_attributes)
+
     def _parse_with_regex(self):
         """Parse the text using regular expressions (fallback)."""
-        for i, paragraph_text in enumerate(self.paragraphs):
-            paragraph = TextUnit(paragraph_text, "PARAGRAPH", self.text_tree)
-            paragraph.metadata = {
-                "position": i,
-                "length": len(paragraph_text)
-            }
-            self.text_tree.children.append(paragraph)
-            
-            # Split paragraph into sentences
-            sentences = re.split(r'(?<=[.!?])\s+', paragraph_text)
-            for j, sentence_text in enumerate(sentences):
-                if not sentence_text.strip():
-                    continue
-                    
-                sentence = TextUnit(sentence_text, "SENTENCE", paragraph)
-                sentence.metadata = {
-                    "position": j,
-                    "length": len(sentence_text)
-                }
-                paragraph.children.append(sentence)
-                
-                # Split sentences into phrases (by commas)
-                phrases = re.split(r'(,\s*)', sentence_text)
-                current_phrase_text = ""
-                
-                for k, phrase_part in enumerate(phrases):
-                    if re.match(r',\s*', phrase_part):
-                        # Add current phrase if it exists
-                        if current_phrase_text:
-                            phrase = TextUnit(current_phrase_text, "PHRASE", sentence)
-                            phrase.metadata = {
-                                "position": k // 2,  # Account for split capturing comma
-                                "length": len(current_phrase_text)
-                            }
-                            sentence.children.append(phrase)
-                            
-                            # Add words to phrase
-                            self._add_words_to_unit(phrase, current_phrase_text)
-                            current_phrase_text = ""
-                            
-                        # Add comma as punctuation
-                        punct = TextUnit(phrase_part.strip(), "PUNCT", sentence)
-                        sentence.children.append(punct)
-                    else:
-                        current_phrase_text += phrase_part
-                
-                # Add final phrase if it exists
-                if current_phrase_text:
-                    phrase = TextUnit(current_phrase_text, "PHRASE", sentence)
-                    phrase.metadata = {
-                        "position": len(phrases) // 2,
-                        "length": len(current_phrase_text)
-                    }
-                    sentence.children.append(phrase)
-                    
-                    # Add words to phrase
-                    self._add_words_to_unit(phrase, current_phrase_text)
-    
-    def _add_words_to_unit(self, unit, text):
-        """Add words to a textual unit using basic regex parsing."""
-        # Simple word and punctuation detection
-        tokens = re.findall(r'\b\w+\b|[.,;:!?]', text)
-        
-        for token in tokens:
-            if not token.strip():
+        for paragraph in self._regex_paragraphs(enumerate(self._paragraph_source())):
+            self._add_paragraph(paragraph)
+
+    def _regex_paragraphs(self, numbered):
+        """Yield regex subtrees for (position, text) pairs."""
+        for i, paragraph_text in numbered:
+            cached = self._cache_get(paragraph_text)
+            if cached is not None:
+                yield self._cached_paragraph(i, cached)
                 continue
-                
-            # Basic POS determination
-            if re.match(r'[.,;:!?]', token):
-                token_type = "PUNCT"
-            elif token.lower() in ["je", "tu", "il", "elle", "nous", "vous", "ils", "elles", "me", "te", "se", "le", "la"]:
-                token_type = "PRON"
-            elif token.lower() in ["et", "ou", "mais", "donc", "car", "ni"]:
-                token_type = "CONJ"
-            elif token.lower() in ["le", "la", "les", "un", "une", "des", "ma", "mon", "mes"]:
-                token_type = "DET"
-            elif token.lower() in ["à", "de", "en", "dans", "sur", "sous", "par", "pour", "avec", "sans"]:
-                token_type = "P"
-            elif token.lower() in ["que", "qui", "dont", "où", "quand", "comment", "pourquoi"]:
-                token_type = "SUB"
-            elif re.match(r'\d+', token):
-                token_type = "NUM"
+            with self.metrics.stage("tree"):
+                paragraph = self._build_regex_paragraph(i, paragraph_text)
+            self._cache_put(paragraph)
+            yield paragraph
+
+    def _build_regex_paragraph(self, i, paragraph_text):
+        """Build the (detached) subtree for paragraph i with the regex tokenizer."""
+        return self.tokenizer.build_paragraph(paragraph_text, i)
+
+    def _add_placeholders(self):
+        """Windowed reading: an unparsed PARAGRAPH node (no children) per paragraph."""
+        self.text_tree.extend_children(
+            self._placeholder(i, paragraph_text)
+            for i, paragraph_text in enumerate(self._paragraph_source()))
+
+    @staticmethod
+    def _placeholder(i, paragraph_text):
+        paragraph = TextUnit(paragraph_text, "PARAGRAPH")
+        paragraph.metadata = {"position": i, "length": len(paragraph_text)}
+        return paragraph
+
+    def update(self, paragraphs=None):
+        """Reparse only what changed in the text since the last parse; returns a ParagraphUpdate.
+
+        paragraphs is the edited text's paragraph list (read from the file when
+        None). It is diffed against the current paragraphs by text, only inserted
+        or changed paragraphs are parsed, and every other subtree is reused with
+        its position renumbered in place. The reading position follows its
+        paragraph. Paragraphs still waiting on the background parser keep their
+        regex parse if the edit moved them. With the arrays backend, the rows of
+        replaced paragraphs stay in the TreeStore until the next parse_text.
+        A windowed reader does not parse the changed paragraphs here: they become
+        unparsed placeholders, and the window is restarted over the new
+        paragraph positions, keeping the parsed subtrees that were reused.
+        """
+        if paragraphs is None:
+            paragraphs = list(self.iter_text())
+        old = self.text_tree.children
+        opcodes = diff_paragraphs([paragraph.text for paragraph in old], paragraphs)
+        update = ParagraphUpdate(total=len(paragraphs))
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag != "equal":
+                update.changed.extend(range(j1, j2))
+                update.removed += max(0, (i2 - i1) - (j2 - j1))
+            elif i1 != j1 and update.renumbered_from is None:
+                update.renumbered_from = j1
+        if not update:
+            return update
+
+        window = self.window
+        if window is not None:
+            window.stop()  # its positions are about to change; start_window replaces it
+            parsed = {j: self._placeholder(j, paragraphs[j]) for j in update.changed}
+        else:
+            numbered = ((j, paragraphs[j]) for j in update.changed)
+            parsed = dict(zip(update.changed, self._parse_paragraphs(numbered)))
+        if self.cache is not None:
+            with self.metrics.stage("cache"):
+                self.cache.flush()
+        with self.metrics.stage("store"):
+            store = self.tree_store
+            if store is not None:
+                for tag, i1, i2, j1, j2 in reversed(opcodes):  # back to front, so i1 stays valid
+                    if tag != "equal":
+                        store.splice(i1, i2 - i1, [parsed[j] for j in range(j1, j2)])
+                top = store.top_rows
+                first = next(j1 for tag, _, _, j1, _ in opcodes if tag != "equal")
+                for j in range(first, len(top)):
+                    store.position[top[j]] = j
+            else:
+                children = []
+                for tag, i1, i2, j1, j2 in opcodes:
+                    if tag == "equal":
+                        children.extend(old[i1:i2])
+                    else:
+                        children.extend(parsed[j] for j in range(j1, j2))
+                for j, paragraph in enumerate(children):
+                    paragraph.metadata["position"] = j
+                self.text_tree.replace_children(children)
+        if self.paragraphs:
+            self.paragraphs = list(paragraphs)
+
+        cursor = self._cursor
+        p, same, offset = 0, False, 0
+        if cursor is not None:
+            table = cursor.table
+            offset = table.start[cursor.position] if cursor else 0
+            p, same = map_position(opcodes, cursor.paragraph)
+            new = self.text_tree.children
+            for tag, i1, i2, j1, j2 in reversed(opcodes):  # back to front, so i1 stays valid
+                if tag != "equal":
+                    table.splice_paragraphs(i1, i2 - i1, [new[j] for j in range(j1, j2)])
+            cursor.seek(cursor.position)  # back inside the table until the seek below
+        if window is not None:
+            self.start_window(min(p, max(0, len(paragraphs) - 1)))
+        if cursor is not None:
+            if same:
+                cursor.seek_offset(p, offset)
+            else:
+                self.seek_paragraph(p)
+        self._index = None
+        return update
+
+    def start_background_parse(self):
+        """Reparse every paragraph with spaCy: those in the parse cache at once, the others
+        on a background thread that loads the model first.
+
+        The cache can only be read before the model is loaded when its version
+        is known from an installed package; otherwise every paragraph goes to
+        the background thread. When all of them are cached, the model is left
+        unloaded (a LazyModel) and no thread is started.
+        """
+        version = model_version(self.model_name) if self.cache is not None else None
+        model = LazyModel(self.model_name, version) if version is not None else None
+        misses = []
+        for i, paragraph in enumerate(self.text_tree.children):
+            cached = self._cache_get(paragraph.text, model) if model is not None else None
+            if cached is None:
+                misses.append((i, paragraph.text))
+            else:
+                self._swap_paragraph(i, self._cached_paragraph(i, cached))
+        if model is not None:
+            self.cache.flush()
+            if not misses:
+                self.nlp = model
+                return
+        self.background = BackgroundParser(self.model_name, misses, self._spacy_docs,
+                                           self._build_spacy_paragraph)
+        self.background.start()
+
+    def apply_background_updates(self):
+        """Swap in spaCy paragraphs finished by the background parser; returns how many."""
+        background = self.background
+        if background is None:
+            return 0
+        updates = background.drain()
+        for i, paragraph in updates:
+            old = self.text_tree.children[i]
+            if old.text != paragraph.text:
+                continue  # the tree was reparsed meanwhile
+            self.text_tree.replace_child(old, paragraph)
+            if self._cursor is not None:
+                self._cursor.replace_paragraph(i, paragraph)
+            self._index = None
+            self._cache_put(paragraph, background.nlp)
+        if background.finished:
+            if background.error is None:
+                self.nlp = background.nlp
             else:
-                token_type = "WORD"
-                
-            word = TextUnit(token, token_type, unit)
-            unit.children.append(word)
+                self.use_spacy = False
+            if self.cache is not None:
+                self.cache.flush()
+            self.background = None
+        return len(updates)
+
+    def stop_background(self):
+        """Stop the background parser and the window's worker, keeping whatever has been swapped in."""
+        if self.background is not None:
+            self.background.stop()
+            self.background = None
+        if self.window is not None:
+            self.window.stop()
+            if self.cache is not None:
+                self.cache.flush()
+
+    def start_window(self, position=0):
+        """Start parsing the paragraphs around paragraph position on a worker thread.
+
+        Paragraphs of the tree that are already parsed (those with children)
+        are taken over by the window as they are.
+        """
+        paragraphs = self.text_tree.children
+        texts = [paragraph.text for paragraph in paragraphs]
+        cached = self._window_cached if self.cache is not None else None
+        window = self.window = ParagraphWindow(texts, self._window_parse, self._window_load,
+                                               self._window_evict, look_ahead=self.look_ahead,
+                                               look_behind=self.look_behind, cached=cached)
+        for i, paragraph in enumerate(paragraphs):
+            if paragraph.children:
+                window.resident[i] = paragraph
+        window.start()
+        if texts:
+            window.require(position)
+            window.focus(position, self.reading_speed)
+
+    def _window_parse(self, i, paragraph_text):
+        """Build paragraph i on the window's worker thread (no cache or metrics there)."""
+        if self.nlp is not None:
+            (doc, _), = self._spacy_docs(self.nlp, [(paragraph_text, i)], n_process=1)
+            return self._build_spacy_paragraph(i, doc)
+        return self._build_regex_paragraph(i, paragraph_text)
+
+    def _window_cached(self, i, paragraph_text):
+        cached = self._cache_get(paragraph_text)
+        if cached is not None:
+            return self._cached_paragraph(i, cached)
+        return None
+
+    def _window_load(self, i, paragraph, fresh):
+        self._swap_paragraph(i, paragraph)
+        if fresh:
+            self._cache_put(paragraph)
+
+    def _window_evict(self, i, paragraph):
+        self._swap_paragraph(i, self._placeholder(i, paragraph.text))
+        for node in paragraph.walk():
+            node.parent = None  # no parent/child cycles, so the subtree is freed right away
+
+    def _swap_paragraph(self, i, paragraph):
+        self.text_tree.replace_child(self.text_tree.children[i], paragraph)
+        if self._cursor is not None:
+            self._cursor.replace_paragraph(i, paragraph)
+        self._index = None
+
+    def apply_window_updates(self):
+        """Install paragraphs the window's worker has parsed and move the window to the
+        reading position; returns how many were installed."""
+        window = self.window
+        if window is None:
+            return 0
+        installed = window.poll()
+        window.focus(self.current_paragraph_idx, self.reading_speed)
+        return installed
+
+    def _load_next(self, step):
+        """Windowed reading: parse the paragraph the cursor is about to step into.
+
+        Only needed on the first or last token of a paragraph; paragraphs
+        without tokens are loaded and stepped over, as the cursor would.
+        """
+        cursor = self.cursor
+        table = cursor.table
+        count = table.paragraph_count
+        p = cursor.paragraph
+        if cursor:
+            edge = table.paragraph_first[p + 1] - 1 if step > 0 else table.paragraph_first[p]
+            if cursor.position != edge:
+                return
+        for _ in range(count - 1):
+            p = (p + step) % count
+            self.window.require(p)
+            if len(table.paragraph_tokens(p)):
+                return
+
+    def _load_from(self, p):
+        """Windowed reading: parse paragraph p, or the first one after it with tokens."""
+        table = self.cursor.table
+        count = table.paragraph_count
+        p = min(max(0, p), count - 1)
+        for q in range(p, count):
+            self.window.require(q)
+            if len(table.paragraph_tokens(q)):
+                return q
+        return p
 
     def get_visible_text(self, window_height):
         """Get the text to display in the window."""
         # Find the index of the first paragraph to display
         start_idx = max(0, self.current_paragraph_idx - 3)
-        end_idx = min(len(self.paragraphs), start_idx + window_height)
+        paragraphs = self.text_tree.children
+        end_idx = min(len(paragraphs), start_idx + window_height)
         
-        visible_paragraphs = self.paragraphs[start_idx:end_idx]
+        visible_paragraphs = [p.text for p in paragraphs[start_idx:end_idx]]
         return visible_paragraphs, start_idx
 
+    @property
+    def cursor(self):
+        """Reading position over the flat token table, built on first use after a parse."""
+        if self._cursor is None:
+            with self.metrics.stage("token_table"):
+                self._cursor = TokenCursor(TokenTable.build(self.text_tree))
+        return self._cursor
+
+    @property
+    def index(self):
+        """Type, lemma and form index of the tree (see tree_index), built on first use."""
+        if self._index is None:
+            with self.metrics.stage("index"):
+                self._index = TreeIndex.build(self.text_tree)
+        return self._index
+
+    def select(self, selector):
+        """Nodes matching a selector such as "SENTENCE > VP > V[lemma=être]", in order."""
+        return self.index.select(selector)
+
+    @property
+    def current_paragraph_idx(self):
+        return self.cursor.paragraph
+
+    @property
+    def current_sentence_idx(self):
+        return self.cursor.sentence
+
+    @property
+    def current_word_idx(self):
+        """Index of the current token among the tokens (words and punctuation) of its sentence."""
+        return self.cursor.word
+
     def get_current_elements(self):
         """Get the current paragraph, sentence, and word."""
         if not self.text_tree.children:
             return None, None, None
             
         current_paragraph = self.text_tree.children[self.current_paragraph_idx]
-        if not current_paragraph.children:
+        if not self.cursor:
             return current_paragraph, None, None
             
         current_sentence = current_paragraph.children[self.current_sentence_idx]
-        if not current_sentence.children:
-            return current_paragraph, current_sentence, None
-            
-        current_word = current_sentence.children[self.current_word_idx]
+        current_word = self.cursor.node(self.text_tree)
         return current_paragraph, current_sentence, current_word
 
     def move_to_next_word(self):
-        """Move to the next word in the text."""
-        current_paragraph = self.text_tree.children[self.current_paragraph_idx]
-        current_sentence = current_paragraph.children[self.current_sentence_idx]
-        
-        # Move to next word
-        self.current_word_idx += 1
-        
-        # If at end of sentence, move to next sentence
-        if self.current_word_idx >= len(current_sentence.children):
-            self.current_word_idx = 0
-            self.current_sentence_idx += 1
-            
-            # If at end of paragraph, move to next paragraph
-            if self.current_sentence_idx >= len(current_paragraph.children):
-                self.current_sentence_idx = 0
-                self.current_paragraph_idx += 1
-                
-                # If at end of text, wrap around
-                if self.current_paragraph_idx >= len(self.text_tree.children):
-                    self.current_paragraph_idx = 0
+        """Move to the next word in the text, wrapping around at the end."""
+        if self.window is not None:
+            self._load_next(1)
+        self.cursor.next()
+
+    def move_to_previous_word(self):
+        """Move to the previous word in the text, wrapping around at the start."""
+        if self.window is not None:
+            self._load_next(-1)
+        self.cursor.prev()
+
+    def seek_paragraph(self, index):
+        """Jump to the first word of paragraph index."""
+        if self.window is not None and self.text_tree.children:
+            index = self._load_from(index)
+        self.cursor.seek_paragraph(index)
+
+    def seek_percent(self, percent):
+        """Jump to the word percent (0-100) of the way through the text."""
+        if self.window is not None:
+            self.seek_paragraph(self.window.paragraph_at(percent))
+        else:
+            self.cursor.seek_percent(percent)
+
+    @property
+    def percent(self):
+        """How far (0-100) through the text the reading position is."""
+        cursor = self.cursor
+        if self.window is None or not cursor:
+            return cursor.percent
+        p = cursor.paragraph
+        tokens = cursor.table.paragraph_tokens(p)
+        return self.window.percent(p, (cursor.position - tokens.start) / len(tokens))
+
+    def highlight_ranges(self):
+        """Character ranges of the current sentence and word in the current paragraph."""
+        return self.cursor.highlight()
 
     def run_with_curses(self, stdscr):
         """Run the reader with a curses interface."""
@@ -406,107 +683,84 @@ class ProustReader:
         curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_YELLOW)  # Current sentence
         curses.init_pair(3, curses.COLOR_WHITE, curses.COLOR_BLUE)    # Current word
         curses.init_pair(4, curses.COLOR_WHITE, curses.COLOR_BLACK)   # Normal text
-        
-        # Get window dimensions
-        max_y, max_x = stdscr.getmaxlines(), stdscr.getmaxyx()[1]
-        text_height = max_y - 5  # Leave room for instructions
+        renderer = ReaderRenderer(stdscr, {
+            "title": curses.A_BOLD,
+            "paragraph": curses.color_pair(1),
+            "sentence": curses.color_pair(2),
+            "word": curses.color_pair(3),
+            "normal": curses.color_pair(4),
+        })
         
         # Main loop
         running = True
         paused = False
+        next_tick = time.monotonic() + self.reading_speed
         
         while running:
-            stdscr.clear()
-            
-            # Display instructions
-            stdscr.addstr(0, 0, "PROUST READER - Streaming Text Viewer", curses.A_BOLD)
-            stdscr.addstr(1, 0, "Press 'q' to quit, 'p' to pause/resume, arrow keys to adjust speed")
-            
-            # Get current elements
-            current_para, current_sent, current_word = self.get_current_elements()
-            
-            # Display text
-            visible_paragraphs, start_idx = self.get_visible_text(text_height)
-            y_pos = 3  # Start position after instructions
-            
-            for i, para_text in enumerate(visible_paragraphs):
-                para_idx = start_idx + i
-                
-                # Check if this is the current paragraph
-                is_current_para = (para_idx == self.current_paragraph_idx)
-                
-                if is_current_para and current_sent:
-                    # Display paragraph with highlighted sentence
-                    sentences = re.split(r'(?<=[.!?])\s+', para_text)
-                    x_pos = 0
-                    
-                    for j, sent in enumerate(sentences):
-                        is_current_sent = (j == self.current_sentence_idx)
-                        
-                        if is_current_sent and current_word:
-                            # Display sentence with highlighted word
-                            words = re.findall(r'\b\w+\b|[.,;:!?]|\s+', sent)
-                            for k, word in enumerate(words):
-                                if k == self.current_word_idx:
-                                    stdscr.addstr(y_pos, x_pos, word, curses.color_pair(3))
-                                else:
-                                    stdscr.addstr(y_pos, x_pos, word, curses.color_pair(2))
-                                x_pos += len(word)
-                        else:
-                            attr = curses.color_pair(2) if is_current_sent else curses.color_pair(4)
-                            stdscr.addstr(y_pos, x_pos, sent + " ", attr)
-                            x_pos += len(sent) + 1
-                        
-                        # Wrap text if needed
-                        if x_pos >= max_x:
-                            y_pos += 1
-                            x_pos = 0
-                    
-                    y_pos += 2  # Extra space after current paragraph
-                else:
-                    # Display normal paragraph
-                    attr = curses.color_pair(1) if is_current_para else curses.color_pair(4)
-                    
-                    # Split paragraph into lines to fit window width
-                    words = para_text.split()
-                    line = ""
-                    for word in words:
-                        if len(line) + len(word) + 1 > max_x:
-                            stdscr.addstr(y_pos, 0, line.strip(), attr)
-                            y_pos += 1
-                            line = ""
-                        line += word + " "
-                    
-                    if line:
-                        stdscr.addstr(y_pos, 0, line.strip(), attr)
-                    
-                    y_pos += 2  # Space between paragraphs
-            
             # Show reading speed
             speed_text = f"Reading speed: {1/self.reading_speed:.1f} words per second"
             status = "PAUSED" if paused else "RUNNING"
-            stdscr.addstr(max_y-1, 0, f"{speed_text} | Status: {status}")
-            
-            # Refresh the screen
-            stdscr.refresh()
+            status_text = f"{speed_text} | {self.percent:.0f}% | Status: {status}"
+            if self.background is not None:
+                status_text += f" | spaCy: {self.background.status}"
+            if self.window is not None:
+                status_text += f" | window: {self.window.status}"
+            self.apply_background_updates()
+            self.apply_window_updates()
+            renderer.draw(self, status_text)
             
-            # Check for keyboard input (non-blocking)
-            stdscr.nodelay(True)
+            # Wait for a key until the next word is due (indefinitely while paused),
+            # waking up regularly while spaCy or window paragraphs are still arriving
+            wait = -1 if paused else max(0, int((next_tick - time.monotonic()) * 1000))
+            if self.background is not None or self.window is not None:
+                wait = BACKGROUND_POLL_MS if wait < 0 else min(wait, BACKGROUND_POLL_MS)
+            stdscr.timeout(wait)
             key = stdscr.getch()
             
             if key == ord('q'):
                 running = False
             elif key == ord('p'):
                 paused = not paused
+                next_tick = time.monotonic() + self.reading_speed
             elif key == curses.KEY_RIGHT:
                 self.reading_speed = max(0.05, self.reading_speed - 0.05)
             elif key == curses.KEY_LEFT:
                 self.reading_speed = min(1.0, self.reading_speed + 0.05)
+            elif key == curses.KEY_DOWN:
+                self.seek_paragraph(self.current_paragraph_idx + 1)
+            elif key == curses.KEY_UP:
+                self.seek_paragraph(self.current_paragraph_idx - 1)
+            elif key == ord('b'):
+                self.move_to_previous_word()
+            elif ord('0') <= key <= ord('9'):
+                self.seek_percent(10 * (key - ord('0')))
+            elif key == curses.KEY_RESIZE:
+                renderer.invalidate()
             
-            # Move to next word if not paused
-            if not paused:
+            # Move to next word if not paused and it is due
+            if not paused and time.monotonic() >= next_tick:
                 self.move_to_next_word()
-                time.sleep(self.reading_speed)
+                next_tick = max(next_tick + self.reading_speed, time.monotonic())
+
+def _token_attributes(value):
+    """argparse type for --token-attributes: a comma-separated subset of TOKEN_ATTRIBUTES."""
+    import argparse
+    names = tuple(name for name in value.split(",") if name)
+    unknown = [name for name in names if name not in TOKEN_ATTRIBUTES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown attribute {unknown[0]!r} (choose from {', '.join(TOKEN_ATTRIBUTES)})")
+    return names
+
+def _write_ast(reader, args):
+    """Write the first args.paragraphs paragraphs to args.output in args.format."""
+    paragraphs = reader.text_tree.children[:args.paragraphs]
+    with reader.metrics.stage("serialize"):
+        if args.format == "binary":
+            write_binary_ast(paragraphs, args.output, title=reader.text_tree.text)
+        else:
+            with open(args.output, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                write_forest(paragraphs, f, compact=args.compact)
 
 def main():
     """Main function."""
@@ -521,31 +775,108 @@ def main():
     parser.add_argument("--no-spacy", action="store_true", help="Disable spaCy processing")
     parser.add_argument("--paragraphs", type=int, default=2, help="Number of paragraphs to process for AST")
     parser.add_argument("--output", help="Output file for AST (default: examples/proust_ast.lisp)")
+    parser.add_argument("--format", choices=("sexpr", "binary"), default="sexpr",
+                        help="AST output format (binary: columnar file with paragraph index)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write the AST one line per node, without indentation")
+    parser.add_argument("--input", default=book_path,
+                        help="Text to read, '-' for stdin (default: data/pg2650.txt)")
+    parser.add_argument("--start-line", type=int,
+                        help="Lines to skip before the text (default: 56, or 0 with --gutenberg)")
+    parser.add_argument("--gutenberg", action="store_true",
+                        help="Strip Project Gutenberg header and footer")
+    parser.add_argument("--max-paragraphs", type=int, help="Stop after this many paragraphs")
+    parser.add_argument("--mmap", action="store_true", help="Read the input file through mmap")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model to load")
+    parser.add_argument("--wait-for-model", action="store_true",
+                        help="Load spaCy before starting the reader instead of in the background")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the parse cache")
+    parser.add_argument("--rebuild-cache", action="store_true",
+                        help="Reparse everything and overwrite cached entries")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="Parse cache size cap in MB (least recently used entries are evicted)")
+    parser.add_argument("--backend", choices=BACKENDS, default="objects",
+                        help="Tree representation: TextUnit objects or compact arrays")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="Paragraphs per spaCy nlp.pipe batch")
+    parser.add_argument("--n-process", type=int, default=1,
+                        help="Worker processes for spaCy parsing")
+    parser.add_argument("--detached", action="store_true",
+                        help="Keep character offsets instead of spaCy spans, freeing each Doc")
+    parser.add_argument("--token-attributes", type=_token_attributes, default=(),
+                        metavar="head,morph",
+                        help="Extra spaCy token attributes to copy into word metadata")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print per-stage timings, counts and memory estimates to stderr")
+    parser.add_argument("--profile-json", metavar="PATH",
+                        help="Also write the profile as JSON (implies --profile)")
+    parser.add_argument("--cprofile", metavar="PATH",
+                        help="Run cProfile around parsing and save its stats (implies --profile)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Trace allocations while parsing (slow; implies --profile)")
+    parser.add_argument("--watch", action="store_true",
+                        help="With --ast, keep watching the input and reparse only edited "
+                             "paragraphs, printing their S-expressions to stdout")
+    parser.add_argument("--window", action="store_true",
+                        help="Parse only the paragraphs around the reading position, on a "
+                             "background thread, keeping memory bounded (objects backend)")
+    parser.add_argument("--look-ahead", type=int, default=LOOK_AHEAD,
+                        help=f"With --window, most paragraphs to parse ahead (default: {LOOK_AHEAD})")
+    parser.add_argument("--look-behind", type=int, default=LOOK_BEHIND,
+                        help=f"With --window, paragraphs kept parsed behind (default: {LOOK_BEHIND})")
     args = parser.parse_args()
+    if args.watch and (not args.ast or args.input == "-"):
+        parser.error("--watch needs --ast and an input file")
+    if args.window and (args.ast or args.backend != "objects"):
+        parser.error("--window is for the interactive reader with the objects backend")
     
     # Set default output path
     if args.ast and not args.output:
-        args.output = os.path.join(os.path.dirname(script_dir), "examples", "proust_ast.lisp")
+        extension = "bast" if args.format == "binary" else "lisp"
+        args.output = os.path.join(os.path.dirname(script_dir), "examples", f"proust_ast.{extension}")
     
     # Initialize reader with or without spaCy
-    reader = ProustReader(book_path, use_spacy=not args.no_spacy)
+    if args.start_line is None:
+        args.start_line = 0 if args.gutenberg else 56
+    cache = None
+    if not args.no_cache:
+        cache = ParseCache(max_bytes=args.cache_size * 1024 * 1024, rebuild=args.rebuild_cache)
+    metrics = None
+    if args.profile or args.profile_json or args.cprofile or args.tracemalloc:
+        metrics = Metrics(cprofile=args.cprofile, trace_memory=args.tracemalloc)
+    max_paragraphs = args.max_paragraphs
+    if args.ast:
+        # Only parse the paragraphs that will be written
+        max_paragraphs = min(args.paragraphs, max_paragraphs or args.paragraphs)
+    reader = ProustReader(args.input, start_line=args.start_line, use_spacy=not args.no_spacy,
+                          backend=args.backend, batch_size=args.batch_size,
+                          n_process=args.n_process, max_paragraphs=max_paragraphs,
+                          gutenberg=args.gutenberg, use_mmap=args.mmap, cache=cache,
+                          model_name=args.model,
+                          background_model=not args.ast and not args.wait_for_model,
+                          metrics=metrics, detached=args.detached,
+                          token_attributes=args.token_attributes, windowed=args.window,
+                          look_ahead=args.look_ahead, look_behind=args.look_behind)
     
     if args.ast:
-        # Generate AST representation using the enhanced TextUnit.to_s_expr method
+        # Stream the S-expressions straight to the output file
         print(f"Generating AST for {args.paragraphs} paragraphs...")
-        
-        # Get the specified number of paragraphs from the text tree
-        paragraphs = reader.text_tree.children[:args.paragraphs]
-        
-        # Generate S-expressions
-        ast_content = ""
-        for paragraph in paragraphs:
-            ast_content += paragraph.to_s_expr() + "\n"
-        
-        # Write to file
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(ast_content)
+        _write_ast(reader, args)
         print(f"AST representation saved to {args.output}")
+        if args.watch:
+            print(f"Watching {args.input} for changes (Ctrl-C to stop)", file=sys.stderr)
+
+            def on_change():
+                update = reader.update()
+                if update:
+                    write_update(update, reader.text_tree.children, sys.stdout,
+                                 compact=args.compact)
+                    _write_ast(reader, args)
+
+            try:
+                watch_file(args.input, on_change)
+            except KeyboardInterrupt:
+                pass
     else:
         # Run the interactive reader
         try:
@@ -556,6 +887,18 @@ def main():
             print(f"Error running reader: {e}")
             import traceback
             traceback.print_exc()
+        reader.stop_background()
+
+    print(f"Parsed {len(reader.text_tree.children)} paragraphs in {reader.parse_seconds:.2f}s "
+          f"({reader.paragraphs_per_second:.1f} paragraphs/sec)")
+    if cache is not None:
+        print(f"Parse cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
+        cache.close()
+    if metrics is not None:
+        metrics.summary()
+        if args.profile_json:
+            metrics.dump(args.profile_json)
+            print(f"Profile saved to {args.profile_json}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Single-pass regex tokenizer for the fallback (non-spaCy) parser
+
+One compiled pattern walks a paragraph once and returns its words, punctuation,
+commas and sentence breaks (white space after . ! or ?) as a flat stream; the
+types come from one dict keyed by the pieces as written, applied with map().
+A piece missing from it is typed once, in Python (lowercased against the
+lexicon, or NUM if it starts with a digit), and remembered, so after the
+first few paragraphs of a text tokenizing runs no per-token Python code. The batch API
+(tokenize_batch) stops there. Building the tree additionally needs sentence
+and phrase offsets, which a second, boundary-only pattern supplies, and one
+TextUnit per token, created in Python; that allocation, not the scanning, is
+most of build_paragraph's time.
+
+The tree has the same shape as the original regex parser's: PARAGRAPH ->
+SENTENCE -> PHRASE (split at commas, each comma a PUNCT child of the
+sentence) -> word tokens. The one behavioural change is that "le" and "la" are
+classed DET; the old chain tested the pronoun list first, so they could never
+reach it.
+"""
+
+import re
+from itertools import compress, count
+from typing import Iterable, Iterator, List, Tuple
+
+try:
+    from .text_unit import TextUnit
+except ImportError:  # run as a script from src/
+    from text_unit import TextUnit
+
+PRONOUNS = frozenset(("je", "tu", "il", "elle", "nous", "vous", "ils", "elles", "me", "te", "se"))
+CONJUNCTIONS = frozenset(("et", "ou", "mais", "donc", "car", "ni"))
+DETERMINERS = frozenset(("le", "la", "les", "un", "une", "des", "ma", "mon", "mes"))
+PREPOSITIONS = frozenset(("à", "de", "en", "dans", "sur", "sous", "par", "pour", "avec", "sans"))
+SUBORDINATORS = frozenset(("que", "qui", "dont", "où", "quand", "comment", "pourquoi"))
+
+# Lowercased word -> token type
+LEXICON = {}
+for _words, _token_type in ((PRONOUNS, "PRON"), (CONJUNCTIONS, "CONJ"), (DETERMINERS, "DET"),
+                            (PREPOSITIONS, "P"), (SUBORDINATORS, "SUB")):
+    LEXICON.update(dict.fromkeys(_words, _token_type))
+
+BREAK = "BREAK"  # type of the sentence-break entries in a token stream
+
+_WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+
+# Most distinct pieces _TYPES remembers before it starts over (a book has some
+# tens of thousands of word forms)
+MAX_TYPED_PIECES = 1 << 17
+
+
+class _PieceTypes(dict):
+    """Piece as written -> type, for every piece the scanner has returned so far."""
+
+    def __init__(self):
+        super().__init__(dict.fromkeys(".,;:!?", "PUNCT"))
+        self.update(dict.fromkeys(_WHITESPACE, BREAK))
+        self._fixed = len(self)
+
+    def __missing__(self, piece: str) -> str:
+        if piece[0].isdecimal():  # what \d matches
+            token_type = "NUM"
+        else:
+            token_type = LEXICON.get(piece.lower(), "WORD")
+        if len(self) >= MAX_TYPED_PIECES:
+            for key in list(self)[self._fixed:]:
+                del self[key]
+        self[piece] = token_type
+        return token_type
+
+
+_TYPES = _PieceTypes()
+_IS_BOUNDARY = frozenset("," + _WHITESPACE).__contains__
+
+# A sentence break is reported as its first white space character, a comma as
+# itself; other white space, quotes and dashes are skipped
+_SCAN_RE = re.compile(r'\w+|[.,;:!?]|(?<=[.!?])\s')
+# The same boundaries with the white space they swallow, for offsets
+_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+|,\s*')
+
+COMMA = None  # marks a comma in a sentence's item list
+
+Token = Tuple[str, str]                      # (text, type)
+Phrase = Tuple[int, int, int, List[Token]]   # (position, start, end, tokens)
+Sentence = Tuple[int, int, int, list]        # (position, start, end, phrases and COMMAs)
+
+
+def tokenize(text: str) -> Tuple[List[str], List[str]]:
+    """Scan a paragraph into parallel lists of pieces and their types.
+
+    Pieces are words, punctuation (commas included) and one white space
+    character per sentence break, typed BREAK.
+    """
+    pieces = _SCAN_RE.findall(text)
+    return pieces, list(map(_TYPES.__getitem__, pieces))
+
+
+class RegexTokenizer:
+    """Scan paragraphs into sentences, phrases and typed tokens, and build TextUnit trees."""
+
+    def scan(self, text: str) -> List[Sentence]:
+        """Split one paragraph into sentences, phrases and typed tokens.
+
+        Offsets index into text; positions are the ones the tree carries in
+        its metadata (sentence index among the sentence splits, phrase index
+        among the comma-separated slots).
+        """
+        pieces, types = tokenize(text)
+        sentences: List[Sentence] = []
+        items: list = []
+        sentence_start = phrase_start = 0
+        sentence_position = slot = 0
+        first = 0  # first piece of the current phrase
+
+        cuts = compress(count(), map(_IS_BOUNDARY, pieces))
+        for cut, boundary in zip(cuts, _BOUNDARY_RE.finditer(text)):
+            start, end = boundary.span()
+            if start > phrase_start:
+                items.append((slot, phrase_start, start, list(zip(pieces[first:cut],
+                                                                   types[first:cut]))))
+            if types[cut] == BREAK:
+                if text[sentence_start:start].strip():
+                    sentences.append((sentence_position, sentence_start, start, items))
+                items = []
+                sentence_position += 1
+                sentence_start = end
+                slot = 0
+            else:
+                items.append(COMMA)
+                slot += 1
+            phrase_start = end
+            first = cut + 1
+
+        end = len(text)
+        if end > phrase_start:
+            items.append((slot, phrase_start, end, list(zip(pieces[first:], types[first:]))))
+        if text[sentence_start:end].strip():
+            sentences.append((sentence_position, sentence_start, end, items))
+        return sentences
+
+    def tokenize_batch(self, texts: Iterable[str]) -> Iterator[Tuple[List[str], List[str]]]:
+        """tokenize() over many paragraphs."""
+        return map(tokenize, texts)
+
+    def build_paragraph(self, text: str, position: int = 0) -> TextUnit:
+        """Build the (detached) PARAGRAPH subtree for one paragraph."""
+        paragraph = TextUnit(text, "PARAGRAPH")
+        paragraph.metadata = {"position": position, "length": len(text)}
+        for sentence_position, start, end, items in self.scan(text):
+            sentence_text = text[start:end]
+            sentence = TextUnit(sentence_text, "SENTENCE")
+            sentence.metadata = {"position": sentence_position, "length": len(sentence_text)}
+            paragraph.add_child(sentence)
+            for item in items:
+                if item is COMMA:
+                    sentence.add_child(TextUnit(",", "PUNCT"))
+                    continue
+                slot, phrase_start, phrase_end, tokens = item
+                phrase_text = text[phrase_start:phrase_end]
+                phrase = TextUnit(phrase_text, "PHRASE")
+                phrase.metadata = {"position": slot, "length": len(phrase_text)}
+                sentence.add_child(phrase)
+                phrase.extend_children([TextUnit(word, token_type) for word, token_type in tokens])
+        return paragraph
+
+    def build_batch(self, texts: Iterable[str], start: int = 0) -> Iterator[TextUnit]:
+        """Build paragraph subtrees for many paragraphs, numbered from start."""
+        build = self.build_paragraph
+        for i, text in enumerate(texts, start):
+            yield build(text, i)
@@ -0,0 +1,186 @@
+"""
+Incremental curses renderer for the Proust reader
+
+Line layout (word wrapping) is computed once per paragraph text per terminal
+width and kept as character offsets into that text. A full repaint happens
+only when the viewport moves, a visible paragraph's text changes or the
+terminal is resized; on an ordinary word tick just the lines whose highlight
+changed are redrawn, and the screen is flushed with noutrefresh/doupdate so
+curses sends only the changed cells.
+"""
+
+import curses
+import re
+from typing import Dict, List, Optional, Tuple
+
+Range = Tuple[int, int]
+
+TEXT_TOP = 3          # first screen row used for text, below the instructions
+PARAGRAPHS_BEFORE = 3  # paragraphs kept visible above the current one
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def wrap_offsets(text: str, width: int) -> List[Range]:
+    """Greedy word wrap; returns (start, end) offsets of each line in text."""
+    width = max(1, width)
+    lines: List[Range] = []
+    line_start = None
+    line_end = 0
+    for m in _WORD_RE.finditer(text):
+        start, end = m.span()
+        if line_start is not None and end - line_start > width:
+            lines.append((line_start, line_end))
+            line_start = None
+        if line_start is None:
+            line_start = start
+            # Words longer than the screen are hard-split
+            while end - line_start > width:
+                lines.append((line_start, line_start + width))
+                line_start += width
+        line_end = end
+    if line_start is not None:
+        lines.append((line_start, line_end))
+    return lines or [(0, 0)]
+
+
+class ReaderRenderer:
+    """Draws a ProustReader on a curses screen, repainting as little as possible.
+
+    attrs maps "title", "paragraph", "sentence", "word" and "normal" to curses
+    attributes; doupdate defaults to curses.doupdate and can be replaced for
+    headless use with a fake screen.
+    """
+
+    def __init__(self, screen, attrs: Dict[str, int], doupdate=None):
+        self.screen = screen
+        self.attrs = attrs
+        self.doupdate = doupdate or curses.doupdate
+        self._size: Optional[Tuple[int, int]] = None
+        self._layouts: Dict[Tuple[str, int], List[Range]] = {}  # (text, width) -> lines
+        self._viewport: Optional[Tuple[int, int]] = None
+        self._painted: List[Tuple[int, str]] = []  # (index, text) of the paragraphs on screen
+        self._current_rows: List[Tuple[int, int, int]] = []  # (row, start, end)
+        self._highlight: Tuple[Optional[Range], Optional[Range]] = (None, None)
+        self._status: Optional[str] = None
+
+    def invalidate(self):
+        """Forget the layout and force a full repaint (e.g. after a resize)."""
+        self._layouts.clear()
+        self._viewport = None
+        self._status = None
+
+    def layout(self, text: str) -> List[Range]:
+        """Wrapped line offsets for a paragraph's text at the current width (cached)."""
+        key = (text, self._size[1])
+        lines = self._layouts.get(key)
+        if lines is None:
+            lines = self._layouts[key] = wrap_offsets(text, self._size[1])
+        return lines
+
+    def draw(self, reader, status: str):
+        """Bring the screen up to date with the reader's position."""
+        size = self.screen.getmaxyx()
+        if size != self._size:
+            self._size = size
+            self.invalidate()
+
+        current = reader.current_paragraph_idx
+        viewport = (max(0, current - PARAGRAPHS_BEFORE), current)
+        highlight = reader.highlight_ranges()
+
+        if viewport != self._viewport or self._stale(reader.text_tree.children):
+            self._paint_all(reader, viewport, highlight)
+        elif highlight != self._highlight:
+            self._paint_changes(reader, highlight)
+        self._highlight = highlight
+
+        if status != self._status:
+            self._put(self._size[0] - 1, 0, status, self.attrs["normal"], clear=True)
+            self._status = status
+
+        self.screen.noutrefresh()
+        self.doupdate()
+
+    def _stale(self, paragraphs) -> bool:
+        """Whether a paragraph on screen has been replaced or edited since it was painted."""
+        return any(index >= len(paragraphs) or paragraphs[index].text != text
+                   for index, text in self._painted)
+
+    def _paint_all(self, reader, viewport, highlight):
+        max_y, max_x = self._size
+        self.screen.erase()
+        self._put(0, 0, "PROUST READER - Streaming Text Viewer", self.attrs["title"])
+        self._put(1, 0, "Press 'q' to quit, 'p' to pause/resume, arrow keys to adjust speed",
+                  self.attrs["normal"])
+        self._status = None
+
+        first, current = viewport
+        paragraphs = reader.text_tree.children
+        bottom = max_y - 2  # keep the status line free
+        row = TEXT_TOP
+        self._current_rows = []
+        self._painted = []
+        layouts, self._layouts = self._layouts, {}  # keep only what is on screen
+        index = first
+        while index < len(paragraphs) and row < bottom:
+            text = paragraphs[index].text
+            is_current = index == current
+            self._painted.append((index, text))
+            key = (text, max_x)
+            if key in layouts:
+                self._layouts[key] = layouts[key]
+            for start, end in self.layout(text):
+                if row >= bottom:
+                    break
+                if is_current:
+                    self._current_rows.append((row, start, end))
+                    self._paint_line(row, text, start, end, highlight)
+                else:
+                    self._put(row, 0, text[start:end], self.attrs["normal"])
+                row += 1
+            row += 1  # Space between paragraphs
+            index += 1
+        self._viewport = viewport
+
+    def _paint_changes(self, reader, highlight):
+        text = reader.text_tree.children[reader.current_paragraph_idx].text
+        changed = [r for r in self._highlight + highlight if r is not None]
+        for row, start, end in self._current_rows:
+            if any(r_start < end and start < r_end for r_start, r_end in changed):
+                self._paint_line(row, text, start, end, highlight)
+
+    def _paint_line(self, row: int, text: str, start: int, end: int, highlight):
+        """Draw one line of the current paragraph with sentence/word highlighting."""
+        sentence, word = highlight
+        base = self.attrs["normal"] if sentence else self.attrs["paragraph"]
+        cuts = {start, end}
+        for r in (sentence, word):
+            if r is not None:
+                cuts.update(p for p in r if start < p < end)
+        cuts = sorted(cuts)
+
+        self.screen.move(row, 0)
+        self.screen.clrtoeol()
+        for seg_start, seg_end in zip(cuts, cuts[1:]):
+            if word is not None and word[0] <= seg_start < word[1]:
+                attr = self.attrs["word"]
+            elif sentence is not None and sentence[0] <= seg_start < sentence[1]:
+                attr = self.attrs["sentence"]
+            else:
+                attr = base
+            self._put(row, seg_start - start, text[seg_start:seg_end], attr)
+
+    def _put(self, row: int, col: int, text: str, attr: int, clear: bool = False):
+        max_y, max_x = self._size
+        if row >= max_y or col >= max_x:
+            return
+        if clear:
+            self.screen.move(row, 0)
+            self.screen.clrtoeol()
+        # The bottom-right cell cannot be written without scrolling
+        width = max_x - col - (1 if row == max_y - 1 else 0)
+        try:
+            self.screen.addnstr(row, col, text, width, attr)
+        except curses.error:
+            pass
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Incremental S-expression parser for streaming syntax trees
+
+Reads the dialect written by TextUnit.to_s_expr (and the hand-written trees in
+examples/) chunk by chunk, as it arrives from an LLM, and emits TextUnit nodes
+as soon as their closing parenthesis is seen. Only the stack of open nodes is
+kept between chunks, so arbitrarily long responses can be consumed with low
+time-to-first-node and bounded memory.
+"""
+
+import codecs
+import mmap
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    from .text_unit import TextUnit
+except ImportError:  # run as a script: python src/sexpr_parser.py
+    from text_unit import TextUnit
+
+# One token per match; commas are whitespace, as in {position 0, length 12}
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>[\s,]+)
+  | (?P<comment>;[^\n]*)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<lbrace>\{)
+  | (?P<rbrace>\})
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<atom>[^\s(){}",;]+)
+''', re.VERBOSE)
+
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+_INT_RE = re.compile(r'[-+]?\d+$')
+_FLOAT_RE = re.compile(r'[-+]?(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?$')
+
+# Tokens that may still grow when more input arrives
+_OPEN_ENDED = ("ws", "comment", "atom")
+
+
+class SExprParseError(ValueError):
+    """Raised when the input is not a well-formed S-expression tree."""
+
+
+def unescape_string(literal: str) -> str:
+    """Turn a quoted string token into its Python value."""
+    body = literal[1:-1]
+    if "\\" not in body:
+        return body
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def atom_value(atom: str) -> Any:
+    """Convert a bare atom to a Python value (numbers and booleans; keywords stay strings)."""
+    if _INT_RE.match(atom):
+        return int(atom)
+    if _FLOAT_RE.match(atom):
+        return float(atom)
+    if atom == "true":
+        return True
+    if atom == "false":
+        return False
+    if atom == "nil":
+        return None
+    return atom
+
+
+class _NodeFrame:
+    """An open (TYPE ...) list on the parser stack."""
+    __slots__ = ("node", "key", "has_text")
+
+    def __init__(self, node: Optional[TextUnit]):
+        self.node = node        # None until the type atom has been read
+        self.key = None         # pending :key waiting for its value
+        self.has_text = False   # a string literal was seen (terminal node)
+
+
+class _MapFrame:
+    """An open {key value ...} map on the parser stack."""
+    __slots__ = ("items", "key")
+
+    def __init__(self):
+        self.items: Dict[str, Any] = {}
+        self.key = None
+
+
+class _ListFrame:
+    """A plain data list, e.g. the (PART PRES) value of :features in a map."""
+    __slots__ = ("items",)
+
+    def __init__(self):
+        self.items: List[Any] = []
+
+
+class SExprPushParser:
+    """
+    Push parser that turns S-expression text into TextUnit nodes.
+
+    Feed it str or bytes chunks of any size; each call to feed() returns the
+    nodes completed by that chunk, children before their parents. With
+    keep_children=False completed nodes are not attached to their parent's
+    children list, so memory stays proportional to the nesting depth.
+    """
+
+    def __init__(self, root: Optional[TextUnit] = None, keep_children: bool = True,
+                 encoding: str = "utf-8"):
+        self.root = root
+        self.keep_children = keep_children
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        self._buffer = ""
+        self._stack: List[Union[_NodeFrame, _MapFrame, _ListFrame]] = []
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        """Number of currently open lists and maps."""
+        return len(self._stack)
+
+    def feed(self, chunk: Union[str, bytes]) -> List[TextUnit]:
+        """Consume a chunk of input and return the nodes it completed."""
+        if self._closed:
+            raise SExprParseError("parser is closed")
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        if self._buffer:
+            self._buffer += chunk
+        else:
+            self._buffer = chunk
+        return self._scan(final=False)
+
+    def close(self) -> List[TextUnit]:
+        """Signal end of input; flushes the last token and checks for unbalanced lists."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        completed = self._scan(final=True)
+        self._closed = True
+        if self._stack:
+            raise SExprParseError(f"unexpected end of input with {len(self._stack)} open lists")
+        return completed
+
+    def _scan(self, final: bool) -> List[TextUnit]:
+        buf = self._buffer
+        end = len(buf)
+        pos = 0
+        completed: List[TextUnit] = []
+        match = _TOKEN_RE.match
+
+        while pos < end:
+            m = match(buf, pos)
+            if m is None:
+                if buf[pos] == '"' and not final:
+                    break  # string literal continues in the next chunk
+                raise SExprParseError(f"unexpected input {buf[pos:pos + 20]!r}")
+            kind = m.lastgroup
+            if m.end() == end and not final and kind in _OPEN_ENDED:
+                break  # token may continue in the next chunk
+            pos = m.end()
+
+            if kind == "ws" or kind == "comment":
+                continue
+            if kind == "open":
+                self._open_list()
+            elif kind == "close":
+                node = self._close_list()
+                if node is not None:
+                    completed.append(node)
+            elif kind == "lbrace":
+                self._stack.append(_MapFrame())
+            elif kind == "rbrace":
+                self._close_map()
+            elif kind == "string":
+                self._value(unescape_string(m.group()), is_string=True)
+            else:
+                self._atom(m.group())
+
+        self._buffer = buf[pos:]
+        return completed
+
+    def _top(self):
+        if not self._stack:
+            raise SExprParseError("value outside of any list")
+        return self._stack[-1]
+
+    def _open_list(self):
+        if self._stack and not isinstance(self._stack[-1], _NodeFrame):
+            self._stack.append(_ListFrame())  # data list inside metadata
+        else:
+            self._stack.append(_NodeFrame(None))
+
+    def _close_list(self) -> Optional[TextUnit]:
+        frame = self._top()
+        if isinstance(frame, _MapFrame):
+            raise SExprParseError("')' closes a metadata map")
+        if isinstance(frame, _ListFrame):
+            self._stack.pop()
+            self._value(frame.items, is_string=False)
+            return None
+        if frame.node is None:
+            raise SExprParseError("empty list has no node type")
+        self._stack.pop()
+        node = frame.node
+
+        if not frame.has_text and node.children:
+            node.text = " ".join(child.text for child in node.children)
+
+        if self._stack:
+            parent_frame = self._stack[-1]
+            if parent_frame.node is None:
+                raise SExprParseError("nested list in node type position")
+            if self.keep_children:
+                parent_frame.node.add_child(node)
+            else:
+                node.parent = parent_frame.node
+        elif self.root is not None:
+            if self.keep_children:
+                self.root.add_child(node)
+            else:
+                node.parent = self.root
+        return node
+
+    def _close_map(self):
+        frame = self._top()
+        if not isinstance(frame, _MapFrame):
+            raise SExprParseError("'}' without a matching '{'")
+        if frame.key is not None:
+            raise SExprParseError(f"metadata key {frame.key!r} has no value")
+        self._stack.pop()
+        self._value(frame.items, is_string=False)
+
+    def _atom(self, atom: str):
+        frame = self._top()
+        if isinstance(frame, _ListFrame):
+            frame.items.append(atom_value(atom))
+            return
+        if isinstance(frame, _NodeFrame):
+            if frame.node is None:
+                frame.node = TextUnit("", atom)
+                return
+            if atom.startswith(":") and frame.key is None:
+                frame.key = atom[1:]
+                return
+        elif frame.key is None:
+            frame.key = atom[1:] if atom.startswith(":") else atom
+            return
+        self._value(atom_value(atom), is_string=False)
+
+    def _value(self, value: Any, is_string: bool):
+        frame = self._top()
+        if isinstance(frame, _ListFrame):
+            frame.items.append(value)
+            return
+        if isinstance(frame, _MapFrame):
+            if frame.key is None:
+                if not is_string:
+                    raise SExprParseError("map key must be an atom or string")
+                frame.key = value
+            else:
+                frame.items[frame.key] = value
+                frame.key = None
+            return
+
+        node = frame.node
+        if node is None:
+            raise SExprParseError("node type must be an atom")
+        key = frame.key
+        if key is None:
+            # Bare value in a node: the terminal's text, e.g. (WORD "Longtemps")
+            node.text = value if isinstance(value, str) else str(value)
+            frame.has_text = True
+            return
+        frame.key = None
+        if key == "id":
+            node.node_id = str(value)
+        elif key == "metadata" and isinstance(value, dict):
+            node.metadata.update(value)
+        else:
+            node.metadata[key] = value
+
+
+def iter_nodes(chunks: Iterable[Union[str, bytes]], **kwargs) -> Iterator[TextUnit]:
+    """Yield TextUnit nodes from an iterable of chunks as soon as each one closes."""
+    parser = SExprPushParser(**kwargs)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def parse_file(path: str, root: Optional[TextUnit] = None, use_mmap: bool = False,
+               chunk_size: int = 1 << 16) -> TextUnit:
+    """Read an AST file into a tree; its top-level nodes become children of root.
+
+    root defaults to a BOOK node titled with the path. With use_mmap the file
+    is fed to the parser in chunks straight out of an mmap.
+    """
+    if root is None:
+        root = TextUnit(path, "BOOK")
+    parser = SExprPushParser(root=root)
+    with open(path, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), chunk_size):
+                    parser.feed(mapped[start:start + chunk_size])
+        else:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                parser.feed(chunk)
+    parser.close()
+    return root
+
+
+def main():
+    """Stream an S-expression AST from a file or stdin and report nodes as they close."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Stream TextUnit nodes out of an S-expression AST")
+    parser.add_argument("file", nargs="?", help="AST file to read (default: stdin)")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Bytes read per chunk")
+    args = parser.parse_args()
+
+    stream = open(args.file, "rb") if args.file else sys.stdin.buffer
+    try:
+        chunks = iter(lambda: stream.read(args.chunk_size), b"")
+        for node in iter_nodes(chunks, keep_children=False):
+            # Without retained children only explicit :id values are meaningful
+            print(f"{node.unit_type}\t{node.node_id or '-'}\t{node.text}")
+    finally:
+        if args.file:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Streaming S-expression writer
+
+Writes TextUnit trees (or TreeStore views) as S-expressions straight to a
+file-like object. The tree is walked with an explicit stack, so depth is not
+limited by the recursion limit, and output is buffered into large writes
+instead of being joined into one big string per level.
+"""
+
+import re
+from typing import IO, Any, Iterable, List
+
+# Flush the pending output once this many pieces have accumulated
+BUFFER_PIECES = 2048
+
+# Metadata strings matching this are written bare (e.g. lemma "maison"),
+# anything else is quoted so the reader can tell where the value ends
+_BARE_ATOM_RE = re.compile(r'[^\s(){}",;\\]+$')
+# ...unless it would read back as a number or boolean
+_NON_STRING_ATOM_RE = re.compile(r'([-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?|true|false|nil)$')
+
+
+def quote(text: str) -> str:
+    """Quote a string, escaping backslashes, double quotes and newlines."""
+    if '\\' in text or '"' in text or '\n' in text:
+        text = text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{text}"'
+
+
+def format_value(value: Any) -> str:
+    """Render a metadata value in the reader's dialect."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "nil"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return "(" + " ".join(format_value(v) for v in value) + ")"
+    if isinstance(value, dict):
+        return format_metadata(value)
+    text = str(value)
+    if _BARE_ATOM_RE.match(text) and not _NON_STRING_ATOM_RE.match(text):
+        return text
+    return quote(text)
+
+
+def format_metadata(metadata) -> str:
+    """Render a metadata dict as {key value, key value}."""
+    return "{" + ", ".join(f"{k} {format_value(v)}" for k, v in metadata.items()) + "}"
+
+
+def write_s_expr(unit, out: IO[str], indent: int = 0, compact: bool = False):
+    """Write one unit and its subtree to out.
+
+    Leaves are written as terminals with their text, e.g. (N "maison"), inner
+    nodes with their :id and children. The default layout matches
+    TextUnit.to_s_expr; compact=True drops indentation and puts closing parens
+    on the last child's line, giving exactly one line per node.
+    """
+    parts: List[str] = []
+    first = True
+    # Entries are (unit, depth) to open a node, or (None, depth) to close one
+    stack = [(unit, indent)]
+    while stack:
+        node, depth = stack.pop()
+        ind = "" if compact else "  " * depth
+
+        if node is None:
+            parts.append(")" if compact else f"\n{ind})")
+        else:
+            if not first:
+                parts.append("\n")
+            first = False
+            metadata = node.metadata
+            meta_str = f" :metadata {format_metadata(metadata)}" if metadata else ""
+            children = node.children
+            if not children:
+                # Terminal nodes include the actual text
+                parts.append(f"{ind}({node.unit_type} {quote(node.text)}{meta_str})")
+            else:
+                parts.append(f"{ind}({node.unit_type} :id {quote(node.id)}{meta_str}")
+                stack.append((None, depth))
+                for i in range(len(children) - 1, -1, -1):
+                    stack.append((children[i], depth + 1))
+
+        if len(parts) >= BUFFER_PIECES:
+            out.write("".join(parts))
+            parts.clear()
+
+    out.write("".join(parts))
+
+
+def write_forest(units: Iterable, out: IO[str], compact: bool = False):
+    """Write a sequence of top-level units (e.g. paragraphs), one per line."""
+    for unit in units:
+        write_s_expr(unit, out, compact=compact)
+        out.write("\n")
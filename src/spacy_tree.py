@@ -0,0 +1,219 @@
+"""
+spaCy paragraph trees
+
+Builds the PARAGRAPH -> SENTENCE -> phrase -> word subtree for one parsed spaCy
+Doc. Kept apart from ProustReader so worker processes (batch_ast) and the
+background parser can build trees without a reader instance. Phrase chunking
+(chunk_doc) is a vectorized pass over the Doc's POS array of its own, so
+--profile can time it separately from building the nodes.
+"""
+
+try:
+    from .metrics import NULL_METRICS
+    from .text_unit import TextUnit
+except ImportError:  # run as a script from src/
+    from metrics import NULL_METRICS
+    from text_unit import TextUnit
+
+# spaCy components the tree builder reads from: POS and morphology, sentence
+# boundaries from the parser (or senter/sentencizer), and lemmas. Everything
+# else (e.g. ner) is disabled while parsing.
+SPACY_COMPONENTS = ("tok2vec", "tagger", "morphologizer", "parser", "senter", "sentencizer",
+                    "attribute_ruler", "lemmatizer")
+
+PUNCT_CHUNK = "PUNCT"  # chunk type of punctuation attached directly to the sentence
+
+# Token attributes that can be copied into word metadata on request:
+# head adds "dep" (relation) and "head" (Doc index of the head token),
+# morph adds "morph" (e.g. "Gender=Fem|Number=Sing")
+TOKEN_ATTRIBUTES = ("head", "morph")
+
+# Chunker: a token with one of these POS starts a phrase of that type, unless
+# a phrase of the same type is already running
+PHRASE_TYPES = (None, "NP", "VP", "PP")  # index = phrase class in the lookup table
+PHRASE_POS = {"NOUN": "NP", "PROPN": "NP", "VERB": "VP", "ADP": "PP"}
+# Punctuation that stays in its phrase; other PUNCT tokens are chunks of their own
+INLINE_PUNCT = (",", ".")
+# Word node type by POS; any other POS is used as the type as it is
+WORD_TYPES = {"PUNCT": "PUNCT", "NUM": "NUM", "NOUN": "N", "PROPN": "N", "VERB": "V",
+              "PRON": "PRON", "DET": "DET", "ADJ": "ADJ", "ADV": "ADV", "ADP": "P",
+              "CCONJ": "CONJ", "SCONJ": "SUB"}
+
+_tables = None
+
+
+def pos_tables():
+    """POS id -> phrase class (NumPy array) and POS id -> word type (list), built on first use.
+
+    spaCy and NumPy are imported here rather than at module level, so
+    importing this module stays cheap until a Doc is built.
+    """
+    global _tables
+    if _tables is None:
+        import numpy as np
+        from spacy.parts_of_speech import IDS
+        size = max(int(pos) for pos in IDS.values()) + 1
+        classes = np.zeros(size, dtype=np.int8)
+        word_types = [""] * size
+        for name, pos in IDS.items():
+            if name in PHRASE_POS:
+                classes[int(pos)] = PHRASE_TYPES.index(PHRASE_POS[name])
+            word_types[int(pos)] = WORD_TYPES.get(name, name)
+        _tables = classes, word_types, int(IDS["PUNCT"])
+    return _tables
+
+
+def build_spacy_paragraph(i, doc, metrics=NULL_METRICS, detached=False, attributes=()):
+    """Build the (detached) subtree for paragraph i from its spaCy Doc.
+
+    Nodes keep their spaCy object in span, unless detached is set: then they
+    keep (start, end) character offsets in the paragraph instead and nothing
+    refers to the Doc once it is built. attributes names TOKEN_ATTRIBUTES to
+    copy into word metadata.
+    """
+    paragraph_text = doc.text
+    # Create paragraph node
+    paragraph = TextUnit(paragraph_text, "PARAGRAPH")
+    paragraph.metadata = {
+        "position": i,
+        "length": len(paragraph_text)
+    }
+    if detached:
+        paragraph.offsets = (0, len(paragraph_text))
+    else:
+        paragraph.span = doc
+
+    # Add sentences
+    sentences = list(doc.sents)
+    with metrics.stage("chunk"):
+        chunks = chunk_doc(doc, sentences)
+    for j, sent in enumerate(sentences):
+        sentence = TextUnit(sent.text, "SENTENCE", paragraph)
+        sentence.metadata = {
+            "position": j,
+            "length": len(sent.text)
+        }
+        if detached:
+            sentence.offsets = (sent.start_char, sent.end_char)
+        else:
+            sentence.span = sent
+        paragraph.add_child(sentence)
+
+        for phrase_type, start, end in chunks[j]:
+            if phrase_type == PUNCT_CHUNK:
+                # Add punctuation directly to sentence
+                token = doc[start]
+                punct = TextUnit(token.text, "PUNCT", sentence)
+                punct.metadata = {
+                    "pos": token.pos_,
+                    "lemma": token.lemma_
+                }
+                if attributes:
+                    _add_attributes(punct.metadata, token, attributes)
+                if detached:
+                    punct.offsets = (token.idx, token.idx + len(token.text))
+                else:
+                    punct.span = token
+                sentence.add_child(punct)
+            else:
+                _add_phrase(sentence, doc, start, end, phrase_type, detached, attributes)
+
+    return paragraph
+
+
+def chunk_doc(doc, sentences):
+    """Split each of a Doc's sentences into (phrase type, start, end) token ranges.
+
+    Works on the Doc's POS and ORTH arrays at once: a token starts a phrase
+    if its phrase class (PHRASE_POS) differs from the last class seen in its
+    sentence; punctuation other than INLINE_PUNCT is a chunk of its own, typed
+    PUNCT_CHUNK, and the phrase it interrupts resumes after it with the same
+    type. Phrases that start before any NP/VP/PP boundary have type None.
+    Returns one list of chunks per sentence.
+    """
+    import numpy as np
+    from spacy.attrs import ORTH, POS
+    n = len(doc)
+    chunks = [[] for _ in sentences]
+    if not n:
+        return chunks
+    classes, _, punct = pos_tables()
+    pos, orth = doc.to_array([POS, ORTH]).T
+    strings = doc.vocab.strings
+    alone = pos == punct
+    for text in INLINE_PUNCT:
+        alone &= orth != strings[text]
+    phrase = classes[pos]
+
+    index = np.arange(n)
+    sentence_start = np.zeros(n, dtype=bool)
+    sentence_start[[sent.start for sent in sentences]] = True
+    first = np.maximum.accumulate(np.where(sentence_start, index, 0))
+    # Class of the phrase running before each token (0 at a sentence start)
+    last = np.maximum.accumulate(np.where(phrase > 0, index, -1))
+    previous = np.empty(n, dtype=np.int64)
+    previous[0] = -1
+    previous[1:] = last[:-1]
+    running = np.where(previous >= first, phrase[previous], 0)
+
+    boundary = ((phrase > 0) & (phrase != running)) | alone | sentence_start
+    boundary[1:] |= alone[:-1]
+    starts = np.flatnonzero(boundary)
+    types = np.where(phrase > 0, phrase, running)[starts].tolist()
+    punctuation = alone[starts].tolist()
+    sentence = (np.cumsum(sentence_start) - 1)[starts].tolist()
+    ends = starts[1:].tolist() + [n]
+    for k, start in enumerate(starts.tolist()):
+        chunk_type = PUNCT_CHUNK if punctuation[k] else PHRASE_TYPES[types[k]]
+        chunks[sentence[k]].append((chunk_type, start, ends[k]))
+    return chunks
+
+
+def _add_phrase(sentence, doc, start, end, phrase_type, detached=False, attributes=()):
+    """Helper to add a phrase of doc's tokens start to end - 1 to a sentence."""
+    if start >= end:
+        return
+
+    # Default to generic phrase type if none determined
+    if not phrase_type:
+        phrase_type = "PHRASE"
+
+    # Create the phrase node
+    tokens = doc[start:end]
+    phrase_text = " ".join(t.text for t in tokens)
+    phrase = TextUnit(phrase_text, phrase_type, sentence)
+    phrase.metadata = {
+        "length": len(phrase_text)
+    }
+    if detached:
+        last = doc[end - 1]
+        phrase.offsets = (doc[start].idx, last.idx + len(last.text))
+    else:
+        phrase.span = tokens
+    sentence.add_child(phrase)
+
+    # Add individual words, typed by POS through the lookup table
+    word_types = pos_tables()[1]
+    for token in tokens:
+        word = TextUnit(token.text, word_types[token.pos], phrase)
+        word.metadata = {
+            "pos": token.pos_,
+            "lemma": token.lemma_,
+            "tag": token.tag_
+        }
+        if attributes:
+            _add_attributes(word.metadata, token, attributes)
+        if detached:
+            word.offsets = (token.idx, token.idx + len(token.text))
+        else:
+            word.span = token
+        phrase.add_child(word)
+
+
+def _add_attributes(metadata, token, attributes):
+    """Copy the requested TOKEN_ATTRIBUTES of token into metadata."""
+    if "head" in attributes:
+        metadata["dep"] = token.dep_
+        metadata["head"] = token.head.i
+    if "morph" in attributes:
+        metadata["morph"] = str(token.morph)
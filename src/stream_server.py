@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Asyncio server streaming a parsed text token by token to many clients
+
+The tree is parsed (or loaded from an AST file) once, flattened into one
+TokenTable, and shared read-only by every connection. Each client gets its
+own TokenCursor over that table, its own reading speed and its own output
+format, so a client reading at 0.05 s per token and one paused mid-book do
+not affect each other.
+
+Every token is sent as one line, preceded by a line for each paragraph or
+sentence it starts:
+
+    ndjson  {"event": "paragraph", "id": "book-p3", "paragraph": 3}
+            {"event": "sentence", "id": "book-p3-s0", "paragraph": 3, "sentence": 0}
+            {"event": "token", "token": 812, "type": "WORD", "text": "Longtemps", ...}
+            {"event": "end"}
+    sexpr   (PARAGRAPH-START :id "book-p3")
+            (SENTENCE-START :id "book-p3-s0")
+            (WORD "Longtemps" :metadata {pos ADV, lemma longtemps})
+            (END)
+
+Clients may send commands, one per line, at any time:
+
+    speed SECONDS      seconds per token (0: as fast as the client reads)
+    seek TOKEN         jump to a token number
+    paragraph N        jump to the start of paragraph N
+    percent P          jump to P% of the book
+    format ndjson|sexpr
+    pause / resume
+    quit
+
+Backpressure: after each line the sender awaits drain(), which blocks once
+the connection's write buffer passes its high-water mark (WRITE_BUFFER_HIGH),
+so a slow client only slows down its own cursor and never makes the server
+buffer more than that per connection. At the end of the book the client's
+stream pauses until it seeks elsewhere or disconnects.
+"""
+
+import asyncio
+import io
+import json
+import math
+import sys
+from typing import Optional
+
+try:
+    from .sexpr_writer import quote, write_s_expr
+    from .token_cursor import TokenCursor, TokenTable
+    from .tree_index import load_tree
+except ImportError:  # run as a script: python src/stream_server.py
+    from sexpr_writer import quote, write_s_expr
+    from token_cursor import TokenCursor, TokenTable
+    from tree_index import load_tree
+
+FORMATS = ("ndjson", "sexpr")
+
+# Per-connection write buffer limits; drain() waits while above the high mark
+WRITE_BUFFER_HIGH = 64 * 1024
+WRITE_BUFFER_LOW = 16 * 1024
+
+
+class SharedBook:
+    """A parsed tree and its token table, built once and only read by connections."""
+
+    def __init__(self, root):
+        self.root = root
+        self.table = TokenTable.build(root)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def token_line(self, t: int, cursor: TokenCursor, fmt: str) -> str:
+        node = cursor.node(self.root)
+        if fmt == "sexpr":
+            out = io.StringIO()
+            write_s_expr(node, out, compact=True)
+            return out.getvalue()
+        table = self.table
+        return json.dumps({"event": "token", "token": t, "paragraph": table.paragraph[t],
+                           "sentence": table.sentence[t], "type": node.unit_type,
+                           "text": node.text, "start": table.start[t], "end": table.end[t],
+                           "metadata": node.metadata}, ensure_ascii=False)
+
+    def boundary_lines(self, t: int, fmt: str, announce: bool = False):
+        """Lines for the paragraph and/or sentence that token t starts.
+
+        With announce, both are sent even mid-sentence (after a seek).
+        """
+        table = self.table
+        p, s = table.paragraph[t], table.sentence[t]
+        new_paragraph = announce or t == 0 or table.paragraph[t - 1] != p
+        new_sentence = new_paragraph or table.sentence[t - 1] != s
+        if not new_sentence:
+            return []
+        paragraph = self.root.children[p]
+        lines = []
+        if new_paragraph:
+            lines.append(_event("paragraph", paragraph.id, fmt, paragraph=p))
+        lines.append(_event("sentence", paragraph.children[s].id, fmt, paragraph=p, sentence=s))
+        return lines
+
+
+def _event(name: str, node_id: Optional[str], fmt: str, **fields) -> str:
+    if fmt == "sexpr":
+        if node_id is None:
+            return f"({name.upper()})"
+        return f"({name.upper()}-START :id {quote(node_id)})"
+    record = {"event": name}
+    if node_id is not None:
+        record["id"] = node_id
+    record.update(fields)
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _error(message: str, fmt: str) -> str:
+    if fmt == "sexpr":
+        return f"(ERROR {quote(message)})"
+    return json.dumps({"event": "error", "message": message}, ensure_ascii=False)
+
+
+class _Client:
+    """One connection: its cursor, speed, format and pause state."""
+
+    def __init__(self, book: SharedBook, writer: asyncio.StreamWriter, speed: float, fmt: str):
+        self.book = book
+        self.writer = writer
+        self.cursor = TokenCursor(book.table)
+        self.speed = speed
+        self.format = fmt
+        self.running = asyncio.Event()
+        self.running.set()
+        self.moved = False  # a seek happened since the last token was sent
+        self.closed = False
+        self.input_closed = False
+        self.task: Optional[asyncio.Task] = None  # the stream() task
+
+    def seek(self, t: int):
+        self.cursor.seek(t)
+        self.moved = True
+        self.running.set()
+
+    def command(self, line: str) -> Optional[str]:
+        """Apply one command line; returns an error message for bad ones."""
+        name, _, arg = line.strip().partition(" ")
+        name = name.lower()
+        try:
+            if name == "speed":
+                speed = float(arg)
+                if not math.isfinite(speed) or speed < 0:
+                    return "speed must be a finite number >= 0"
+                self.speed = speed
+            elif name == "seek":
+                self.seek(int(arg))
+            elif name == "paragraph":
+                p = min(max(0, int(arg)), self.book.table.paragraph_count)
+                self.seek(self.book.table.paragraph_first[p])
+            elif name == "percent":
+                percent = float(arg)
+                if not math.isfinite(percent):
+                    return "percent must be a finite number"
+                self.seek(int(len(self.book) * percent / 100))
+            elif name == "format":
+                if arg not in FORMATS:
+                    return f"unknown format {arg!r}; expected one of {', '.join(FORMATS)}"
+                self.format = arg
+            elif name == "pause":
+                self.running.clear()
+            elif name == "resume":
+                self.running.set()
+            elif name == "quit":
+                self.close()
+            elif name:
+                return f"unknown command {name!r}"
+        except (ValueError, OverflowError):
+            return f"bad argument for {name}: {arg!r}"
+        return None
+
+    async def send(self, line: str):
+        self.writer.write(line.encode("utf-8") + b"\n")
+        await self.writer.drain()
+
+    async def read_commands(self, reader: asyncio.StreamReader):
+        while not self.closed:
+            try:
+                line = await reader.readline()
+            except ConnectionError:
+                line = b""
+            if not line:
+                # Nothing can resume a paused stream now; a running one goes on
+                # while the client keeps reading, up to the end of the book
+                self.input_closed = True
+                if not self.running.is_set():
+                    self.close()
+                return
+            error = self.command(line.decode("utf-8", "replace"))
+            if error is not None:
+                await self.send(_error(error, self.format))
+
+    def close(self):
+        self.closed = True
+        self.running.set()
+
+    async def stream(self):
+        book, cursor = self.book, self.cursor
+        if not len(book):
+            await self.send(_event("end", None, self.format))
+            return
+        self.moved = True
+        while not self.closed:
+            await self.running.wait()
+            if self.closed:
+                break
+            t = cursor.position
+            fmt = self.format
+            announce, self.moved = self.moved, False
+            for line in book.boundary_lines(t, fmt, announce):
+                await self.send(line)
+            await self.send(book.token_line(t, cursor, fmt))
+            if self.moved:
+                continue  # sought while sending; carry on from there
+            if t + 1 >= len(book):
+                await self.send(_event("end", None, fmt))
+                if self.input_closed:
+                    return
+                if not self.moved:
+                    self.running.clear()  # wait at the end for a seek or a disconnect
+                continue
+            cursor.seek(t + 1)
+            await asyncio.sleep(self.speed)  # also yields at speed 0 to a client that keeps up
+
+
+class StreamServer:
+    """Serves one SharedBook to any number of TCP or Unix socket clients.
+
+    speed and fmt are each new client's starting reading speed (seconds per
+    token) and format; clients can change theirs with commands.
+    """
+
+    def __init__(self, book: SharedBook, speed: float = 0.3, fmt: str = "ndjson"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        self.book = book
+        self.speed = speed
+        self.format = fmt
+        self.clients = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._handlers = set()  # tasks running handle(), one per connection
+        self._closing = False
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        self.server = await asyncio.start_unix_server(self.handle, path)
+        return self.server
+
+    async def close(self):
+        """Stop listening, end every client's stream and wait for the connections to close."""
+        self._closing = True
+        if self.server is not None:
+            self.server.close()
+        for client in list(self.clients):
+            client.close()
+            if client.task is not None:
+                client.task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH, low=WRITE_BUFFER_LOW)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        handler.add_done_callback(self._handlers.discard)
+        client = _Client(self.book, writer, self.speed, self.format)
+        self.clients.add(client)
+        commands = asyncio.create_task(client.read_commands(reader))
+        streaming = client.task = asyncio.create_task(client.stream())
+        try:
+            await streaming
+        except ConnectionError:
+            pass  # the client went away mid-write
+        except asyncio.CancelledError:
+            if handler.cancelling():
+                raise
+            # only the stream was cancelled, by close(): end the connection normally
+        finally:
+            client.closed = True
+            commands.cancel()
+            await asyncio.gather(commands, return_exceptions=True)
+            self.clients.discard(client)
+            if self._closing or handler.cancelling():
+                writer.transport.abort()  # a client that stopped reading cannot hold up shutdown
+            else:
+                writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def main():
+    """Parse a text (or load an AST file) once and stream it to socket clients."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Stream a parsed text token by token to "
+                                                 "TCP or Unix socket clients")
+    parser.add_argument("source", help="Text file, or an AST file (.lisp or .bast)")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    where.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address to bind")
+    parser.add_argument("--speed", type=float, default=0.3,
+                        help="Initial seconds per token for each client")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson",
+                        help="Initial output format for each client")
+    parser.add_argument("--no-spacy", action="store_true", help="Parse text with regexes only")
+    parser.add_argument("--start-line", type=int, default=56,
+                        help="Lines to skip before a text (default: 56)")
+    args = parser.parse_args()
+
+    book = SharedBook(load_tree(args.source, use_spacy=not args.no_spacy,
+                                start_line=args.start_line))
+    server = StreamServer(book, speed=args.speed, fmt=args.format)
+
+    async def serve():
+        if args.unix:
+            await server.start_unix(args.unix)
+            where = args.unix
+        else:
+            await server.start_tcp(args.host, args.port)
+            where = f"{args.host}:{args.port}"
+        print(f"Streaming {len(book)} tokens in {book.table.paragraph_count} paragraphs "
+              f"on {where}", file=sys.stderr)
+        try:
+            await server.server.serve_forever()
+        finally:
+            # Close the connections here rather than leave their handlers to
+            # asyncio.run's final cancellation, which logs each one as an error
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+TextUnit - the node type shared by the Proust reader and the S-expression tools
+
+A TextUnit is one level of the text hierarchy (book, paragraph, sentence, phrase
+or word) and knows how to render itself as an S-expression.
+"""
+
+import io
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+
+try:
+    from .sexpr_writer import write_s_expr
+except ImportError:  # run as a script from src/
+    from sexpr_writer import write_s_expr
+
+@dataclass
+class TextUnit:
+    text: str
+    unit_type: str  # 'paragraph', 'sentence', 'word', 'phrase', etc.
+    parent: Optional['TextUnit'] = None
+    children: List['TextUnit'] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    span: Any = None  # spaCy span object
+    node_id: Optional[str] = None  # explicit :id, e.g. read back from an S-expression
+    offsets: Optional[Tuple[int, int]] = None  # (start, end) in the paragraph, kept instead of span
+    
+    # Caches kept current by add_child/insert_child/remove_child
+    _index: int = field(default=-1, init=False, repr=False, compare=False)
+    _id: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _id_index: Optional[Dict[str, 'TextUnit']] = field(default=None, init=False, repr=False,
+                                                      compare=False)
+
+    @property
+    def index(self) -> int:
+        """Position of this unit among its parent's children (O(1))."""
+        parent = self.parent
+        if parent is None:
+            return 0
+        idx = self._index
+        siblings = parent.children
+        if 0 <= idx < len(siblings) and siblings[idx] is self:
+            return idx
+        # The children list was changed directly: renumber every sibling (they may
+        # all have moved) and clear their subtrees' ids
+        parent._renumber(0)
+        parent._invalidate_id_index()
+        idx = self._index
+        if 0 <= idx < len(siblings) and siblings[idx] is self:
+            return idx
+        self._index = 0  # no longer among its parent's children
+        self._clear_ids()
+        return 0
+
+    @property
+    def id(self) -> str:
+        """Unique ID for this unit based on position in hierarchy (cached)."""
+        if self.node_id is not None:
+            return self.node_id
+        # A cached id is only good while every ancestor is still where it was:
+        # an ancestor whose parent's children were changed directly is found
+        # here, and checking its index renumbers it and clears the ids below
+        node, parent = self, self.parent
+        while parent is not None:
+            idx = node._index
+            siblings = parent.children
+            if not (0 <= idx < len(siblings) and siblings[idx] is node):
+                node.index
+            if parent.node_id is not None:
+                break  # ids below an explicit id do not depend on positions above it
+            node, parent = parent, parent.parent
+        return self._cached_id()
+
+    def _cached_id(self) -> str:
+        if self.node_id is not None:
+            return self.node_id
+        if self._id is None:
+            if self.parent is None:
+                # Cached like any other id, so that a cached id always implies cached
+                # ids all the way up (which _clear_ids and add_child rely on)
+                self._id = self.unit_type.lower()
+            else:
+                self._id = f"{self.parent._cached_id()}-{self.unit_type[0].lower()}{self._index}"
+        return self._id
+
+    def add_child(self, child: 'TextUnit') -> 'TextUnit':
+        """Append a child, assigning its sibling index."""
+        child.parent = self
+        child._index = len(self.children)
+        if child._id is not None or child.node_id is not None:
+            child._clear_ids()  # subtree was built elsewhere; its ids are stale
+        self.children.append(child)
+        self._invalidate_id_index()
+        return child
+
+    def extend_children(self, children: Iterable['TextUnit']):
+        """Append many children at once (the id index is invalidated once, not per child)."""
+        siblings = self.children
+        for child in children:
+            child.parent = self
+            child._index = len(siblings)
+            if child._id is not None or child.node_id is not None:
+                child._clear_ids()
+            siblings.append(child)
+        self._invalidate_id_index()
+
+    def insert_child(self, position: int, child: 'TextUnit') -> 'TextUnit':
+        """Insert a child before position and renumber the siblings after it."""
+        position = max(0, min(position, len(self.children)))
+        child.parent = self
+        self.children.insert(position, child)
+        self._renumber(position)
+        self._invalidate_id_index()
+        return child
+
+    def remove_child(self, child: 'TextUnit') -> 'TextUnit':
+        """Detach a child and renumber the siblings after it."""
+        position = child.index
+        if child.parent is not self or self.children[position] is not child:
+            raise ValueError(f"{child.unit_type} is not a child of {self.id}")
+        del self.children[position]
+        child.parent = None
+        child._index = -1
+        child._clear_ids()
+        self._renumber(position)
+        self._invalidate_id_index()
+        return child
+
+    def replace_child(self, old: 'TextUnit', new: 'TextUnit') -> 'TextUnit':
+        """Put new in old's place (same index, no renumbering) and detach old."""
+        position = old.index
+        if old.parent is not self or self.children[position] is not old:
+            raise ValueError(f"{old.unit_type} is not a child of {self.id}")
+        self.children[position] = new
+        new.parent = self
+        new._index = position
+        new._clear_ids()
+        old.parent = None
+        old._index = -1
+        old._clear_ids()
+        self._invalidate_id_index()
+        return new
+
+    def replace_children(self, children: Iterable['TextUnit']):
+        """Make children this unit's children, keeping the cached ids of any that stay put.
+
+        Children that move or are new get their index reassigned and ids cleared;
+        former children that are left out are detached.
+        """
+        children = list(children)
+        kept = {id(child) for child in children}
+        for child in self.children:
+            if id(child) not in kept:
+                child.parent = None
+                child._index = -1
+                child._clear_ids()
+        for i, child in enumerate(children):
+            if child.parent is not self or child._index != i:
+                child.parent = self
+                child._index = i
+                child._clear_ids()
+        self.children = children
+        self._invalidate_id_index()
+
+    def walk(self):
+        """Yield this unit and all its descendants in document (pre-)order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def find(self, node_id: str) -> Optional['TextUnit']:
+        """Look up a unit in this subtree by id; the index is built once and reused."""
+        if self._id_index is None:
+            self._id_index = {node.id: node for node in self.walk()}
+        return self._id_index.get(node_id)
+
+    def _renumber(self, start: int):
+        for i in range(start, len(self.children)):
+            child = self.children[i]
+            child._index = i
+            child._clear_ids()
+
+    def _clear_ids(self):
+        # A cached id caches its ancestors' ids too, so a subtree whose root has
+        # none cached (and no explicit id) has nothing cached below it either
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._id is None and node.node_id is None:
+                continue
+            node._id = None
+            stack.extend(node.children)
+
+    def _invalidate_id_index(self):
+        node = self
+        while node is not None:
+            node._id_index = None
+            node = node.parent
+
+    def to_s_expr(self, indent=0) -> str:
+        """Convert this unit to an S-expression."""
+        out = io.StringIO()
+        write_s_expr(self, out, indent)
+        return out.getvalue()
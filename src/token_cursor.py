@@ -0,0 +1,239 @@
+"""
+Flat token table and reading cursor
+
+TokenTable flattens the leaves of a text tree (words and punctuation) into
+parallel `array` columns: the path to each token (paragraph, sentence, child of
+the sentence and, for phrases, the word inside it) plus its character offsets
+in the paragraph, and the offsets of its sentence. A prefix array of the first
+token of each paragraph gives O(1) paragraph seeks, and a paragraph whose
+subtree is replaced (e.g. regex nodes swapped for spaCy ones) is re-flattened
+by splicing its row range.
+
+TokenCursor is a single integer into that table, so next/prev are O(1), seeking
+to a paragraph or a percentage of the book is O(1), and a character offset is
+mapped to its token by binary search over the paragraph's token starts.
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Optional, Tuple
+
+Range = Tuple[int, int]
+
+NO_CHILD = -1  # word column marker: the sentence child is itself the token
+
+# Per-token columns, spliced together by replace_paragraph
+_COLUMNS = ("paragraph", "sentence", "child", "word", "start", "end",
+            "sentence_start", "sentence_end", "sentence_token")
+
+
+def _locate(text: str, needle: str, cursor: int) -> Range:
+    """Find needle in text from cursor; falls back to its first word (spaCy phrases
+    join tokens with spaces, which need not be a slice of the paragraph)."""
+    start = text.find(needle, cursor)
+    if start < 0:
+        first = needle.split(" ", 1)[0]
+        start = text.find(first, cursor)
+        if start < 0:
+            return cursor, cursor
+    return start, min(len(text), start + len(needle))
+
+
+class TokenTable:
+    """Leaf tokens of a text tree in reading order, as parallel arrays."""
+
+    def __init__(self):
+        self.paragraph = array("i")
+        self.sentence = array("i")  # index of the sentence in its paragraph
+        self.child = array("i")     # index of the phrase (or punctuation) in the sentence
+        self.word = array("i")      # index of the word in the phrase, or NO_CHILD
+        self.start = array("i")     # character offsets in the paragraph
+        self.end = array("i")
+        self.sentence_start = array("i")  # offsets of the token's sentence
+        self.sentence_end = array("i")
+        self.sentence_token = array("i")  # index of the token among its sentence's tokens
+        self.paragraph_first = array("i", [0])  # first token of each paragraph, plus a sentinel
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraph_first) - 1
+
+    @classmethod
+    def build(cls, root) -> 'TokenTable':
+        """Flatten the tree under root (a TextUnit or TextUnitView BOOK node)."""
+        table = cls()
+        for p, paragraph in enumerate(root.children):
+            table.add_paragraph(p, paragraph)
+        return table
+
+    def add_paragraph(self, p: int, paragraph):
+        """Append the tokens of paragraph p (paragraphs must be added in order)."""
+        text = paragraph.text
+        cursor = 0
+        for s, sentence in enumerate(paragraph.children):
+            sentence_range = self._offsets(sentence, text, cursor)
+            cursor = sentence_range[0]
+            first = len(self.start)
+            for c, child in enumerate(sentence.children):
+                words = child.children
+                if not words:
+                    cursor = self._add(p, s, c, NO_CHILD, self._offsets(child, text, cursor))
+                for w, word in enumerate(words):
+                    cursor = self._add(p, s, c, w, self._offsets(word, text, cursor))
+            count = len(self.start) - first
+            self.sentence_start.extend([sentence_range[0]] * count)
+            self.sentence_end.extend([sentence_range[1]] * count)
+            self.sentence_token.extend(range(count))
+            cursor = max(cursor, sentence_range[1])
+        self.paragraph_first.append(len(self.start))
+
+    @staticmethod
+    def _offsets(node, text: str, cursor: int) -> Range:
+        offsets = getattr(node, "offsets", None)  # TreeStore views know their offsets
+        return offsets if offsets is not None else _locate(text, node.text, cursor)
+
+    def _add(self, p: int, s: int, c: int, w: int, offsets: Range) -> int:
+        self.paragraph.append(p)
+        self.sentence.append(s)
+        self.child.append(c)
+        self.word.append(w)
+        self.start.append(offsets[0])
+        self.end.append(offsets[1])
+        return offsets[1]
+
+    def replace_paragraph(self, p: int, paragraph) -> int:
+        """Re-flatten paragraph p from a new subtree; returns the change in token count."""
+        return self.splice_paragraphs(p, 1, [paragraph])
+
+    def splice_paragraphs(self, p: int, count: int, paragraphs) -> int:
+        """Replace paragraphs p to p + count - 1 with the tokens of new subtrees.
+
+        Any number of paragraphs may go in; later paragraphs are renumbered.
+        Returns the change in token count.
+        """
+        part = TokenTable()
+        for k, paragraph in enumerate(paragraphs):
+            part.add_paragraph(p + k, paragraph)
+        lo, hi = self.paragraph_first[p], self.paragraph_first[p + count]
+        for name in _COLUMNS:
+            getattr(self, name)[lo:hi] = getattr(part, name)
+        delta = len(part) - (hi - lo)
+        shift = part.paragraph_count - count
+        if shift:
+            rest = self.paragraph
+            start = lo + len(part)
+            rest[start:] = array("i", map(shift.__add__, rest[start:]))
+        first = self.paragraph_first
+        first[p:] = (array("i", map(lo.__add__, part.paragraph_first))
+                     + array("i", map(delta.__add__, first[p + count + 1:])))
+        return delta
+
+    def paragraph_tokens(self, p: int) -> range:
+        """Token indices of paragraph p."""
+        return range(self.paragraph_first[p], self.paragraph_first[p + 1])
+
+    def token_at(self, p: int, offset: int) -> Optional[int]:
+        """Token of paragraph p containing (or last starting before) a character offset."""
+        lo, hi = self.paragraph_first[p], self.paragraph_first[p + 1]
+        if lo == hi:
+            return None
+        return max(lo, bisect_right(self.start, offset, lo, hi) - 1)
+
+    def token_range(self, t: int) -> Range:
+        return self.start[t], self.end[t]
+
+    def sentence_range(self, t: int) -> Range:
+        return self.sentence_start[t], self.sentence_end[t]
+
+
+class TokenCursor:
+    """Reading position over a TokenTable; wraps around at either end."""
+
+    def __init__(self, table: TokenTable):
+        self.table = table
+        self.position = 0
+
+    def __bool__(self) -> bool:
+        return len(self.table) > 0
+
+    def next(self):
+        if self:
+            self.position = (self.position + 1) % len(self.table)
+
+    def prev(self):
+        if self:
+            self.position = (self.position - 1) % len(self.table)
+
+    def seek(self, t: int):
+        """Move to token t (clamped to the table)."""
+        self.position = min(max(0, t), max(0, len(self.table) - 1))
+
+    def seek_paragraph(self, p: int):
+        """Move to the first token of paragraph p, or of the next paragraph with tokens."""
+        table = self.table
+        p = min(max(0, p), table.paragraph_count)
+        self.seek(table.paragraph_first[p])
+
+    def seek_percent(self, percent: float):
+        """Move to the token percent (0-100) of the way through the book."""
+        self.seek(int(len(self.table) * percent / 100))
+
+    def seek_offset(self, p: int, offset: int):
+        """Move to the token at a character offset in paragraph p."""
+        t = self.table.token_at(p, offset)
+        if t is None:
+            self.seek_paragraph(p)
+        else:
+            self.seek(t)
+
+    @property
+    def percent(self) -> float:
+        if not self:
+            return 0.0
+        return 100.0 * self.position / len(self.table)
+
+    @property
+    def paragraph(self) -> int:
+        return self.table.paragraph[self.position] if self else 0
+
+    @property
+    def sentence(self) -> int:
+        return self.table.sentence[self.position] if self else 0
+
+    @property
+    def word(self) -> int:
+        """Index of the token among the tokens of its sentence."""
+        return self.table.sentence_token[self.position] if self else 0
+
+    def replace_paragraph(self, p: int, paragraph):
+        """Swap in a new subtree for paragraph p, keeping the reading position.
+
+        Inside p the cursor moves to the token at the same character offset;
+        past p it shifts by the change in token count.
+        """
+        table = self.table
+        t = self.position
+        offset = table.start[t] if self and table.paragraph[t] == p else None
+        after = bool(self) and t >= table.paragraph_first[p + 1]
+        delta = table.replace_paragraph(p, paragraph)
+        if offset is not None:
+            self.seek_offset(p, offset)
+        elif after:
+            self.seek(t + delta)
+
+    def node(self, root):
+        """The token's unit in the tree under root."""
+        table, t = self.table, self.position
+        child = root.children[table.paragraph[t]].children[table.sentence[t]].children[table.child[t]]
+        if table.word[t] == NO_CHILD:
+            return child
+        return child.children[table.word[t]]
+
+    def highlight(self) -> Tuple[Optional[Range], Optional[Range]]:
+        """Character ranges of the current sentence and token in their paragraph."""
+        if not self:
+            return None, None
+        return self.table.sentence_range(self.position), self.table.token_range(self.position)
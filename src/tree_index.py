@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Inverted index and selector queries over a text tree
+
+TreeIndex is built in one pass over a BOOK tree (TextUnit or TreeStore views)
+and keeps:
+
+    nodes       every node below the root, in document order
+    tokens      the leaves in document order (the same numbering as the
+                reading cursor's token table)
+    by_type     node type -> node numbers
+    by_lemma,   lowercased lemma / surface form -> token numbers
+    by_form
+    first_token, end_token
+                the token range of every node, so "tokens" (the number of
+                tokens under a node) is a subtraction
+
+plus, built on first use, each (type, numeric attribute) pair sorted by value
+for range predicates.
+
+Selectors are path-like: steps separated by ">" (child) or white space
+(descendant), each a node type or "*" with optional [attribute op value]
+predicates, op one of = != < <= > >=:
+
+    SENTENCE > VP > V[lemma=être]
+    SENTENCE[tokens>40]
+    PARAGRAPH NP[text="la maison"]
+
+Attributes are "text", "tokens", "index" and any metadata key (pos, lemma,
+tag, position, length, ...); text and lemma compare case-insensitively.
+Candidates for the last step come from the narrowest index (a lemma or form
+equality, then a numeric range, then the type), and only those are checked
+against the other predicates and ancestors, so a query costs time in
+proportion to its candidates rather than to the tree.
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ANY = "*"
+CHILD, DESCENDANT = ">", " "
+
+# Numeric attributes that range predicates can answer from a sorted index
+RANGE_ATTRIBUTES = ("tokens", "length", "position")
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+_SELECTOR_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<child>>)
+  | (?P<type>[A-Za-z_][\w-]*|\*)
+  | \[\s*(?P<attr>[\w-]+)\s*(?P<op>!=|<=|>=|=|<|>)\s*
+       (?:"(?P<quoted>(?:[^"\\]|\\.)*)"|(?P<bare>[^\]\s]+))\s*\]
+''', re.VERBOSE)
+_NUMBER_RE = re.compile(r'[-+]?\d+(\.\d*)?$')
+
+
+class SelectorError(ValueError):
+    """Raised for a selector that cannot be parsed."""
+
+
+class Step:
+    """One step of a selector: a type (or ANY), predicates, and how it joins the previous step."""
+    __slots__ = ("unit_type", "predicates", "combinator")
+
+    def __init__(self, unit_type: str, predicates: List[Tuple[str, str, Any]], combinator: str):
+        self.unit_type = unit_type
+        self.predicates = predicates
+        self.combinator = combinator
+
+    def __repr__(self) -> str:
+        predicates = "".join(f"[{a}{op}{v!r}]" for a, op, v in self.predicates)
+        return f"Step({self.combinator!r}{self.unit_type}{predicates})"
+
+
+def parse_selector(text: str) -> List[Step]:
+    """Parse a selector into steps, outermost first."""
+    steps: List[Step] = []
+    combinator = None  # before the first step
+    pos = 0
+    while pos < len(text):
+        match = _SELECTOR_RE.match(text, pos)
+        if match is None:
+            raise SelectorError(f"unexpected {text[pos:pos + 10]!r} at {pos} in {text!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == "ws":
+            if steps and combinator is None:
+                combinator = DESCENDANT
+        elif kind == "child":
+            if not steps or combinator == CHILD:
+                raise SelectorError(f"'>' without a step on both sides in {text!r}")
+            combinator = CHILD
+        elif kind == "type":
+            if steps and combinator is None:
+                raise SelectorError(f"missing combinator before {match.group('type')!r}")
+            steps.append(Step(match.group("type"), [], combinator or DESCENDANT))
+            combinator = None
+        else:
+            if not steps or combinator is not None:
+                raise SelectorError(f"predicate without a node type at {match.start()} in {text!r}")
+            quoted = match.group("quoted")
+            if quoted is not None:
+                value: Any = re.sub(r'\\(.)', r'\1', quoted)
+            else:
+                value = match.group("bare")
+                if _NUMBER_RE.match(value):
+                    value = float(value) if "." in value else int(value)
+            steps[-1].predicates.append((match.group("attr"), match.group("op"), value))
+    if not steps:
+        raise SelectorError("empty selector")
+    if combinator == CHILD:
+        raise SelectorError(f"selector ends with '>': {text!r}")
+    return steps
+
+
+class TreeIndex:
+    """Type, lemma, form and range indexes over a parsed BOOK tree."""
+
+    def __init__(self):
+        self.nodes: List = []
+        self.tokens: List = []
+        self.by_type: Dict[str, array] = {}
+        self.by_lemma: Dict[str, array] = {}
+        self.by_form: Dict[str, array] = {}
+        self.first_token = array("i")  # per node: its first token
+        self.end_token = array("i")    # per node: one past its last token
+        self.token_node = array("i")   # per token: its node number
+        self.inner_types = set()       # types of nodes that have children
+        self._sorted: Dict[Tuple[str, str], Tuple[list, list]] = {}
+
+    @classmethod
+    def build(cls, root) -> 'TreeIndex':
+        index = cls()
+        for paragraph in root.children:
+            index.add_paragraph(paragraph)
+        return index
+
+    def add_paragraph(self, paragraph):
+        """Index one paragraph subtree after the ones already indexed."""
+        nodes, tokens = self.nodes, self.tokens
+        first_token, end_token, token_node = self.first_token, self.end_token, self.token_node
+        by_type, by_lemma, by_form = self.by_type, self.by_lemma, self.by_form
+        stack = [(paragraph, False)]
+        open_nodes: List[int] = []
+        while stack:
+            node, done = stack.pop()
+            if done:
+                end_token[open_nodes.pop()] = len(tokens)
+                continue
+            number = len(nodes)
+            nodes.append(node)
+            first_token.append(len(tokens))
+            end_token.append(0)
+            positions = by_type.get(node.unit_type)
+            if positions is None:
+                positions = by_type[node.unit_type] = array("i")
+            positions.append(number)
+            children = node.children
+            if not children:
+                token = len(tokens)
+                tokens.append(node)
+                token_node.append(number)
+                end_token[number] = token + 1
+                form = node.text.lower()
+                _append(by_form, form, token)
+                lemma = node.metadata.get("lemma")
+                if lemma:
+                    _append(by_lemma, str(lemma).lower(), token)
+                continue
+            self.inner_types.add(node.unit_type)
+            open_nodes.append(number)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+        self._sorted.clear()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    # Attribute access ------------------------------------------------------
+
+    def value(self, node, attribute: str, number: Optional[int] = None) -> Any:
+        """Attribute of node for predicates; number (its node number) makes "tokens" O(1)."""
+        if attribute == "text":
+            return node.text
+        if attribute == "tokens":
+            if number is not None:
+                return self.end_token[number] - self.first_token[number]
+            return sum(1 for leaf in node.walk() if not leaf.children)
+        if attribute == "index":
+            return node.index
+        metadata = node.metadata
+        if attribute in metadata:
+            return metadata[attribute]
+        if attribute == "length":
+            return len(node.text)
+        if attribute == "position":
+            return node.index
+        return None
+
+    def _matches(self, node, predicates, number: Optional[int] = None) -> bool:
+        for attribute, op, expected in predicates:
+            actual = self.value(node, attribute, number)
+            if actual is None:
+                return False
+            if attribute in ("lemma", "text") and isinstance(actual, str):
+                actual = actual.lower()
+                expected = str(expected).lower()
+            try:
+                if not _OPERATORS[op](actual, expected):
+                    return False
+            except TypeError:  # e.g. a number compared with a string
+                return False
+        return True
+
+    # Candidate selection -----------------------------------------------------
+
+    def _sorted_index(self, unit_type: str, attribute: str) -> Tuple[list, list]:
+        """(values, node numbers) of unit_type sorted by a numeric attribute."""
+        key = (unit_type, attribute)
+        cached = self._sorted.get(key)
+        if cached is None:
+            numbers = self._type_numbers(unit_type)
+            pairs = []
+            for number in numbers:
+                value = self.value(self.nodes[number], attribute, number)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    pairs.append((value, number))
+            pairs.sort()
+            cached = self._sorted[key] = ([v for v, _ in pairs], [n for _, n in pairs])
+        return cached
+
+    def _type_numbers(self, unit_type: str):
+        if unit_type == ANY:
+            return range(len(self.nodes))
+        return self.by_type.get(unit_type, ())
+
+    def _candidates(self, step: Step) -> Tuple[List[int], list]:
+        """Node numbers for a step from its narrowest index, and the predicates left to check."""
+        predicates = list(step.predicates)
+        # Lemmas are only on tokens; forms answer text= for types that are always tokens
+        leaf_type = step.unit_type != ANY and step.unit_type not in self.inner_types
+        for i, (attribute, op, value) in enumerate(predicates):
+            if op == "=" and (attribute == "lemma" or (attribute == "text" and leaf_type)):
+                table = self.by_lemma if attribute == "lemma" else self.by_form
+                tokens = table.get(str(value).lower(), ())
+                token_node = self.token_node
+                numbers = [token_node[t] for t in tokens]
+                if step.unit_type != ANY:
+                    numbers = [n for n in numbers if self.nodes[n].unit_type == step.unit_type]
+                del predicates[i]
+                return numbers, predicates
+        ranges = [(i, p) for i, p in enumerate(predicates)
+                  if p[0] in RANGE_ATTRIBUTES and p[1] != "!=" and isinstance(p[2], (int, float))]
+        if ranges:
+            i, (attribute, op, value) = ranges[0]
+            values, numbers = self._sorted_index(step.unit_type, attribute)
+            lo, hi = 0, len(values)
+            if op == "=":
+                lo, hi = bisect_left(values, value), bisect_right(values, value)
+            elif op == ">":
+                lo = bisect_right(values, value)
+            elif op == ">=":
+                lo = bisect_left(values, value)
+            elif op == "<":
+                hi = bisect_left(values, value)
+            else:  # <=
+                hi = bisect_right(values, value)
+            del predicates[i]
+            return sorted(numbers[lo:hi]), predicates
+        return self._type_numbers(step.unit_type), predicates
+
+    # Queries ---------------------------------------------------------------
+
+    def iter_numbers(self, selector) -> Iterator[int]:
+        """Yield the node numbers matching a selector (string or parsed steps) in order."""
+        steps = parse_selector(selector) if isinstance(selector, str) else selector
+        numbers, predicates = self._candidates(steps[-1])
+        nodes = self.nodes
+        outer = len(steps) - 1
+        for number in numbers:
+            node = nodes[number]
+            if predicates and not self._matches(node, predicates, number):
+                continue
+            if not outer or self._ancestors_match(node, steps, outer):
+                yield number
+
+    def select(self, selector) -> List:
+        """All nodes matching a selector, in document order."""
+        nodes = self.nodes
+        return [nodes[number] for number in self.iter_numbers(selector)]
+
+    def count(self, selector) -> int:
+        return sum(1 for _ in self.iter_numbers(selector))
+
+    def token_positions(self, selector) -> List[int]:
+        """First token number of every match (usable with TokenCursor.seek)."""
+        first_token = self.first_token
+        return [first_token[number] for number in self.iter_numbers(selector)]
+
+    def _ancestors_match(self, node, steps: List[Step], i: int) -> bool:
+        """Whether the ancestors of node (which matched steps[i]) match steps[:i]."""
+        if i == 0:
+            return True
+        step, outer = steps[i], steps[i - 1]
+        parent = node.parent
+        if step.combinator == CHILD:
+            return (parent is not None and _step_matches(self, parent, outer)
+                    and self._ancestors_match(parent, steps, i - 1))
+        while parent is not None:
+            if _step_matches(self, parent, outer) and self._ancestors_match(parent, steps, i - 1):
+                return True
+            parent = parent.parent
+        return False
+
+
+def _step_matches(index: TreeIndex, node, step: Step) -> bool:
+    if step.unit_type != ANY and node.unit_type != step.unit_type:
+        return False
+    return not step.predicates or index._matches(node, step.predicates)
+
+
+def _append(table: Dict[str, array], key: str, value: int):
+    values = table.get(key)
+    if values is None:
+        values = table[key] = array("i")
+    values.append(value)
+
+
+def load_tree(path: str, use_spacy: bool = True, start_line: int = 0):
+    """A BOOK tree from a .bast or .lisp AST file, or parsed from a text file."""
+    try:
+        from .binary_ast import BinaryAST
+        from .sexpr_parser import parse_file
+    except ImportError:  # run as a script
+        from binary_ast import BinaryAST
+        from sexpr_parser import parse_file
+    if path.endswith(".bast"):
+        with BinaryAST(path) as ast:
+            return ast.to_text_tree()
+    if path.endswith((".lisp", ".sexp", ".scm")):
+        return parse_file(path)
+    try:
+        from .proust_reader import ProustReader
+    except ImportError:
+        from proust_reader import ProustReader
+    return ProustReader(path, start_line=start_line, use_spacy=use_spacy, cache=None).text_tree
+
+
+def main():
+    """Run selector queries against an AST file or a text."""
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(description="Selector queries over a text tree")
+    parser.add_argument("input", help="AST file (.lisp or .bast) or a text to parse")
+    parser.add_argument("selectors", nargs="*", help="Selectors, e.g. 'SENTENCE > VP > V[lemma=être]'")
+    parser.add_argument("-f", "--file", help="Read more selectors from a file, one per line")
+    parser.add_argument("--count", action="store_true", help="Print only the number of matches")
+    parser.add_argument("--json", action="store_true", help="One JSON object per match")
+    parser.add_argument("--limit", type=int, help="Print at most this many matches per selector")
+    parser.add_argument("--no-spacy", action="store_true", help="Parse text input with regexes")
+    parser.add_argument("--start-line", type=int, default=0, help="Lines to skip in text input")
+    args = parser.parse_intermixed_args()
+
+    selectors = list(args.selectors)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            selectors.extend(line.strip() for line in f
+                             if line.strip() and not line.lstrip().startswith("#"))
+    if not selectors:
+        parser.error("no selectors given")
+    try:
+        steps = [parse_selector(selector) for selector in selectors]
+    except SelectorError as e:
+        parser.error(str(e))
+
+    root = load_tree(args.input, use_spacy=not args.no_spacy, start_line=args.start_line)
+    start = time.perf_counter()
+    index = TreeIndex.build(root)
+    print(f"Indexed {len(index)} nodes, {len(index.tokens)} tokens "
+          f"in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+    for selector, parsed in zip(selectors, steps):
+        start = time.perf_counter()
+        matches = index.select(parsed)
+        elapsed = time.perf_counter() - start
+        if args.count:
+            print(f"{len(matches)}\t{selector}")
+            continue
+        print(f"# {selector}: {len(matches)} matches in {elapsed * 1000:.2f} ms", file=sys.stderr)
+        for node in matches[:args.limit]:
+            if args.json:
+                print(json.dumps({"selector": selector, "id": node.id, "type": node.unit_type,
+                                  "text": node.text}, ensure_ascii=False))
+            else:
+                print(f"{node.id}\t{node.unit_type}\t{node.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+TreeStore - compact struct-of-arrays backend for whole-book text trees
+
+Every node is one row across a set of typed `array` columns (parent, first
+child, next sibling, sibling index, type code, interned text, character offsets
+and the common metadata fields). Strings are interned in a single table, and
+sentence/paragraph texts that are plain slices of their paragraph are not stored
+at all. TextUnitView is a two-slot view over one row that exposes the same
+read-only interface as TextUnit, so ProustReader, to_s_expr and the curses loop
+work unchanged on either backend.
+
+Measured with tracemalloc on a synthetic 80k-token French-like corpus (regex
+parse, raw paragraph text excluded): the TextUnit tree costs about 420 bytes per
+token (more with spaCy metadata dicts and spans), the TreeStore about 70 bytes,
+of which 62 are the columns.
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .text_unit import TextUnit
+except ImportError:  # run as a script from src/
+    from text_unit import TextUnit
+
+NO_ROW = -1
+SLICE_TEXT = -1  # text column marker: text is a slice of the enclosing paragraph
+
+# Metadata keys that live in their own columns; anything else goes to overflow
+_INT_KEYS = ("position", "length")
+_STR_KEYS = ("pos", "lemma", "tag")
+
+
+class TreeStore:
+    """Struct-of-arrays storage for a tree of TextUnits rooted at a single BOOK row."""
+
+    def __init__(self, root_text: str = "", root_type: str = "BOOK"):
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.sibling_index = array("i")
+        self.type_code = array("H")
+        self.text_id = array("i")
+        self.start = array("i")
+        self.end = array("i")
+        self.meta_schema = array("H")
+        self.position = array("i")
+        self.length = array("i")
+        self.pos_id = array("i")
+        self.lemma_id = array("i")
+        self.tag_id = array("i")
+        self.top_rows = array("i")  # rows of the root's children, for O(1) paragraph access
+
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self.schemas: List[Tuple[str, ...]] = []
+        self._schema_codes: Dict[Tuple[str, ...], int] = {}
+        self.overflow: Dict[int, Dict[str, Any]] = {}  # row -> metadata not in columns
+        self.node_ids: Dict[int, str] = {}  # row -> explicit :id
+        self._id_index: Optional[Dict[str, int]] = None
+
+        self._append_row(NO_ROW, 0, root_type, self.intern(root_text), 0, len(root_text), {})
+        self.root = TextUnitView(self, 0)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def intern(self, text: str) -> int:
+        """Return the string-table id for text, adding it if needed."""
+        sid = self._string_ids.get(text)
+        if sid is None:
+            sid = len(self.strings)
+            self.strings.append(text)
+            self._string_ids[text] = sid
+        return sid
+
+    def _code(self, table: List, codes: Dict, value) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = len(table)
+            table.append(value)
+            codes[value] = code
+        return code
+
+    def _append_row(self, parent: int, index: int, unit_type: str, text_id: int,
+                    start: int, end: int, metadata: Dict[str, Any]) -> int:
+        row = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(NO_ROW)
+        self.next_sibling.append(NO_ROW)
+        self.sibling_index.append(index)
+        self.type_code.append(self._code(self.types, self._type_codes, unit_type))
+        self.text_id.append(text_id)
+        self.start.append(start)
+        self.end.append(end)
+
+        extra = {}
+        ints = {}
+        strs = {}
+        for key, value in metadata.items():
+            if key in _INT_KEYS and type(value) is int:
+                ints[key] = value
+            elif key in _STR_KEYS and type(value) is str:
+                strs[key] = value
+            else:
+                extra[key] = value
+        self.meta_schema.append(self._code(self.schemas, self._schema_codes, tuple(metadata)))
+        self.position.append(ints.get("position", 0))
+        self.length.append(ints.get("length", 0))
+        self.pos_id.append(self.intern(strs["pos"]) if "pos" in strs else NO_ROW)
+        self.lemma_id.append(self.intern(strs["lemma"]) if "lemma" in strs else NO_ROW)
+        self.tag_id.append(self.intern(strs["tag"]) if "tag" in strs else NO_ROW)
+        if extra:
+            self.overflow[row] = extra
+        return row
+
+    def append(self, unit: TextUnit) -> int:
+        """Copy a TextUnit subtree in as the root's last child (a paragraph); returns its row."""
+        top_row = self._copy(unit, len(self.top_rows))
+        if self.top_rows:
+            self.next_sibling[self.top_rows[-1]] = top_row
+        else:
+            self.first_child[0] = top_row
+        self.top_rows.append(top_row)
+        self._id_index = None
+        return top_row
+
+    def splice(self, p: int, count: int, units) -> List[int]:
+        """Replace the root's children p to p + count - 1 with copies of units.
+
+        Later children are renumbered. The replaced rows stay in the columns,
+        unreachable from the root, until the store is rebuilt. Returns the new
+        children's rows.
+        """
+        top = self.top_rows
+        rows = [self._copy(unit, p + k) for k, unit in enumerate(units)]
+        top[p:p + count] = array("i", rows)
+        for i in range(max(0, p - 1), len(top)):
+            row = top[i]
+            self.sibling_index[row] = i
+            self.next_sibling[row] = top[i + 1] if i + 1 < len(top) else NO_ROW
+        self.first_child[0] = top[0] if top else NO_ROW
+        self._id_index = None
+        return rows
+
+    def _copy(self, unit: TextUnit, index: int) -> int:
+        """Copy a subtree in under the root at sibling index (not linked to its siblings)."""
+        last_child: Dict[int, int] = {}
+        top_row = len(self)
+
+        # (unit, parent row, sibling index, enclosing paragraph text)
+        stack = [(unit, 0, index, None)]
+        cursors: Dict[int, int] = {}
+        while stack:
+            node, parent, idx, para = stack.pop()
+            start, end = self._offsets(node, para, parent, cursors)
+            if para is None:
+                para = node.text
+                text_id = self.intern(node.text)
+            elif node.children and start >= 0 and para[start:end] == node.text:
+                text_id = SLICE_TEXT
+            else:
+                text_id = self.intern(node.text)
+            row = self._append_row(parent, idx, node.unit_type, text_id, start, end, node.metadata)
+            if node.node_id is not None:
+                self.node_ids[row] = node.node_id
+
+            if row != top_row:
+                prev = last_child.get(parent)
+                if prev is None:
+                    self.first_child[parent] = row
+                else:
+                    self.next_sibling[prev] = row
+                last_child[parent] = row
+
+            for i in range(len(node.children) - 1, -1, -1):
+                stack.append((node.children[i], row, i, para))
+        return top_row
+
+    def _offsets(self, node: TextUnit, para: Optional[str], parent: int,
+                 cursors: Dict[int, int]) -> Tuple[int, int]:
+        """Character offsets of node within its paragraph (-1 when not found)."""
+        if para is None:
+            return 0, len(node.text)
+        offsets = getattr(node, "offsets", None)
+        if offsets is not None:
+            return offsets
+        span = node.span
+        if span is not None:
+            # spaCy Span/Token offsets are relative to the paragraph Doc
+            start = getattr(span, "start_char", None)
+            if start is None:
+                start = getattr(span, "idx", None)
+            if start is not None:
+                return start, start + len(span.text)
+        # Search forward from the previous sibling (or the parent's start)
+        cursor = cursors.get(parent)
+        if cursor is None:
+            cursor = max(self.start[parent], 0) if parent != 0 else 0
+        start = para.find(node.text, cursor)
+        if start < 0:
+            return -1, -1
+        end = start + len(node.text)
+        cursors[parent] = end
+        return start, end
+
+    def text(self, row: int) -> str:
+        tid = self.text_id[row]
+        if tid != SLICE_TEXT:
+            return self.strings[tid]
+        # Offsets are relative to the paragraph, the root's child
+        para = self.parent[row]
+        while self.parent[para] != 0:
+            para = self.parent[para]
+        return self.strings[self.text_id[para]][self.start[row]:self.end[row]]
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        schema = self.schemas[self.meta_schema[row]]
+        if not schema:
+            return {}
+        extra = self.overflow.get(row, {})
+        values = {}
+        for key in schema:
+            if key in extra:
+                values[key] = extra[key]
+            elif key == "position":
+                values[key] = self.position[row]
+            elif key == "length":
+                values[key] = self.length[row]
+            elif key == "pos":
+                values[key] = self.strings[self.pos_id[row]]
+            elif key == "lemma":
+                values[key] = self.strings[self.lemma_id[row]]
+            else:
+                values[key] = self.strings[self.tag_id[row]]
+        return values
+
+    def children_rows(self, row: int) -> List[int]:
+        if row == 0:
+            return list(self.top_rows)
+        rows = []
+        child = self.first_child[row]
+        while child != NO_ROW:
+            rows.append(child)
+            child = self.next_sibling[child]
+        return rows
+
+    def node_id(self, row: int) -> str:
+        explicit = self.node_ids.get(row)
+        if explicit is not None:
+            return explicit
+        unit_type = self.types[self.type_code[row]]
+        parent = self.parent[row]
+        if parent == NO_ROW:
+            return unit_type.lower()
+        return f"{self.node_id(parent)}-{unit_type[0].lower()}{self.sibling_index[row]}"
+
+    def find(self, node_id: str) -> Optional['TextUnitView']:
+        """Look up a node by id; the index is built on first use."""
+        if self._id_index is None:
+            self._id_index = {self.node_id(row): row for row in self._reachable_rows()}
+        row = self._id_index.get(node_id)
+        return None if row is None else TextUnitView(self, row)
+
+    def _reachable_rows(self) -> Iterator[int]:
+        """Rows under the root, skipping any left behind by splice."""
+        stack = [0]
+        while stack:
+            row = stack.pop()
+            yield row
+            stack.extend(self.children_rows(row))
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns (excluding the string table)."""
+        columns = (self.parent, self.first_child, self.next_sibling, self.sibling_index,
+                   self.type_code, self.text_id, self.start, self.end, self.meta_schema,
+                   self.position, self.length, self.pos_id, self.lemma_id, self.tag_id)
+        return sum(col.itemsize * len(col) for col in columns)
+
+
+class _ChildList(Sequence):
+    """Read-only children sequence of a TextUnitView."""
+    __slots__ = ("store", "rows")
+
+    def __init__(self, store: TreeStore, rows):
+        self.store = store
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [TextUnitView(self.store, row) for row in self.rows[i]]
+        return TextUnitView(self.store, self.rows[i])
+
+
+class TextUnitView:
+    """Read-only TextUnit interface over one TreeStore row."""
+    __slots__ = ("store", "row")
+
+    span = None
+    node_id = None
+
+    def __init__(self, store: TreeStore, row: int):
+        self.store = store
+        self.row = row
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, TextUnitView) and other.store is self.store
+                and other.row == self.row)
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.row))
+
+    def __repr__(self) -> str:
+        return f"TextUnitView({self.unit_type}, {self.id!r})"
+
+    @property
+    def text(self) -> str:
+        return self.store.text(self.row)
+
+    @property
+    def unit_type(self) -> str:
+        return self.store.types[self.store.type_code[self.row]]
+
+    @property
+    def parent(self) -> Optional['TextUnitView']:
+        parent = self.store.parent[self.row]
+        return None if parent == NO_ROW else TextUnitView(self.store, parent)
+
+    @property
+    def children(self) -> _ChildList:
+        if self.row == 0:
+            return _ChildList(self.store, self.store.top_rows)
+        return _ChildList(self.store, self.store.children_rows(self.row))
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.store.metadata(self.row)
+
+    @property
+    def index(self) -> int:
+        return self.store.sibling_index[self.row]
+
+    @property
+    def id(self) -> str:
+        return self.store.node_id(self.row)
+
+    @property
+    def offsets(self) -> Tuple[int, int]:
+        """Start and end character offsets within the paragraph."""
+        return self.store.start[self.row], self.store.end[self.row]
+
+    def find(self, node_id: str) -> Optional['TextUnitView']:
+        """Look up a node in this subtree by id (through the store's index)."""
+        found = self.store.find(node_id)
+        if found is None or self.row == 0:
+            return found
+        parent = self.store.parent
+        row = found.row
+        while row != NO_ROW and row != self.row:
+            row = parent[row]
+        return found if row == self.row else None
+
+    def walk(self) -> Iterator['TextUnitView']:
+        return TextUnit.walk(self)
+
+    def to_s_expr(self, indent=0) -> str:
+        return TextUnit.to_s_expr(self, indent)
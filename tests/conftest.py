@@ -0,0 +1,7 @@
+"""Make the src/ modules importable the way the scripts and benchmarks import them."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
@@ -0,0 +1,133 @@
+"""
+Reference implementations of code that has since been optimized
+
+The tests check the current code against these, and the benchmarks time the
+current code against them; they are kept as they were, including behaviour
+that was changed on purpose ("le"/"la" as PRON in the regex parser). The spaCy
+references take parsed Docs, so nothing here imports spaCy.
+"""
+
+import re
+
+from spacy_tree import PUNCT_CHUNK
+from text_unit import TextUnit
+
+
+def legacy_paragraph(i, paragraph_text):
+    """The regex parser as it was before regex_tokenizer."""
+    paragraph = TextUnit(paragraph_text, "PARAGRAPH")
+    paragraph.metadata = {"position": i, "length": len(paragraph_text)}
+    sentences = re.split(r'(?<=[.!?])\s+', paragraph_text)
+    for j, sentence_text in enumerate(sentences):
+        if not sentence_text.strip():
+            continue
+        sentence = TextUnit(sentence_text, "SENTENCE", paragraph)
+        sentence.metadata = {"position": j, "length": len(sentence_text)}
+        paragraph.add_child(sentence)
+        phrases = re.split(r'(,\s*)', sentence_text)
+        current_phrase_text = ""
+        for k, phrase_part in enumerate(phrases):
+            if re.match(r',\s*', phrase_part):
+                if current_phrase_text:
+                    phrase = TextUnit(current_phrase_text, "PHRASE", sentence)
+                    phrase.metadata = {"position": k // 2, "length": len(current_phrase_text)}
+                    sentence.add_child(phrase)
+                    legacy_words(phrase, current_phrase_text)
+                    current_phrase_text = ""
+                sentence.add_child(TextUnit(phrase_part.strip(), "PUNCT", sentence))
+            else:
+                current_phrase_text += phrase_part
+        if current_phrase_text:
+            phrase = TextUnit(current_phrase_text, "PHRASE", sentence)
+            phrase.metadata = {"position": len(phrases) // 2, "length": len(current_phrase_text)}
+            sentence.add_child(phrase)
+            legacy_words(phrase, current_phrase_text)
+    return paragraph
+
+
+def legacy_words(unit, text):
+    for token in re.findall(r'\b\w+\b|[.,;:!?]', text):
+        if re.match(r'[.,;:!?]', token):
+            token_type = "PUNCT"
+        elif token.lower() in ["je", "tu", "il", "elle", "nous", "vous", "ils", "elles", "me", "te", "se", "le", "la"]:
+            token_type = "PRON"
+        elif token.lower() in ["et", "ou", "mais", "donc", "car", "ni"]:
+            token_type = "CONJ"
+        elif token.lower() in ["le", "la", "les", "un", "une", "des", "ma", "mon", "mes"]:
+            token_type = "DET"
+        elif token.lower() in ["à", "de", "en", "dans", "sur", "sous", "par", "pour", "avec", "sans"]:
+            token_type = "P"
+        elif token.lower() in ["que", "qui", "dont", "où", "quand", "comment", "pourquoi"]:
+            token_type = "SUB"
+        elif re.match(r'\d+', token):
+            token_type = "NUM"
+        else:
+            token_type = "WORD"
+        unit.add_child(TextUnit(token, token_type, unit))
+
+
+def legacy_chunk_sentence(sent):
+    """The chunker as it was before chunk_doc."""
+    chunks = []
+    phrases = list(sent.noun_chunks)  # noqa: F841 (computed and unused, as it was)
+    current_phrase_tokens = []
+    current_phrase_type = None
+    for token in sent:
+        if token.pos_ in ("NOUN", "PROPN") and current_phrase_type != "NP":
+            if current_phrase_tokens:
+                chunks.append((current_phrase_type, current_phrase_tokens))
+                current_phrase_tokens = []
+            current_phrase_type = "NP"
+        elif token.pos_ == "VERB" and current_phrase_type != "VP":
+            if current_phrase_tokens:
+                chunks.append((current_phrase_type, current_phrase_tokens))
+                current_phrase_tokens = []
+            current_phrase_type = "VP"
+        elif token.pos_ == "ADP" and current_phrase_type != "PP":
+            if current_phrase_tokens:
+                chunks.append((current_phrase_type, current_phrase_tokens))
+                current_phrase_tokens = []
+            current_phrase_type = "PP"
+        elif token.pos_ == "PUNCT" and token.text not in [",", "."]:
+            if current_phrase_tokens:
+                chunks.append((current_phrase_type, current_phrase_tokens))
+                current_phrase_tokens = []
+            chunks.append((PUNCT_CHUNK, [token]))
+            continue
+        current_phrase_tokens.append(token)
+    if current_phrase_tokens:
+        chunks.append((current_phrase_type, current_phrase_tokens))
+    return chunks
+
+
+def legacy_word_type(token):
+    """The word type ladder of the original _add_phrase."""
+    if token.pos_ == "PUNCT":
+        return "PUNCT"
+    elif token.pos_ == "NUM":
+        return "NUM"
+    elif token.pos_ in ("NOUN", "PROPN"):
+        return "N"
+    elif token.pos_ == "VERB":
+        return "V"
+    elif token.pos_ == "PRON":
+        return "PRON"
+    elif token.pos_ == "DET":
+        return "DET"
+    elif token.pos_ == "ADJ":
+        return "ADJ"
+    elif token.pos_ == "ADV":
+        return "ADV"
+    elif token.pos_ == "ADP":
+        return "P"
+    elif token.pos_ == "CCONJ":
+        return "CONJ"
+    elif token.pos_ == "SCONJ":
+        return "SUB"
+    return token.pos_
+
+
+def legacy_chunks(docs):
+    """legacy_chunk_sentence over every sentence, as chunk_doc's (type, start, end) spans."""
+    return [[[(kind, tokens[0].i, tokens[-1].i + 1) for kind, tokens in legacy_chunk_sentence(sent)]
+             for sent in doc.sents] for doc in docs]
@@ -0,0 +1,106 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from batch_ast import PARTIAL_SUFFIX, PROGRESS_SUFFIX, BatchAST
+from proust_reader import ProustReader, _write_ast
+
+PARAGRAPHS = [f"Paragraphe {i}. Longtemps, je me suis couché de bonne heure, {i} fois."
+              for i in range(40)]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_book(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "book.txt").write_text("\n\n".join(PARAGRAPHS) + "\n", encoding="utf-8")
+    return str(corpus / "book.txt")
+
+
+def batch(book, output_dir, fmt="sexpr", progress=None):
+    return BatchAST([(book, "book.txt")], output_dir, fmt=fmt, use_spacy=False, workers=2,
+                    chunk_size=3, progress=progress)
+
+
+def interrupt_after(output, chunks):
+    """Progress callback that stops the run like Ctrl+C once the journal records enough chunks."""
+    def progress(done, total, parsed, elapsed):
+        try:
+            with open(output + PROGRESS_SUFFIX, encoding="utf-8") as f:
+                journaled = json.load(f)["chunks"]
+        except OSError:
+            return
+        if journaled >= chunks:
+            raise Interrupted
+    return progress
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_output_matches_a_single_process_ast_run(tmp_path):
+    book = write_book(tmp_path)
+    batch(book, str(tmp_path / "out")).run()
+
+    reader = ProustReader(book, start_line=0, use_spacy=False, cache=None)
+    expected = str(tmp_path / "book.lisp")
+    _write_ast(reader, SimpleNamespace(paragraphs=len(PARAGRAPHS), format="sexpr",
+                                       output=expected, compact=False))
+    assert read(str(tmp_path / "out" / "book.lisp")) == read(expected)
+
+
+@pytest.mark.parametrize("fmt,extension", [("sexpr", "lisp"), ("binary", "bast")])
+def test_resume_after_a_crash_writes_the_same_bytes(tmp_path, fmt, extension):
+    book = write_book(tmp_path)
+    batch(book, str(tmp_path / "clean"), fmt).run()
+    expected = read(str(tmp_path / "clean" / f"book.{extension}"))
+
+    output = str(tmp_path / "out" / f"book.{extension}")
+    with pytest.raises(Interrupted):
+        batch(book, str(tmp_path / "out"), fmt, progress=interrupt_after(output, 4)).run()
+    assert not os.path.exists(output)
+    assert os.path.exists(output + PROGRESS_SUFFIX)
+    # A chunk half-written after the last journal entry, longer than the rest of the book
+    with open(output + PARTIAL_SUFFIX, "ab") as f:
+        f.write(b"\x00garbage (paragraph" * 10000)
+
+    resumed = batch(book, str(tmp_path / "out"), fmt)
+    resumed.run()
+    assert 0 < resumed.paragraphs < len(PARAGRAPHS)  # picked up where it stopped
+    assert read(output) == expected
+    assert not os.path.exists(output + PARTIAL_SUFFIX)
+    assert not os.path.exists(output + PROGRESS_SUFFIX)
+
+
+def test_truncated_journal_starts_the_book_over(tmp_path):
+    book = write_book(tmp_path)
+    batch(book, str(tmp_path / "clean")).run()
+    expected = read(str(tmp_path / "clean" / "book.lisp"))
+
+    output = str(tmp_path / "out" / "book.lisp")
+    with pytest.raises(Interrupted):
+        batch(book, str(tmp_path / "out"), progress=interrupt_after(output, 4)).run()
+    journal = read(output + PROGRESS_SUFFIX)
+    with open(output + PROGRESS_SUFFIX, "wb") as f:
+        f.write(journal[:len(journal) // 2])
+    with open(output + PARTIAL_SUFFIX, "ab") as f:
+        f.write(b"garbage")
+
+    resumed = batch(book, str(tmp_path / "out"))
+    resumed.run()
+    assert resumed.paragraphs == len(PARAGRAPHS)
+    assert read(output) == expected
+
+
+def test_finished_books_are_skipped(tmp_path):
+    book = write_book(tmp_path)
+    batch(book, str(tmp_path / "out")).run()
+    again = batch(book, str(tmp_path / "out"))
+    assert again.run() == 0
@@ -0,0 +1,66 @@
+import glob
+import io
+import os
+
+import pytest
+
+from binary_ast import (BinaryAST, BinaryASTError, binary_to_sexpr, sexpr_to_binary,
+                        write_binary_ast)
+from regex_tokenizer import RegexTokenizer
+from sexpr_parser import parse_file
+from sexpr_writer import write_forest
+from text_unit import TextUnit
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "examples", "*.lisp")))
+
+
+def signature(node):
+    return [(n.unit_type, n.text, n.id, n.metadata) for n in node.walk()]
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_examples_round_trip(path, tmp_path):
+    root = parse_file(path)
+    out = str(tmp_path / "book.bast")
+    write_binary_ast(root.children, out, title=path)
+    with BinaryAST(out) as ast:
+        assert len(ast) == len(root.children)
+        assert signature(ast.to_text_tree()) == signature(root)
+        # Random access gives each paragraph its id in the book
+        for i in reversed(range(len(ast))):
+            assert signature(ast.paragraph(i)) == signature(root.children[i])
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_sexpr_conversions(path, tmp_path):
+    out = str(tmp_path / "book.bast")
+    with open(path, "rb") as f:
+        sexpr_to_binary(f, out, chunk_size=7)
+    text = io.StringIO()
+    binary_to_sexpr(out, text)
+    expected = io.StringIO()
+    write_forest(parse_file(path).children, expected)
+    assert text.getvalue() == expected.getvalue()
+
+
+def test_paragraph_slices_round_trip(tmp_path):
+    root = TextUnit("Du côté de chez Swann", "BOOK")
+    root.extend_children(RegexTokenizer().build_batch([
+        "Longtemps, je me suis couché de bonne heure. Parfois, à peine ma bougie éteinte.",
+        "Combray, de loin, à dix lieues à la ronde.",
+    ]))
+    out = str(tmp_path / "book.bast")
+    write_binary_ast(root.children, out, title=root.text)
+    with BinaryAST(out) as ast:
+        assert ast.title == root.text
+        assert signature(ast.to_text_tree()) == signature(root)
+
+
+def test_rejects_other_files(tmp_path):
+    empty = tmp_path / "empty.bast"
+    empty.write_bytes(b"")
+    with pytest.raises(BinaryASTError):
+        BinaryAST(str(empty))
+    with pytest.raises(BinaryASTError):
+        BinaryAST(EXAMPLES[0])
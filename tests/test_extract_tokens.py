@@ -0,0 +1,33 @@
+import glob
+import io
+import os
+
+import pytest
+
+from extract_tokens import iter_tokens
+from sexpr_parser import SExprParseError, parse_file
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "examples", "*.lisp")))
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_tokens_are_the_leaves_of_the_parsed_tree(path):
+    root = parse_file(path)
+    leaves = [node.text for node in root.walk() if node is not root and not node.children]
+    assert leaves
+    assert list(iter_tokens(path, use_mmap=True)) == leaves
+    for chunk_size in (1, 3, 7, 4096):
+        assert list(iter_tokens(path, chunk_size=chunk_size)) == leaves
+
+
+def test_ids_metadata_and_escapes():
+    ast = ('(S :id "s0" :metadata {:lemma "dire" :tags (a "b")}\n'
+           '  (N "\\"Combray\\"") ; comment (N "no")\n'
+           '  (PUNCT ",")\n)').encode("utf-8")
+    assert list(iter_tokens(io.BytesIO(ast), chunk_size=2)) == ['"Combray"', ","]
+
+
+def test_unterminated_string_is_an_error():
+    with pytest.raises(SExprParseError):
+        list(iter_tokens(io.BytesIO(b'(N "Combray')))
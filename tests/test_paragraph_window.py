@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from paragraph_window import ParagraphWindow
+from proust_reader import ProustReader
+
+WORDS = "longtemps je me suis couché de bonne heure parfois à peine ma bougie éteinte".split()
+
+
+def make_paragraphs(n):
+    return [f"{WORDS[i % len(WORDS)].capitalize()}, paragraphe {i} : "
+            + " ".join(WORDS[i % 5:]) + "." for i in range(n)]
+
+
+def write(path, paragraphs):
+    path.write_text("".join(paragraph + "\n\n" for paragraph in paragraphs), encoding="utf-8")
+    return str(path)
+
+
+class Recorder:
+    """on_load/on_evict callbacks keeping track of what the window handed over."""
+
+    def __init__(self):
+        self.loaded = {}
+
+    def load(self, p, subtree, fresh):
+        assert p not in self.loaded
+        self.loaded[p] = subtree
+
+    def evict(self, p, subtree):
+        assert self.loaded.pop(p) is subtree
+
+
+def parse(p, text):
+    return (p, text)
+
+
+@pytest.mark.parametrize("capacity", [None, 6])
+def test_eviction_keeps_at_most_capacity(capacity):
+    texts = make_paragraphs(40)
+    recorder = Recorder()
+    window = ParagraphWindow(texts, parse, recorder.load, recorder.evict, look_ahead=3,
+                             look_behind=2, capacity=capacity)
+    window.start()
+    try:
+        for p in list(range(40)) + [30, 2, 17, 39, 0, 20]:
+            assert window.require(p) == (p, texts[p])
+            window.focus(p, 0.0001)
+            window.poll()
+            assert len(window.resident) <= window.capacity
+            assert recorder.loaded.keys() == window.resident.keys()
+    finally:
+        window.stop()
+    assert window.evicted > 0
+
+
+def test_require_parses_inline_when_the_worker_died():
+    texts = make_paragraphs(10)
+
+    def failing(p, text):
+        if threading.current_thread().name == "paragraph-window":
+            raise RuntimeError("model crashed")
+        return parse(p, text)
+
+    recorder = Recorder()
+    window = ParagraphWindow(texts, failing, recorder.load, recorder.evict, look_ahead=2)
+    window.start()
+    assert window.require(4) == (4, texts[4])
+    assert window.require(5) == (5, texts[5])
+    assert isinstance(window.error, RuntimeError)
+    assert window.status.startswith("failed")
+
+
+def test_require_parses_inline_when_the_worker_is_slow():
+    texts = make_paragraphs(10)
+    release = threading.Event()
+
+    def slow(p, text):
+        if threading.current_thread().name == "paragraph-window":
+            release.wait()
+        return parse(p, text)
+
+    recorder = Recorder()
+    window = ParagraphWindow(texts, slow, recorder.load, recorder.evict, look_ahead=2,
+                             max_wait=0.3)
+    window.start()
+    try:
+        start = time.perf_counter()
+        assert window.require(7) == (7, texts[7])
+        assert time.perf_counter() - start < 5
+        assert window.stalls == 1
+    finally:
+        window.stop()
+        release.set()
+
+
+def read_through(reader):
+    """(paragraph, token text) for every token from the reader's position to the end."""
+    window = reader.window
+    reader.seek_paragraph(0)
+    tokens = []
+    while True:
+        reader.apply_window_updates()
+        assert len(window.resident) <= window.capacity
+        tokens.append((reader.cursor.paragraph, reader.cursor.node(reader.text_tree).text))
+        reader.move_to_next_word()
+        if reader.cursor.position == 0:
+            return tokens
+
+
+def all_tokens(reader):
+    return [(p, node.text) for p, paragraph in enumerate(reader.text_tree.children)
+            for node in paragraph.walk() if not node.children and node is not paragraph]
+
+
+def test_windowed_reading_matches_a_full_parse_across_an_update(tmp_path):
+    paragraphs = make_paragraphs(30)
+    reader = ProustReader(write(tmp_path / "book.txt", paragraphs), start_line=0,
+                          use_spacy=False, windowed=True, look_ahead=2, look_behind=1)
+    try:
+        full = ProustReader(write(tmp_path / "full.txt", paragraphs), start_line=0,
+                            use_spacy=False)
+        assert read_through(reader) == all_tokens(full)
+        assert reader.window.evicted > 0
+
+        edited = (["Du côté de chez Swann."] + paragraphs[:10] + paragraphs[12:20]
+                  + [paragraphs[20] + " Combray, 1914."] + paragraphs[21:])
+        reader.seek_paragraph(15)
+        reader.update(edited)
+        full = ProustReader(write(tmp_path / "edited.txt", edited), start_line=0,
+                            use_spacy=False)
+        assert read_through(reader) == all_tokens(full)
+    finally:
+        reader.stop_background()
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+
+import pytest
+
+from parse_cache import ParseCache, decode_unit, encode_unit
+from proust_reader import ProustReader
+from text_unit import TextUnit
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+def test_encode_decode_keeps_offsets():
+    paragraph = TextUnit("Longtemps, je me suis couché.", "PARAGRAPH", offsets=(0, 29))
+    paragraph.metadata = {"position": 0}
+    sentence = paragraph.add_child(TextUnit("Longtemps, je me suis couché.", "SENTENCE",
+                                            offsets=(0, 29)))
+    sentence.add_child(TextUnit("Longtemps", "ADV", offsets=(0, 9)))
+
+    copy = decode_unit(encode_unit(paragraph))
+    assert [(n.unit_type, n.text, n.offsets) for n in copy.walk()] == \
+        [(n.unit_type, n.text, n.offsets) for n in paragraph.walk()]
+    assert copy.children[0].children[0].id == "paragraph-s0-a0"
+
+
+def spacy_reader(corpus, cache, detached):
+    pytest.importorskip("spacy")
+    sys.path.insert(0, BENCHMARKS)
+    from pipeline import benchmark_pipeline
+    reader = ProustReader(corpus, start_line=0, use_spacy=False, cache=None, detached=detached)
+    reader.cache = cache
+    reader.nlp, _ = benchmark_pipeline("fr_core_news_sm")
+    reader.parse_text()
+    return reader
+
+
+def offsets(reader):
+    return [(node.text, node.offsets) for node in reader.text_tree.walk()]
+
+
+def test_detached_trees_come_back_from_the_cache_with_offsets(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("Longtemps, je me suis couché de bonne heure.\n\n"
+                      "Parfois, à peine ma bougie éteinte, mes yeux se fermaient.\n",
+                      encoding="utf-8")
+    cache = ParseCache(str(tmp_path / "cache.sqlite3"))
+
+    spacy_reader(str(corpus), cache, detached=False)  # attached entries must not be reused
+    first = spacy_reader(str(corpus), cache, detached=True)
+    hits = cache.hits
+    second = spacy_reader(str(corpus), cache, detached=True)
+    cache.close()
+
+    assert cache.hits == hits + 2
+    assert all(node.offsets is not None for node in second.text_tree.walk()
+               if node.parent is not None)
+    assert offsets(second) == offsets(first)
+
+
+class FakeModel:
+    """The benchmark pipeline standing in for an installed fr_core_news_sm package,
+    counting how often it is loaded and run."""
+
+    def __init__(self, monkeypatch):
+        pytest.importorskip("spacy")
+        sys.path.insert(0, BENCHMARKS)
+        from pipeline import benchmark_pipeline
+        import model_loader
+        import proust_reader
+        self.nlp, _ = benchmark_pipeline("fr_core_news_sm")
+        self.nlp.meta.update(lang="fr", name="core_news_sm", version="3.8.0")
+        self.loads = 0
+        self.pipes = 0
+        pipe = self.nlp.pipe
+
+        def counted_pipe(*args, **kwargs):
+            self.pipes += 1
+            return pipe(*args, **kwargs)
+
+        self.nlp.pipe = counted_pipe
+        monkeypatch.setattr(model_loader, "load_model", self.load)
+        monkeypatch.setattr(proust_reader, "load_model", self.load)
+        monkeypatch.setattr(proust_reader, "model_version", lambda name: "3.8.0")
+        monkeypatch.setattr(proust_reader, "SPACY_AVAILABLE", True)
+
+    def load(self, name):
+        self.loads += 1
+        return self.nlp
+
+
+def write_corpus(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("Longtemps, je me suis couché de bonne heure.\n\n"
+                      "Parfois, à peine ma bougie éteinte, mes yeux se fermaient.\n\n"
+                      "Je voulais poser le volume que je croyais avoir dans les mains.\n",
+                      encoding="utf-8")
+    return str(corpus)
+
+
+def tree(reader):
+    return [(node.unit_type, node.text, node.id, node.metadata)
+            for node in reader.text_tree.walk()]
+
+
+def test_warm_start_does_not_load_the_model(tmp_path, monkeypatch):
+    model = FakeModel(monkeypatch)
+    corpus = write_corpus(tmp_path)
+    cache = ParseCache(str(tmp_path / "cache.sqlite3"))
+
+    cold = ProustReader(corpus, start_line=0, cache=cache)
+    assert model.loads == 1 and model.pipes
+    pipes = model.pipes
+    warm = ProustReader(corpus, start_line=0, cache=cache)
+    cache.close()
+
+    assert (model.loads, model.pipes) == (1, pipes)
+    assert cache.hits == 3
+    assert tree(warm) == tree(cold)
+    assert not warm.nlp.loaded
+
+
+def test_background_parse_takes_cached_paragraphs_without_the_model(tmp_path, monkeypatch):
+    model = FakeModel(monkeypatch)
+    corpus = write_corpus(tmp_path)
+    cache = ParseCache(str(tmp_path / "cache.sqlite3"))
+
+    cold = ProustReader(corpus, start_line=0, cache=cache, background_model=True)
+    while cold.background is not None:
+        cold.apply_background_updates()
+        time.sleep(0.01)
+    assert model.loads == 1 and model.pipes
+    pipes = model.pipes
+    hits = cache.hits
+    warm = ProustReader(corpus, start_line=0, cache=cache, background_model=True)
+    cache.close()
+
+    assert warm.background is None
+    assert (model.loads, model.pipes) == (1, pipes)
+    assert cache.hits == hits + 6  # the regex parse's paragraphs, then spaCy's
+    assert tree(warm) == tree(cold)
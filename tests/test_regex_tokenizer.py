@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+from legacy import legacy_paragraph
+from regex_tokenizer import BREAK, RegexTokenizer, tokenize
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+TEXTS = [
+    "Longtemps, je me suis couché de bonne heure.",
+    "Je la vois, le 12 mai.\nIl   dit: « oui » ; 3,5 l'été!",
+    "Le chat. La nuit... 1er janvier 1914 ?  Et LE soir, LA lampe.",
+    ",, ,début, fin,",
+    "« »",
+    "",
+    "   ",
+    "Un mot et　l'autre.\tFin.",
+]
+
+
+def corpus():
+    sys.path.insert(0, BENCHMARKS)
+    from corpus import make_paragraphs
+    return TEXTS + make_paragraphs(40)
+
+
+def signature(paragraph):
+    return [(node.unit_type, node.text, node.metadata, node.id) for node in paragraph.walk()]
+
+
+def expected_paragraph(i, text):
+    """The legacy tree with its one intended change: "le" and "la" are DET, not PRON."""
+    paragraph = legacy_paragraph(i, text)
+    for node in paragraph.walk():
+        if not node.children and node.text.lower() in ("le", "la"):
+            node.unit_type = "DET"
+    return paragraph
+
+
+def test_trees_match_the_legacy_parser():
+    texts = corpus()
+    built = list(RegexTokenizer().build_batch(texts))
+    for i, (text, paragraph) in enumerate(zip(texts, built)):
+        assert signature(paragraph) == signature(expected_paragraph(i, text))
+
+
+def test_le_and_la_are_determiners():
+    text = "Je la vois, le soir. La lampe et LE livre, la."
+    legacy = [(node.text, node.unit_type) for node in legacy_paragraph(0, text).walk()
+              if node.text.lower() in ("le", "la")]
+    built = [(node.text, node.unit_type)
+             for node in RegexTokenizer().build_paragraph(text).walk()
+             if node.text.lower() in ("le", "la")]
+    assert legacy == [("la", "PRON"), ("le", "PRON"), ("La", "PRON"), ("LE", "PRON"),
+                      ("la", "PRON")]
+    assert built == [("la", "DET"), ("le", "DET"), ("La", "DET"), ("LE", "DET"),
+                     ("la", "DET")]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_token_stream_matches_the_legacy_words(text):
+    words = [(node.text, node.unit_type) for node in expected_paragraph(0, text).walk()
+             if node.unit_type not in ("PARAGRAPH", "SENTENCE", "PHRASE")]
+    pieces, types = tokenize(text)
+    stream = [(piece, token_type) for piece, token_type in zip(pieces, types)
+              if token_type != BREAK]
+    assert stream == words
+    assert types.count(BREAK) == max(len(legacy_paragraph(0, text).children) - 1, 0)
+
+
+def test_tokenize_batch_is_tokenize():
+    texts = corpus()
+    assert list(RegexTokenizer().tokenize_batch(texts)) == [tokenize(text) for text in texts]
@@ -0,0 +1,93 @@
+from proust_reader import ProustReader
+from renderer import ReaderRenderer, wrap_offsets
+
+PARAGRAPHS = [
+    "Longtemps, je me suis couché de bonne heure.",
+    "Parfois, à peine ma bougie éteinte, mes yeux se fermaient si vite que je n'avais "
+    "pas le temps de me dire : « Je m'endors. »",
+    "Et, une demi-heure après, la pensée qu'il était temps de chercher le sommeil m'éveillait.",
+    "Je voulais poser le volume que je croyais avoir dans les mains et souffler ma lumière.",
+]
+
+ATTRS = dict.fromkeys(("title", "paragraph", "sentence", "word", "normal"), 0)
+
+
+class GridScreen:
+    """A curses window that keeps the characters written to it."""
+
+    def __init__(self, height=30, width=40):
+        self.height, self.width = height, width
+        self.erase()
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def erase(self):
+        self.rows = [[" "] * self.width for _ in range(self.height)]
+
+    def move(self, y, x):
+        self.y = y
+
+    def clrtoeol(self):
+        self.rows[self.y] = [" "] * self.width
+
+    def addnstr(self, y, x, text, n, attr=0):
+        for i, char in enumerate(text[:n]):
+            self.rows[y][x + i] = char
+
+    def noutrefresh(self):
+        pass
+
+    def lines(self):
+        return ["".join(row).rstrip() for row in self.rows]
+
+
+def write(path, paragraphs):
+    path.write_text("".join(paragraph + "\n\n" for paragraph in paragraphs), encoding="utf-8")
+    return str(path)
+
+
+def render(reader, width=40):
+    screen = GridScreen(width=width)
+    ReaderRenderer(screen, ATTRS, doupdate=lambda: None).draw(reader, "status")
+    return screen.lines()
+
+
+def test_wrap_offsets():
+    assert wrap_offsets("", 10) == [(0, 0)]
+    assert wrap_offsets("un deux trois", 8) == [(0, 7), (8, 13)]
+    assert wrap_offsets("anticonstitutionnellement", 10) == [(0, 10), (10, 20), (20, 25)]
+
+
+def test_edited_paragraphs_are_laid_out_again(tmp_path):
+    reader = ProustReader(write(tmp_path / "book.txt", PARAGRAPHS), start_line=0,
+                          use_spacy=False)
+    reader.seek_paragraph(2)
+    screen = GridScreen()
+    renderer = ReaderRenderer(screen, ATTRS, doupdate=lambda: None)
+    renderer.draw(reader, "status")
+    assert screen.lines() == render(reader)
+
+    # Same viewport and cursor, different text above and at the cursor
+    edited = ["Combray.", PARAGRAPHS[1] + " Puis je dormis longtemps.", PARAGRAPHS[2] + " Fin."]
+    reader.update(edited + PARAGRAPHS[3:])
+    assert reader.current_paragraph_idx == 2
+    renderer.draw(reader, "status")
+    assert screen.lines() == render(reader)
+
+    # and back: layouts are not reused for other text at the same index
+    reader.update(PARAGRAPHS)
+    renderer.draw(reader, "status")
+    assert screen.lines() == render(reader)
+
+
+def test_resize_lays_out_at_the_new_width(tmp_path):
+    reader = ProustReader(write(tmp_path / "book.txt", PARAGRAPHS), start_line=0,
+                          use_spacy=False)
+    reader.seek_paragraph(1)
+    screen = GridScreen(width=40)
+    renderer = ReaderRenderer(screen, ATTRS, doupdate=lambda: None)
+    renderer.draw(reader, "status")
+    screen.width = 25
+    renderer.draw(reader, "status")
+    assert screen.lines() == render(reader, width=25)
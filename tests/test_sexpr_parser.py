@@ -0,0 +1,54 @@
+import glob
+import os
+
+import pytest
+
+from sexpr_parser import SExprParseError, SExprPushParser, parse_file
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "examples", "*.lisp")))
+
+
+def signature(nodes):
+    return [(n.unit_type, n.text, n.id, n.metadata) for node in nodes for n in node.walk()]
+
+
+def test_there_are_examples():
+    assert EXAMPLES
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_chunk_size_does_not_change_the_tree(path):
+    expected = signature(parse_file(path, chunk_size=4096).children)
+    assert expected
+    for chunk_size in (1, 3, 7):
+        assert signature(parse_file(path, chunk_size=chunk_size).children) == expected
+    assert signature(parse_file(path, use_mmap=True, chunk_size=7).children) == expected
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=os.path.basename)
+def test_to_s_expr_reads_back_as_the_same_tree(path):
+    for node in parse_file(path).children:
+        text = node.to_s_expr()
+        parser = SExprPushParser()
+        completed = parser.feed(text) + parser.close()
+        copy = completed[-1]
+        assert copy.parent is None
+        assert signature([copy]) == signature([node])
+        assert copy.to_s_expr() == text
+
+
+def test_nodes_are_returned_as_they_close():
+    parser = SExprPushParser()
+    assert [n.text for n in parser.feed('(S (N "a") (V "b')] == ["a"]
+    assert parser.depth == 2
+    completed = parser.feed('") )')
+    assert [n.unit_type for n in completed] == ["V", "S"]
+    assert [n.text for n in completed[-1].children] == ["a", "b"]
+
+
+def test_unbalanced_input_is_an_error():
+    parser = SExprPushParser()
+    parser.feed('(S (N "a")')
+    with pytest.raises(SExprParseError):
+        parser.close()
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from legacy import legacy_chunks, legacy_word_type
+from spacy_tree import chunk_doc, pos_tables
+
+spacy = pytest.importorskip("spacy")
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+# Words with the POS that chunk_doc treats differently
+WORDS = [("maison", "NOUN"), ("Swann", "PROPN"), ("lisais", "VERB"), ("de", "ADP"),
+         ("le", "DET"), ("bonne", "ADJ"), ("je", "PRON"), ("être", "AUX"), ("et", "CCONJ"),
+         ("que", "SCONJ"), ("12", "NUM"), ("ah", "INTJ"), (",", "PUNCT"), (".", "PUNCT"),
+         ("«", "PUNCT"), (";", "PUNCT"), ("!", "PUNCT"), ("%", "SYM")]
+
+
+def random_doc(vocab, rng, length):
+    """A Doc of random tagged words and sentence starts, each token headed by its
+    sentence's first token (as benchmarks/pipeline.py parses)."""
+    picked = [rng.choice(WORDS) for _ in range(length)]
+    sent_starts = [i == 0 or rng.random() < 0.15 for i in range(length)]
+    heads, deps, root = [], [], 0
+    for i, start in enumerate(sent_starts):
+        if start:
+            root = i
+        heads.append(root)
+        deps.append("ROOT" if start else "dep")
+    return spacy.tokens.Doc(vocab, words=[word for word, _ in picked],
+                            pos=[pos for _, pos in picked], heads=heads, deps=deps,
+                            sent_starts=sent_starts)
+
+
+def vectorized_chunks(docs):
+    return [chunk_doc(doc, list(doc.sents)) for doc in docs]
+
+
+def test_chunks_match_the_legacy_chunker_on_random_docs():
+    vocab = spacy.blank("fr").vocab
+    rng = random.Random(1913)
+    docs = [random_doc(vocab, rng, rng.randint(1, 40)) for _ in range(300)]
+    assert vectorized_chunks(docs) == legacy_chunks(docs)
+
+
+def test_chunks_match_the_legacy_chunker_on_the_benchmark_corpus():
+    sys.path.insert(0, BENCHMARKS)
+    from corpus import make_paragraphs
+    from pipeline import benchmark_pipeline
+    nlp, _ = benchmark_pipeline("fr_core_news_sm")
+    docs = list(nlp.pipe(make_paragraphs(40) + ["", "Fin.", "« Oui ! » ; dit-il, 12 fois."]))
+    assert vectorized_chunks(docs) == legacy_chunks(docs)
+
+
+def test_word_types_match_the_legacy_ladder_for_every_pos():
+    from spacy.parts_of_speech import IDS
+    word_types = pos_tables()[1]
+    for name, pos in IDS.items():
+        assert word_types[int(pos)] == legacy_word_type(SimpleNamespace(pos_=name)), name
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from regex_tokenizer import RegexTokenizer
+from stream_server import WRITE_BUFFER_HIGH, SharedBook, StreamServer
+from text_unit import TextUnit
+
+TEXT = ("Longtemps, je me suis couché de bonne heure. Parfois, à peine ma bougie "
+        "éteinte, mes yeux se fermaient si vite que je n'avais pas le temps de me dire.")
+
+
+def make_book(paragraphs):
+    root = TextUnit("Du côté de chez Swann", "BOOK")
+    root.extend_children(RegexTokenizer().build_batch([TEXT] * paragraphs))
+    return SharedBook(root)
+
+
+async def start(book, speed=0.0):
+    server = StreamServer(book, speed=speed)
+    listening = await server.start_tcp("127.0.0.1", 0)
+    return server, listening.sockets[0].getsockname()[1]
+
+
+async def read_events(reader):
+    """Events up to and including the end of the book."""
+    events = []
+    while True:
+        event = json.loads(await reader.readline())
+        events.append(event)
+        if event["event"] == "end":
+            return events
+
+
+async def wait_for(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_two_clients_each_get_every_token_in_order():
+    book = make_book(3)
+
+    async def scenario():
+        server, port = await start(book)
+        first = await asyncio.open_connection("127.0.0.1", port)
+        second = await asyncio.open_connection("127.0.0.1", port)
+        results = await asyncio.gather(read_events(first[0]), read_events(second[0]))
+        for _, writer in (first, second):
+            writer.write(b"quit\n")
+            await writer.drain()
+        await server.close()
+        return results
+
+    for events in asyncio.run(scenario()):
+        tokens = [event for event in events if event["event"] == "token"]
+        assert [event["token"] for event in tokens] == list(range(len(book)))
+        assert [event["start"] for event in tokens] == list(book.table.start)
+        paragraphs = [event["paragraph"] for event in events if event["event"] == "paragraph"]
+        assert paragraphs == list(range(3))
+
+
+def test_quit_and_dropped_connections_are_cleaned_up():
+    book = make_book(3)
+
+    async def scenario():
+        server, port = await start(book, speed=0.01)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readline()
+        writer.write(b"quit\n")
+        await writer.drain()
+        assert await asyncio.wait_for(reader.read(), 5)  # the rest, then end of stream
+        assert reader.at_eof()
+
+        _, dropped = await asyncio.open_connection("127.0.0.1", port)
+        await wait_for(lambda: len(server.clients) == 1)
+        dropped.close()  # mid-stream, without quitting
+        await wait_for(lambda: not server.clients)
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_a_client_that_stops_reading_only_holds_up_its_own_stream():
+    book = make_book(2000)
+
+    async def scenario():
+        server, port = await start(book)
+        _, stalled = await asyncio.open_connection("127.0.0.1", port)
+        await wait_for(lambda: len(server.clients) == 1)
+        (client,) = server.clients
+        # Once the socket buffers are full the cursor stops, well before the
+        # end, with no more than the high-water mark (plus the line in flight)
+        # buffered by the server
+        positions = []
+
+        def stopped():
+            positions.append(client.cursor.position)
+            return len(positions) > 30 and positions[-30] == positions[-1]
+
+        await wait_for(stopped)
+        assert positions[-1] < len(book) // 2
+        assert client.writer.transport.get_write_buffer_size() <= WRITE_BUFFER_HIGH + 4096
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"paragraph 1999\n")
+        await writer.drain()
+        events = await asyncio.wait_for(read_events(reader), 5)
+        assert events[-2]["token"] == len(book) - 1
+        stalled.close()
+        writer.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_closing_with_clients_connected_logs_no_errors(caplog):
+    book = make_book(20)
+
+    async def scenario():
+        server, port = await start(book, speed=0.01)
+        connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+        for reader, _ in connections:
+            await reader.readline()
+        await server.close()
+        for reader, _ in connections:
+            await asyncio.wait_for(reader.read(), 5)
+            assert reader.at_eof()
+        assert not server.clients
+
+    with caplog.at_level(logging.ERROR, logger="asyncio"):
+        asyncio.run(scenario())
+    assert not caplog.records
+
+
+@pytest.mark.parametrize("command,message", [
+    ("speed nan", "speed must be a finite number >= 0"),
+    ("speed inf", "speed must be a finite number >= 0"),
+    ("speed -1", "speed must be a finite number >= 0"),
+    ("percent inf", "percent must be a finite number"),
+    ("percent -inf", "percent must be a finite number"),
+    ("percent nan", "percent must be a finite number"),
+    ("percent 1e308", "bad argument for percent: '1e308'"),
+    ("seek x", "bad argument for seek: 'x'"),
+])
+def test_bad_arguments_are_reported_and_the_client_keeps_going(command, message):
+    book = make_book(3)
+
+    async def scenario():
+        server, port = await start(book, speed=0.01)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await wait_for(lambda: len(server.clients) == 1)
+        (client,) = server.clients
+        writer.write(f"pause\n{command}\nspeed 0\nseek 0\nresume\n".encode())
+        await writer.drain()
+        events = await asyncio.wait_for(read_events(reader), 5)
+        writer.write(b"quit\n")
+        await writer.drain()
+        await server.close()
+        return client, events
+
+    client, events = asyncio.run(scenario())
+    assert [event["message"] for event in events if event["event"] == "error"] == [message]
+    assert client.speed == 0
+    assert events[-2]["token"] == len(book) - 1
@@ -0,0 +1,76 @@
+from text_unit import TextUnit
+
+
+def detached_paragraph():
+    """paragraph -> sentence -> word, built without a parent above the paragraph."""
+    paragraph = TextUnit("Longtemps.", "PARAGRAPH")
+    sentence = paragraph.add_child(TextUnit("Longtemps.", "SENTENCE"))
+    word = sentence.add_child(TextUnit("Longtemps", "WORD"))
+    return paragraph, word
+
+
+def test_ids_follow_a_subtree_attached_after_its_ids_were_read():
+    book = TextUnit("Du côté de chez Swann", "BOOK")
+    book.add_child(TextUnit("Combray", "PARAGRAPH"))
+    paragraph, word = detached_paragraph()
+    assert word.id == "paragraph-s0-w0"
+
+    book.add_child(paragraph)
+    assert word.id == "book-p1-s0-w0"
+
+
+def test_ids_follow_a_subtree_attached_with_extend_children():
+    book = TextUnit("Du côté de chez Swann", "BOOK")
+    first, _ = detached_paragraph()
+    second, word = detached_paragraph()
+    assert word.id == "paragraph-s0-w0"
+
+    book.extend_children([first, second])
+    assert word.id == "book-p1-s0-w0"
+    assert book.find("book-p1-s0-w0") is word
+
+
+def test_ids_follow_a_subtree_attached_with_replace_children():
+    book = TextUnit("Du côté de chez Swann", "BOOK")
+    first = book.add_child(TextUnit("Combray", "PARAGRAPH"))
+    paragraph, word = detached_paragraph()
+    assert word.id == "paragraph-s0-w0"
+
+    book.replace_children([first, paragraph])
+    assert word.id == "book-p1-s0-w0"
+
+
+def test_ids_are_renumbered_after_insert_and_remove():
+    book = TextUnit("Du côté de chez Swann", "BOOK")
+    paragraph, word = detached_paragraph()
+    book.add_child(paragraph)
+    assert word.id == "book-p0-s0-w0"
+
+    book.insert_child(0, TextUnit("Combray", "PARAGRAPH"))
+    assert word.id == "book-p1-s0-w0"
+
+    book.remove_child(book.children[0])
+    assert word.id == "book-p0-s0-w0"
+
+    book.remove_child(paragraph)
+    assert word.id == "paragraph-s0-w0"
+
+
+def test_grandchild_ids_follow_direct_changes_to_children():
+    book = TextUnit("Du côté de chez Swann", "BOOK")
+    paragraph, word = detached_paragraph()
+    last, last_word = detached_paragraph()
+    book.extend_children([paragraph, last])
+    assert (word.id, last_word.id) == ("book-p0-s0-w0", "book-p1-s0-w0")
+
+    book.children.insert(0, TextUnit("Combray", "PARAGRAPH", book))
+    assert word.id == "book-p1-s0-w0"
+    assert last_word.id == "book-p2-s0-w0"
+
+    paragraph.children.insert(0, TextUnit("Parfois.", "SENTENCE", paragraph))
+    assert word.id == "book-p1-s1-w0"
+
+    del book.children[0]
+    assert last_word.id == "book-p1-s0-w0"
+    assert word.id == "book-p0-s1-w0"
+    assert book.find("book-p0-s1-w0") is word
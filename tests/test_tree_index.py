@@ -0,0 +1,151 @@
+import glob
+import operator
+import os
+
+import pytest
+
+from regex_tokenizer import RegexTokenizer
+from sexpr_parser import parse_file
+from text_unit import TextUnit
+from tree_index import CHILD, DESCENDANT, SelectorError, TreeIndex, parse_selector
+from tree_store import TreeStore
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "examples", "*.lisp")))
+
+
+def steps(selector):
+    return [(step.combinator, step.unit_type, step.predicates) for step in parse_selector(selector)]
+
+
+def test_parse_selector():
+    assert steps("SENTENCE > VP > V[lemma=être]") == [
+        (DESCENDANT, "SENTENCE", []), (CHILD, "VP", []), (CHILD, "V", [("lemma", "=", "être")])]
+    assert steps('  PARAGRAPH   NP[ text = "la \\"maison\\"" ][tokens>=2] ') == [
+        (DESCENDANT, "PARAGRAPH", []),
+        (DESCENDANT, "NP", [("text", "=", 'la "maison"'), ("tokens", ">=", 2)])]
+    assert steps("*[length<2.5][position!=-1]>N") == [
+        (DESCENDANT, "*", [("length", "<", 2.5), ("position", "!=", -1)]), (CHILD, "N", [])]
+
+
+@pytest.mark.parametrize("selector, message", [
+    ("", "empty selector"),
+    ("   ", "empty selector"),
+    ("> V", "'>' without a step on both sides"),
+    ("SENTENCE > > V", "'>' without a step on both sides"),
+    ("SENTENCE >", "selector ends with '>'"),
+    ("[lemma=être]", "predicate without a node type"),
+    ("SENTENCE > [tokens>3]", "predicate without a node type"),
+    ("V[lemma~être]", "unexpected '[lemma~êtr' at 1"),
+    ("V[lemma=]", "unexpected '[lemma=]' at 1"),
+    ("SENTENCE, V", "unexpected ', V' at 8"),
+])
+def test_malformed_selectors(selector, message):
+    with pytest.raises(SelectorError, match=message.replace("[", r"\[").replace("*", r"\*")):
+        parse_selector(selector)
+
+
+def sample():
+    """The example trees and a regex-parsed paragraph (with lemmas) under one BOOK."""
+    root = TextUnit("sample", "BOOK")
+    for path in EXAMPLES:
+        parse_file(path, root=root)
+    paragraph = RegexTokenizer().build_paragraph(
+        "Longtemps, je me suis couché de bonne heure. Parfois, à peine ma bougie éteinte, "
+        "mes yeux se fermaient si vite que je n'avais pas le temps de me dire : je m'endors.")
+    for node in paragraph.walk():
+        if not node.children and node.unit_type != "PUNCT":
+            node.metadata["lemma"] = node.text.lower().rstrip("s")
+    root.add_child(paragraph)
+    return root
+
+
+COMPARE = {"=": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+           ">": operator.gt, ">=": operator.ge}
+
+
+def value(node, attribute):
+    if attribute == "text":
+        return node.text
+    if attribute == "tokens":
+        return sum(1 for leaf in node.walk() if not leaf.children)
+    if attribute == "index":
+        return node.index
+    if attribute in node.metadata:
+        return node.metadata[attribute]
+    return {"length": len(node.text), "position": node.index}.get(attribute)
+
+
+def matches_step(node, step):
+    if step.unit_type != "*" and node.unit_type != step.unit_type:
+        return False
+    for attribute, op, expected in step.predicates:
+        actual = value(node, attribute)
+        if actual is None:
+            return False
+        if attribute in ("text", "lemma") and isinstance(actual, str):
+            actual, expected = actual.lower(), str(expected).lower()
+        try:
+            if not COMPARE[op](actual, expected):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def matches(node, steps, i):
+    """Whether node matches steps[i] with its ancestors matching steps[:i], by walking up."""
+    if not matches_step(node, steps[i]):
+        return False
+    if i == 0:
+        return True
+    parent = node.parent
+    if steps[i].combinator == CHILD:
+        return parent is not None and matches(parent, steps, i - 1)
+    while parent is not None:
+        if matches(parent, steps, i - 1):
+            return True
+        parent = parent.parent
+    return False
+
+
+SELECTORS = [
+    "S", "*", "PHRASE > N", "PARAGRAPH N", "SENTENCE > * > PUNCT", "S S NP > N",
+    "N[text=yeux]", "*[text=yeux]", "PHRASE[text=\"Parfois\"]", "WORD[lemma=bougie]",
+    "*[lemma=mes]", "SENTENCE > PHRASE[lemma=heure]", "SENTENCE[tokens>20]",
+    "PHRASE[tokens<=1]", "PARAGRAPH[length>=1000]", "SENTENCE[position=1] > PHRASE",
+    "*[position!=0]", "V[person=3]", "*[number=:sing]", "PHRASE[index>2] > *[index<1]",
+    "NP[semantic-role=:subject] > N", "S > NP V", "SENTENCE[tokens>5][tokens<30] PRON",
+    "N[tokens=abc]", "MISSING", "PARAGRAPH > MISSING > N",
+]
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_select_matches_a_tree_walk(selector):
+    root = sample()
+    index = TreeIndex.build(root)
+    parsed = parse_selector(selector)
+    expected = [node for node in root.walk()
+                if node is not root and matches(node, parsed, len(parsed) - 1)]
+    selected = index.select(selector)
+    assert [id(node) for node in selected] == [id(node) for node in expected]
+    assert index.count(selector) == len(expected)
+
+
+def test_sample_has_matches():
+    index = TreeIndex.build(sample())
+    for selector in ("N[text=yeux]", "WORD[lemma=bougie]", "SENTENCE[tokens>20]",
+                     "V[person=3]", "S S NP > N"):
+        assert index.select(selector), selector
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_select_on_the_arrays_backend(selector):
+    root = sample()
+    store = TreeStore(root.text)
+    for paragraph in root.children:
+        store.append(paragraph)
+    expected = TreeIndex.build(root).select(selector)
+    selected = TreeIndex.build(store.root).select(selector)
+    assert [(n.unit_type, n.text, n.id) for n in selected] == \
+        [(n.unit_type, n.text, n.id) for n in expected]
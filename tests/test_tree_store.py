@@ -0,0 +1,48 @@
+import pytest
+
+from regex_tokenizer import RegexTokenizer
+from text_unit import TextUnit
+from tree_store import TreeStore
+
+TEXTS = [
+    "Longtemps, je me suis couché de bonne heure.",
+    "Parfois, à peine ma bougie éteinte, mes yeux se fermaient. Je n'avais pas le temps.",
+    "Et, une demi-heure après, la pensée qu'il était temps de chercher le sommeil m'éveillait.",
+]
+
+
+def book():
+    root = TextUnit("Du côté de chez Swann", "BOOK")
+    root.extend_children(RegexTokenizer().build_batch(TEXTS))
+    store = TreeStore(root.text)
+    for paragraph in root.children:
+        store.append(paragraph)
+    return root, store
+
+
+def pairs(root, store):
+    """Every (TextUnit, TextUnitView) pair, in document order."""
+    return list(zip(root.walk(), store.root.walk()))
+
+
+def test_views_match_the_object_tree():
+    root, store = book()
+    for node, view in pairs(root, store):
+        assert (view.unit_type, view.text, view.id, view.index) == \
+            (node.unit_type, node.text, node.id, node.index)
+
+
+@pytest.mark.parametrize("spliced", [False, True])
+def test_find_searches_only_the_views_subtree(spliced):
+    root, store = book()
+    if spliced:  # rows of a replaced paragraph are left behind, out of order
+        paragraph = RegexTokenizer().build_paragraph(TEXTS[1] + " Puis je dormis.", 1)
+        root.replace_child(root.children[1], paragraph)
+        store.splice(1, 1, [paragraph])
+    nodes = pairs(root, store)
+    ids = [node.id for node, _ in nodes] + ["book-p7", "nothing"]
+    for node, view in nodes:
+        for node_id in ids:
+            found = view.find(node_id)
+            expected = node.find(node_id)
+            assert (found and found.id) == (expected and expected.id), (view.id, node_id)
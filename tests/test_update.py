@@ -0,0 +1,81 @@
+import pytest
+
+from proust_reader import BACKENDS, ProustReader
+from token_cursor import TokenTable, _COLUMNS
+
+PARAGRAPHS = [
+    "Longtemps, je me suis couché de bonne heure. Parfois, à peine ma bougie éteinte.",
+    "Je n'avais pas le temps de me dire : « Je m'endors. »",
+    "Et, une demi-heure après, la pensée qu'il était temps de chercher le sommeil m'éveillait.",
+    "Je voulais poser le volume que je croyais avoir dans les mains et souffler ma lumière.",
+    "Je n'avais pas cessé en dormant de faire des réflexions sur ce que je venais de lire.",
+]
+
+# (name, edited paragraphs, the paragraph the reader was on, where it should be after)
+EDITS = [
+    ("edit", PARAGRAPHS[:2] + ["Et, une heure après, le sommeil revint."] + PARAGRAPHS[3:], 3, 3),
+    ("edit-current", PARAGRAPHS[:3] + [PARAGRAPHS[3] + " Puis je dormis."] + PARAGRAPHS[4:],
+     3, 3),
+    ("insert", PARAGRAPHS[:1] + ["Combray, de loin.", "Une église, 1914."] + PARAGRAPHS[1:],
+     3, 5),
+    ("delete", PARAGRAPHS[:1] + PARAGRAPHS[3:], 3, 1),
+    ("delete-current", PARAGRAPHS[:3] + PARAGRAPHS[4:], 3, 3),
+    ("append", PARAGRAPHS + ["Il était temps.", "Je m'éveillais."], 3, 3),
+    ("insert-first", ["Du côté de chez Swann."] + PARAGRAPHS, 0, 1),
+]
+
+
+def write(path, paragraphs):
+    path.write_text("".join(paragraph + "\n\n" for paragraph in paragraphs), encoding="utf-8")
+    return str(path)
+
+
+def tree(reader):
+    return [(node.unit_type, node.text, node.id, node.metadata)
+            for node in reader.text_tree.walk()]
+
+
+def columns(table):
+    return {name: list(getattr(table, name)) for name in _COLUMNS + ("paragraph_first",)}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name, edited, before, after", EDITS, ids=[edit[0] for edit in EDITS])
+def test_update_matches_a_full_parse(tmp_path, backend, name, edited, before, after):
+    reader = ProustReader(write(tmp_path / "before.txt", PARAGRAPHS), start_line=0,
+                          use_spacy=False, backend=backend)
+    reader.seek_paragraph(before)
+    reader.move_to_next_word()
+    word = reader.cursor.node(reader.text_tree).text
+
+    update = reader.update(edited)
+    full = ProustReader(write(tmp_path / "after.txt", edited), start_line=0,
+                        use_spacy=False, backend=backend)
+
+    assert update
+    assert tree(reader) == tree(full)
+    assert columns(reader.cursor.table) == columns(TokenTable.build(full.text_tree))
+    assert reader.current_paragraph_idx == after
+    if edited[after].startswith(PARAGRAPHS[before]):  # kept or extended: same word
+        assert reader.cursor.node(reader.text_tree).text == word
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_update_without_changes(tmp_path, backend):
+    reader = ProustReader(write(tmp_path / "before.txt", PARAGRAPHS), start_line=0,
+                          use_spacy=False, backend=backend)
+    before = tree(reader)
+    assert not reader.update(list(PARAGRAPHS))
+    assert tree(reader) == before
+
+
+def test_successive_updates(tmp_path):
+    reader = ProustReader(write(tmp_path / "before.txt", PARAGRAPHS), start_line=0,
+                          use_spacy=False, backend="arrays")
+    reader.seek_paragraph(4)
+    for _, edited, _, _ in EDITS:
+        reader.update(edited)
+    full = ProustReader(write(tmp_path / "after.txt", EDITS[-1][1]), start_line=0,
+                        use_spacy=False, backend="arrays")
+    assert tree(reader) == tree(full)
+    assert columns(reader.cursor.table) == columns(TokenTable.build(full.text_tree))